@@ -1,6 +1,9 @@
 from math import log as log
+from numpy import log as np_log
 from numpy import zeros as zeros
 from scipy.special import gammaincc as gammaincc
+from SequenceContext import SequenceContext
+from TestResult import TestResult
 
 class ApproximateEntropy:
 
@@ -14,40 +17,40 @@ class ApproximateEntropy:
         the frequency of overlapping blocks of two consecutive/adjacent lengths (m and m+1) against the
         expected result for a random sequence.
 
-        :param      binary_data:        a binary string
+        :param      binary_data:        a binary string or BitSequence
         :param      verbose             True to display the debug message, False to turn off debug message
         :param      pattern_length:     the length of the pattern (m)
         :return:    ((p_value1, bool), (p_value2, bool)) A tuple which contain the p_value and result of serial_test(True or False)
         """
-        length_of_binary_data = len(binary_data)
+        context = SequenceContext.adapt(binary_data)
+        length_of_binary_data = len(context)
 
         # Augment the n-bit sequence to create n overlapping m-bit sequences by appending m-1 bits
-        # from the beginning of the sequence to the end of the sequence.
-        # NOTE: documentation says m-1 bits but that doesnt make sense, or work.
-        binary_data += binary_data[:pattern_length + 1:]
-
-        # Get max length one patterns for m, m-1, m-2
-        max_pattern = ''
-        for i in range(pattern_length + 2):
-            max_pattern += '1'
-
+        # from the beginning of the sequence to the end of the sequence (m bits for the (m+1)-bit blocks).
         # Keep track of each pattern's frequency (how often it appears)
-        vobs_01 = zeros(int(max_pattern[0:pattern_length:], 2) + 1)
-        vobs_02 = zeros(int(max_pattern[0:pattern_length + 1:], 2) + 1)
+        # The (m+1)-bit counts are requested first so the m-bit counts are folded down from them.
+        counter = context.patterns
+        longer = counter.counts(pattern_length + 1)
+        vobs = [counter.counts(pattern_length), longer]
 
-        for i in range(length_of_binary_data):
-            # Work out what pattern is observed
-            vobs_01[int(binary_data[i:i + pattern_length:], 2)] += 1
-            vobs_02[int(binary_data[i:i + pattern_length + 1:], 2)] += 1
+        return ApproximateEntropy._approximate_entropy_result(vobs, length_of_binary_data, pattern_length, verbose)
 
-        # Calculate the test statistics and p values
-        vobs = [vobs_01, vobs_02]
+    @staticmethod
+    def _approximate_entropy_result(vobs, length_of_binary_data, pattern_length, verbose=False):
+        """
+        Compute the Approximate Entropy Test from the frequencies of the overlapping patterns.
 
+        :param      vobs:               The counts of the m-bit and (m+1)-bit patterns
+        :param      length_of_binary_data: The length of the sequence being tested
+        :param      pattern_length:     the length of the pattern (m)
+        :param      verbose             True to display the debug message, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of the test (True or False)
+        """
+        # Calculate the test statistics and p values
         sums = zeros(2)
         for i in range(2):
-            for j in range(len(vobs[i])):
-                if vobs[i][j] > 0:
-                    sums[i] += vobs[i][j] * log(vobs[i][j] / length_of_binary_data)
+            observed = vobs[i][vobs[i] > 0]
+            sums[i] = float((observed * np_log(observed / length_of_binary_data)).sum())
         sums /= length_of_binary_data
         ape = sums[0] - sums[1]
 
@@ -64,4 +67,4 @@ class ApproximateEntropy:
             print('\tP-Value:\t\t\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value >= 0.01))
\ No newline at end of file
+        return TestResult(p_value, (p_value >= 0.01), xObs)
\ No newline at end of file
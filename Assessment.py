@@ -0,0 +1,275 @@
+import os
+from concurrent.futures import ProcessPoolExecutor as ProcessPoolExecutor
+from math import floor as floor
+from math import sqrt as sqrt
+from multiprocessing import shared_memory as shared_memory
+from numpy import array as array
+from numpy import bincount as bincount
+from numpy import minimum as minimum
+from scipy.special import gammaincc as gammaincc
+
+from BatteryRunner import BatteryRunner
+from BitFile import BitFile
+from BitSequence import BitSequence
+from SequenceContext import SequenceContext
+
+# The data being assessed as seen by a worker process, set by Assessment._attach
+_worker_memory = None
+_worker_source = None
+
+
+class Assessment:
+
+    # The names of the tests in the NIST finalAnalysisReport, in the order of the report
+    NAMES = {
+        'monobit': 'Frequency',
+        'block_frequency': 'BlockFrequency',
+        'cumulative_sums': 'CumulativeSums',
+        'runs': 'Runs',
+        'longest_run': 'LongestRun',
+        'matrix_rank': 'Rank',
+        'spectral': 'FFT',
+        'non_overlapping': 'NonOverlappingTemplate',
+        'overlapping': 'OverlappingTemplate',
+        'universal': 'Universal',
+        'approximate_entropy': 'ApproximateEntropy',
+        'random_excursions': 'RandomExcursions',
+        'random_excursions_variant': 'RandomExcursionsVariant',
+        'serial': 'Serial',
+        'linear_complexity': 'LinearComplexity',
+    }
+
+    def __init__(self, length, count, tests=None, alpha=0.01, processes=None):
+        """
+        The NIST assessment of a generator (SP 800-22 section 4.2): a sample of m sequences of n bits is tested and
+        for every P-value a test produces, the proportion of sequences passing at level alpha and the uniformity of
+        the P-values over the sample are reported, as in the finalAnalysisReport of the reference implementation.
+        The sequences are split into shards run by a pool of worker processes.
+
+        :param      length:             The length n of each sequence
+        :param      count:              The number m of sequences
+        :param      tests:              Names of the tests to run (see BatteryRunner.TESTS), defaults to every test
+        :param      alpha:              The significance level of each test
+        :param      processes:          Number of worker processes, defaults to the number of CPUs
+        """
+        self._length = length
+        self._count = count
+        self._tests = BatteryRunner.schedule(tests)
+        self._alpha = alpha
+        self._processes = (os.cpu_count() or 1) if processes is None else processes
+
+    def run(self, source):
+        """
+        Run the tests on every sequence of the sample.
+
+        :param      source:             Path of a data file (see BitFile), BitFile or BitSequence holding at least
+                                        n * m bits, the i-th sequence being bits i * n to (i + 1) * n
+        :return:    list of (test name, histogram, uniformity P-value, passed, total) for every P-value of the
+                    tests, in the order of the report. The histogram is the number of P-values in each of the ten
+                    intervals [0, 0.1), ..., [0.9, 1] and total the number of sequences the test applied to.
+        """
+        if isinstance(source, BitFile):
+            available = len(source)
+        elif isinstance(source, str):
+            with BitFile(source) as data:
+                available = len(data)
+        else:
+            source = BitSequence.adapt(source)
+            available = len(source)
+        if available < self._length * self._count:
+            raise ValueError('The sample of %d sequences of %d bits needs %d bits, the data holds %d.' %
+                             (self._count, self._length, self._length * self._count, available))
+
+        # Contiguous shards, several per process so that the processes finish together
+        processes = min(self._processes, self._count)
+        step = max(-(-self._count // (4 * processes)), 1)
+        shards = [(start, min(start + step, self._count)) for start in range(0, self._count, step)]
+
+        if processes <= 1:
+            if isinstance(source, str):
+                # The file is opened in this process and closed once the shards are done
+                with BitFile(source) as data:
+                    p_values = self._assess_in_process(data, shards)
+            else:
+                p_values = self._assess_in_process(source, shards)
+        else:
+            memory = None
+            if isinstance(source, BitFile):
+                # Every worker maps the file itself
+                source = source.path
+            if not isinstance(source, str):
+                # Every worker maps one copy of the packed sample
+                packed = source[:self._length * self._count].packed
+                memory = shared_memory.SharedMemory(create=True, size=max(len(packed), 1))
+                memory.buf[:len(packed)] = packed.tobytes()
+                source = None
+
+            try:
+                with ProcessPoolExecutor(max_workers=processes, initializer=Assessment._attach,
+                                         initargs=(source, None if memory is None else memory.name, self._length,
+                                                   self._tests)) as executor:
+                    p_values = list(executor.map(Assessment._assess, [start for start, _ in shards],
+                                                 [stop for _, stop in shards]))
+            finally:
+                if memory is not None:
+                    memory.close()
+                    memory.unlink()
+
+        # One row of the report for every P-value of every test, over the sequences the test applied to
+        rows = []
+        for name in sorted(self._tests, key=list(Assessment.NAMES).index):
+            sequences = [sequence[name] for shard in p_values for sequence in shard]
+            for index in range(max(len(values) for values in sequences)):
+                sample = [values[index] for values in sequences if index < len(values) and values[index] is not None]
+                histogram, uniformity = Assessment.uniformity(sample)
+                passed = sum(1 for p_value in sample if p_value >= self._alpha)
+                rows.append((Assessment.NAMES[name], histogram, uniformity, passed, len(sample)))
+        return rows
+
+    @staticmethod
+    def uniformity(p_values):
+        """
+        The uniformity of the P-values: the chi-square statistic of their histogram over ten intervals against the
+        uniform distribution, and its P-value igamc(9/2, chi^2 / 2). NIST recommends a sample of at least 55
+        sequences for this statistic.
+
+        :param      p_values:           The P-values of the sample
+        :return:    (histogram, p_value) where histogram holds the number of P-values in [0, 0.1), ..., [0.9, 1]
+        """
+        if len(p_values) == 0:
+            return [0] * 10, 0.0
+
+        # A P-value of exactly 1 belongs to the last interval
+        histogram = bincount(minimum((array(p_values) * 10).astype(int), 9), minlength=10)
+        expected = len(p_values) / 10.0
+        chi_squared = sum((histogram - expected) ** 2 / expected)
+        return histogram.tolist(), float(gammaincc(9 / 2.0, chi_squared / 2.0))
+
+    @staticmethod
+    def proportion_range(count, alpha=0.01):
+        """
+        The confidence interval of the proportion of passing sequences, p̂ ± 3 sqrt(p̂(1 - p̂) / m) with p̂ = 1 - alpha.
+
+        :param      count:              The number m of sequences
+        :param      alpha:              The significance level
+        :return:    (low, high)
+        """
+        p_hat = 1.0 - alpha
+        margin = 3.0 * sqrt(p_hat * alpha / count)
+        return p_hat - margin, min(p_hat + margin, 1.0)
+
+    def report(self, rows, generator=''):
+        """
+        Format the results in the layout of the NIST finalAnalysisReport. A P-value of the uniformity below 0.0001
+        or a proportion below the acceptable range is marked with an asterisk.
+
+        :param      rows:               The result of run()
+        :param      generator:          Name of the generator or data file in the header
+        :return:    The report as a string
+        """
+        rule = '-' * 78
+        lines = [rule,
+                 'RESULTS FOR THE UNIFORMITY OF P-VALUES AND THE PROPORTION OF PASSING SEQUENCES',
+                 rule,
+                 '   generator is <%s>' % generator,
+                 rule,
+                 ' C1  C2  C3  C4  C5  C6  C7  C8  C9 C10  P-VALUE  PROPORTION  STATISTICAL TEST',
+                 rule]
+
+        for name, histogram, uniformity, passed, total in rows:
+            if total == 0:
+                # No sequence of the sample could be assessed by the test
+                lines.append('%s  %8s  %13s  %s' % (' '.join(['%3d' % 0] * 10), '----', '----', name))
+                continue
+            low, _ = Assessment.proportion_range(total, self._alpha)
+            lines.append('%s  %8.6f%s %6d/%-6d%s %s' % (' '.join('%3d' % value for value in histogram), uniformity,
+                                                         '*' if uniformity < 0.0001 else ' ', passed, total,
+                                                         '*' if passed < low * total else ' ', name))
+
+        low, _ = Assessment.proportion_range(self._count, self._alpha)
+        lines.extend([rule,
+                      'The minimum pass rate for each statistical test with the exception of the random excursion',
+                      '(variant) test is approximately = %d for a sample size = %d binary sequences.' %
+                      (floor(low * self._count), self._count),
+                      '',
+                      'The minimum pass rate for the random excursion (variant) test is approximately the same',
+                      'proportion of the number of sequences with enough cycles.',
+                      rule])
+        return '\n'.join(lines)
+
+    def _assess_in_process(self, source, shards):
+        """
+        Run the shards in this process.
+
+        :param      source:             BitFile or BitSequence holding the sample
+        :param      shards:             List of (start, stop) ranges of sequences
+        :return:    The results of _assess for every shard
+        """
+        global _worker_source
+        Assessment._attach(source, None, self._length, self._tests)
+        try:
+            return [Assessment._assess(start, stop) for start, stop in shards]
+        finally:
+            # Drop the reference to the source, which the caller may close
+            _worker_source = None
+
+    @staticmethod
+    def _attach(source, memory_name, length, tests):
+        """
+        Initialise the process running the shards: open the data file, or map the shared sample.
+
+        :param      source:             Path of the data file, BitFile or BitSequence, None with a shared sample
+        :param      memory_name:        The name of the shared memory block holding the sample, or None
+        :param      length:             The length n of each sequence
+        :param      tests:              The names of the tests to run
+        """
+        global _worker_memory, _worker_source
+        if memory_name is not None:
+            _worker_memory = shared_memory.SharedMemory(name=memory_name)
+            source = BitSequence(_worker_memory.buf)
+        elif isinstance(source, str):
+            source = BitFile(source)
+        _worker_source = (source, length, tests)
+
+    @staticmethod
+    def _assess(start, stop):
+        """
+        Run the tests on the sequences start to stop - 1 of the sample.
+
+        :param      start:              Index of the first sequence
+        :param      stop:               One past the index of the last sequence
+        :return:    For every sequence, a dict from test name to its list of P-values. A P-value is None when the
+                    test does not apply to the sequence (too short, or too few cycles for the random excursions).
+        """
+        source, length, tests = _worker_source
+        results = []
+        for index in range(start, stop):
+            context = SequenceContext(source[index * length:(index + 1) * length], tests)
+            p_values = {}
+            for name in tests:
+                p_values[name] = Assessment._p_values(name, BatteryRunner.TESTS[name](context), context)
+                context.release(name)
+            results.append(p_values)
+        return results
+
+    @staticmethod
+    def _p_values(name, result, context):
+        """
+        :param      name:               The name of the test
+        :param      result:             The result the test returned
+        :param      context:            The SequenceContext of the sequence
+        :return:    List of the P-values in the result, None for those that do not apply
+        """
+        if name in ('random_excursions', 'random_excursions_variant'):
+            # The reference implementation only assesses the sequences whose walk has enough cycles
+            if context.walk.cycles < max(0.005 * sqrt(len(context)), 500):
+                return [None] * len(result)
+            p_values = [item[3] for item in result]
+        elif isinstance(result[0], tuple):
+            # Serial and Cumulative Sums give two P-values
+            p_values = [item[0] for item in result]
+        else:
+            p_values = [result[0]]
+
+        # A test that cannot run on the sequence signals it with a negative or undefined P-value
+        return [float(p_value) if 0.0 <= p_value <= 1.0 else None for p_value in p_values]
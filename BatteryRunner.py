@@ -0,0 +1,166 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED as FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor as ProcessPoolExecutor
+from concurrent.futures import wait as wait
+from multiprocessing import shared_memory as shared_memory
+
+from ApproximateEntropy import ApproximateEntropy
+from BitSequence import BitSequence
+from Complexity import ComplexityTest
+from CumulativeSum import CumulativeSums
+from FrequencyTest import FrequencyTest
+from Matrix import Matrix
+from RandomExcursions import RandomExcursions
+from RunTest import RunTest
+from SequenceContext import SequenceContext
+from Serial import Serial
+from Spectral import SpectralTest
+from TemplateMatching import TemplateMatching
+from Universal import Universal
+
+# The sequence attached by a worker process, set by BatteryRunner._attach
+_worker_memory = None
+_worker_context = None
+
+
+class BatteryRunner:
+
+    # The NIST tests by the names of the SequenceContext schedule. Each one is called with the sequence only. The
+    # forward and backward Cumulative Sums tests are one task returning both results.
+    TESTS = {
+        'monobit': FrequencyTest.monobit_test,
+        'block_frequency': FrequencyTest.block_frequency,
+        'runs': RunTest.run_test,
+        'longest_run': RunTest.longest_one_block_test,
+        'matrix_rank': Matrix.binary_matrix_rank_text,
+        'spectral': SpectralTest.spectral_test,
+        'non_overlapping': TemplateMatching.non_overlapping_test,
+        'overlapping': TemplateMatching.overlapping_patterns,
+        'universal': Universal.statistical_test,
+        'linear_complexity': ComplexityTest.linear_complexity_test,
+        'serial': Serial.serial_test,
+        'approximate_entropy': ApproximateEntropy.approximate_entropy_test,
+        'cumulative_sums': CumulativeSums.cumulative_sums_tests,
+        'random_excursions': RandomExcursions.random_excursions_test,
+        'random_excursions_variant': RandomExcursions.variant_test,
+    }
+
+    # The tests from the longest expected runtime to the shortest, the order in which they are started
+    ORDER = ['linear_complexity', 'serial', 'spectral', 'approximate_entropy', 'universal', 'overlapping',
+             'non_overlapping', 'random_excursions', 'random_excursions_variant', 'cumulative_sums', 'matrix_rank',
+             'longest_run', 'runs', 'block_frequency', 'monobit']
+
+    def __init__(self, processes=None):
+        """
+        Run a battery of NIST tests on one sequence over a pool of worker processes. The packed sequence is copied
+        once into shared memory, which every worker maps, so the data is never pickled. The tests are started from
+        the longest to the shortest so that the battery takes about as long as its slowest test.
+        With a single process the tests run in this process on one SequenceContext, in the same order.
+
+        :param      processes:          Number of worker processes, defaults to the number of CPUs
+        """
+        self._processes = (os.cpu_count() or 1) if processes is None else processes
+        # The run time of each test of the last battery, in seconds
+        self.timings = {}
+
+    @staticmethod
+    def schedule(tests=None):
+        """
+        :param      tests:              Names of the tests to run (see TESTS), defaults to every test
+        :return:    List of the distinct test names, longest expected runtime first
+        """
+        if tests is None:
+            return list(BatteryRunner.ORDER)
+
+        unknown = set(tests) - set(BatteryRunner.TESTS)
+        if len(unknown) > 0:
+            raise ValueError('Unknown tests: %s' % ', '.join(sorted(unknown)))
+        return [name for name in BatteryRunner.ORDER if name in tests]
+
+    def results(self, binary_data, tests=None, parameters=None):
+        """
+        Run the tests and yield each result as soon as its test finishes.
+
+        :param      binary_data:        BitSequence, SequenceContext or binary string
+        :param      tests:              Names of the tests to run (see TESTS), defaults to every test
+        :param      parameters:         dict from test name to the keyword arguments of the test function
+        :return:    Generator of (test name, result) in order of completion
+        """
+        schedule = BatteryRunner.schedule(tests)
+        parameters = {} if parameters is None else parameters
+        self.timings = {}
+
+        if self._processes <= 1 or len(schedule) <= 1:
+            context = SequenceContext(BitSequence.adapt(binary_data), schedule)
+            for name in schedule:
+                result, self.timings[name] = BatteryRunner._call(name, context, parameters.get(name, {}))
+                context.release(name)
+                yield name, result
+            return
+
+        binary_data = BitSequence.adapt(binary_data)
+        packed = binary_data.packed
+        memory = shared_memory.SharedMemory(create=True, size=max(len(packed), 1))
+        try:
+            memory.buf[:len(packed)] = packed.tobytes()
+            executor = ProcessPoolExecutor(max_workers=min(self._processes, len(schedule)),
+                                           initializer=BatteryRunner._attach,
+                                           initargs=(memory.name, len(binary_data)))
+            try:
+                # Futures are started in submission order, so the longest tests are picked up first
+                pending = dict((executor.submit(BatteryRunner._run, name, parameters.get(name, {})), name)
+                               for name in schedule)
+                while len(pending) > 0:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = pending.pop(future)
+                        result, self.timings[name] = future.result()
+                        yield name, result
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def run(self, binary_data, tests=None, parameters=None):
+        """
+        :param      binary_data:        BitSequence, SequenceContext or binary string
+        :param      tests:              Names of the tests to run (see TESTS), defaults to every test
+        :param      parameters:         dict from test name to the keyword arguments of the test function
+        :return:    dict from test name to the result of the test
+        """
+        return dict(self.results(binary_data, tests, parameters))
+
+    @staticmethod
+    def _attach(name, length):
+        """
+        Initialise a worker process: map the shared sequence and wrap it in the context its tests share.
+
+        :param      name:               The name of the shared memory block
+        :param      length:             The number of bits in the sequence
+        """
+        global _worker_memory, _worker_context
+        _worker_memory = shared_memory.SharedMemory(name=name)
+        _worker_context = SequenceContext(BitSequence(_worker_memory.buf, length))
+
+    @staticmethod
+    def _run(name, parameters):
+        """
+        :param      name:               The name of the test to run in the worker process
+        :param      parameters:         The keyword arguments of the test function
+        :return:    (result, seconds)   The result of the test and its run time
+        """
+        return BatteryRunner._call(name, _worker_context, parameters)
+
+    @staticmethod
+    def _call(name, context, parameters):
+        """
+        :param      name:               The name of the test
+        :param      context:            The SequenceContext of the sequence
+        :param      parameters:         The keyword arguments of the test function
+        :return:    (result, seconds)   The result of the test and its run time
+        """
+        start = time.perf_counter()
+        result = BatteryRunner.TESTS[name](context, **parameters)
+        return result, time.perf_counter() - start
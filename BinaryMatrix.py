@@ -1,4 +1,9 @@
 from copy import copy as copy
+from numpy import arange as arange
+from numpy import asarray as asarray
+from numpy import uint64 as uint64
+from numpy import where as where
+from numpy import zeros as zeros
 
 class BinaryMatrix:
 
@@ -121,4 +126,59 @@ class BinaryMatrix:
             if all_zeros == 1:
                 rank -= 1
             i += 1
-        return rank
\ No newline at end of file
+        return rank
+
+    @staticmethod
+    def batch_rank(rows, cols):
+        """
+        Compute the binary rank of many matrices at once. Each row of a matrix is held as one integer word (first
+        column in the most significant of the cols bits), so eliminating a column is one XOR of whole rows, and
+        each elimination step runs on every matrix of the batch together.
+
+        :param rows: array of shape (number of matrices, rows per matrix) with the row words, up to 64 columns
+        :param cols: the number of columns
+        :return: int array with the rank of each matrix
+        """
+        if not 0 < cols <= 64:
+            raise ValueError('The number of columns must be between 1 and 64.')
+
+        rows = asarray(rows, dtype=uint64).copy()
+        number_of_matrices, rows_per_matrix = rows.shape
+        matrix_index = arange(number_of_matrices)
+        ranks = zeros(number_of_matrices, dtype=int)
+        # Rows that already hold the pivot of an earlier column
+        pivoted = zeros(rows.shape, dtype=bool)
+
+        for column in range(cols - 1, -1, -1):
+            has_bit = ((rows >> uint64(column)) & uint64(1)).astype(bool) & ~pivoted
+
+            # The first row of each matrix with a one in this column becomes its pivot
+            pivot = has_bit.argmax(axis=1)
+            found = has_bit[matrix_index, pivot]
+            pivot_rows = where(found, rows[matrix_index, pivot], uint64(0))
+
+            # Clear the column from every other row that has it
+            has_bit[matrix_index, pivot] = False
+            rows ^= where(has_bit, pivot_rows[:, None], uint64(0))
+
+            pivoted[matrix_index, pivot] |= found
+            ranks += found
+
+        return ranks
+
+    @staticmethod
+    def rank_probability(rank, rows, cols):
+        """
+        The probability that a random rows x cols binary matrix has the given rank over GF(2)
+        :param rank: the rank
+        :param rows: the number of rows
+        :param cols: the number of columns
+        :return: the probability
+        """
+        if rank < 0 or rank > min(rows, cols):
+            return 0.0
+
+        probability = 2.0 ** (rank * (rows + cols - rank) - rows * cols)
+        for i in range(rank):
+            probability *= (1.0 - 2.0 ** (i - rows)) * (1.0 - 2.0 ** (i - cols)) / (1.0 - 2.0 ** (i - rank))
+        return probability
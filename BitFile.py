@@ -0,0 +1,148 @@
+import mmap
+import numpy as np
+
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from Tools import Tools
+from Tools import WHITESPACE
+
+
+class BitFile:
+
+    # Number of bytes inspected to tell an ASCII '0'/'1' file from a raw binary file
+    SAMPLE_BYTES = 1 << 16
+
+    def __init__(self, path, ascii=None):
+        """
+        A data file memory-mapped as a source of bits. The file is either ASCII text of '0' and '1' characters
+        (whitespace and line breaks are skipped, as in data/data.e) or raw bytes, eight bits per byte with the
+        first bit most significant. Windows of the file are read without loading the rest of it, so a file can be
+        tested in place as many consecutive sequences.
+        A raw file is used directly as a BitSequence over the mapped bytes. For an ASCII file an index of the number
+        of digits in every chunk of the file is built with one pass, and a window only converts the chunks it covers.
+
+        :param      path:               The path of the data file
+        :param      ascii:              True for an ASCII '0'/'1' file, False for a raw binary file, None to detect
+                                        the format from the start of the file
+        """
+        self._path = path
+        self._file = open(path, 'rb')
+        if self._file.seek(0, 2) == 0:
+            self._map = b''
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._raw = np.frombuffer(self._map, dtype=np.uint8)
+
+        if ascii is None:
+            ascii = BitFile.is_ascii(self._raw)
+        self._ascii = ascii
+
+        if self._ascii:
+            # Bits before the start of each chunk of the file, and after the last one
+            self._chunk_bytes = 8 * CHUNK_BYTES
+            counts = [0]
+            for start in range(0, len(self._raw), self._chunk_bytes):
+                chunk = self._raw[start:start + self._chunk_bytes]
+                counts.append(int(np.count_nonzero(chunk - np.uint8(ord('0')) <= 1)))
+            self._chunk_index = np.cumsum(counts, dtype=np.int64)
+            self._length = int(self._chunk_index[-1])
+            self._sequence = None
+        else:
+            self._sequence = BitSequence.from_bytes(self._raw)
+            self._length = len(self._sequence)
+
+    @staticmethod
+    def is_ascii(data):
+        """
+        :param      data:               The start of a file or stream, bytes-like
+        :return:    True when its first SAMPLE_BYTES bytes are all '0', '1' or whitespace
+        """
+        sample = np.frombuffer(data, dtype=np.uint8)[:BitFile.SAMPLE_BYTES]
+        return len(sample) > 0 and bool(np.all((sample - np.uint8(ord('0')) <= 1) | WHITESPACE[sample]))
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return 'BitFile(%r, length=%d, ascii=%s)' % (self._path, self._length, self._ascii)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self.window(item, 1)[0]
+
+        start, stop, step = item.indices(self._length)
+        if step != 1:
+            raise ValueError('BitFile slices do not support a step.')
+        return self.window(start, max(stop - start, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def path(self):
+        """
+        The path of the data file
+        """
+        return self._path
+
+    @property
+    def ascii(self):
+        """
+        True when the file holds ASCII '0'/'1' text, False for raw bytes
+        """
+        return self._ascii
+
+    def window(self, offset, length):
+        """
+        :param      offset:             Position of the first bit
+        :param      length:             Number of bits, cut short at the end of the file
+        :return:    BitSequence of the bits of the file from offset. For a raw file it shares the mapped memory
+                    whenever offset is a multiple of 8.
+        """
+        if offset < 0:
+            offset += self._length
+        if offset < 0 or offset > self._length:
+            raise IndexError('BitFile offset out of range')
+        stop = min(offset + length, self._length)
+
+        if not self._ascii:
+            return self._sequence[offset:stop]
+
+        # Convert only the chunks of text holding the requested bits
+        first_chunk = max(int(np.searchsorted(self._chunk_index, offset, side='right')) - 1, 0)
+        last_chunk = int(np.searchsorted(self._chunk_index, stop, side='left'))
+        text = self._raw[first_chunk * self._chunk_bytes:last_chunk * self._chunk_bytes]
+        skip = offset - int(self._chunk_index[first_chunk])
+        return Tools.ascii_to_bits(text)[skip:skip + stop - offset]
+
+    def sequences(self, length, count=None, offset=0):
+        """
+        Split the file into consecutive sequences.
+
+        :param      length:             Number of bits in each sequence
+        :param      count:              Number of sequences, defaults to every complete sequence
+        :param      offset:             Position of the first bit of the first sequence
+        :return:    Generator of BitSequence
+        """
+        available = (self._length - offset) // length
+        if count is None or count > available:
+            count = available
+        for index in range(count):
+            yield self.window(offset + index * length, length)
+
+    def close(self):
+        """
+        Release the memory map and the file. Sequences still referring to a raw file must not be used afterwards.
+        """
+        self._sequence = None
+        self._raw = None
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                # NumPy views of the map are still alive, the map is closed when they are released
+                pass
+        self._file.close()
@@ -0,0 +1,321 @@
+import numpy as np
+
+# Number of set bits for every possible byte value
+POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Number of bytes processed at a time by the chunked routines, bounds the size of the temporary arrays
+CHUNK_BYTES = 1 << 20
+
+
+class BitSequence:
+
+    def __init__(self, packed, length=None):
+        """
+        A sequence of bits packed eight to a byte (most significant bit first) in a NumPy uint8 array.
+        This is the common input type of every NIST test in this package. It costs one bit of memory per bit being
+        tested, where the '0'/'1' string representation costs one byte per bit, and it exposes the derived forms
+        the tests need (unpacked bits, the -1/+1 walk and m-bit words) as NumPy arrays.
+
+        :param      packed:             The packed bytes (anything accepted by numpy.frombuffer or a uint8 array)
+        :param      length:             Number of bits in the sequence, defaults to 8 * len(packed)
+        """
+        if isinstance(packed, np.ndarray):
+            packed = packed.astype(np.uint8, copy=False).ravel()
+        else:
+            packed = np.frombuffer(packed, dtype=np.uint8)
+
+        if length is None:
+            length = 8 * len(packed)
+        elif length < 0 or length > 8 * len(packed):
+            raise ValueError('Length of %d bits does not fit in %d bytes.' % (length, len(packed)))
+
+        self._packed = packed
+        self._length = int(length)
+
+    @staticmethod
+    def from_string(binary_data:str):
+        """
+        Convert a string of '0' and '1' characters into a BitSequence.
+
+        :param      binary_data:        The sequence of bits as a string
+        :return:    BitSequence
+        """
+        try:
+            raw = np.frombuffer(binary_data.encode('ascii'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            raise ValueError('Binary data may only contain the characters \'0\' and \'1\'.')
+
+        bits = raw - ord('0')
+        if bits.size > 0 and bits.max() > 1:
+            raise ValueError('Binary data may only contain the characters \'0\' and \'1\'.')
+
+        return BitSequence.from_bits(bits)
+
+    @staticmethod
+    def from_bits(bits):
+        """
+        Convert an array of 0/1 values (one element per bit) into a BitSequence.
+
+        :param      bits:               Array like of 0 and 1
+        :return:    BitSequence
+        """
+        bits = np.asarray(bits, dtype=np.uint8)
+        return BitSequence(np.packbits(bits), bits.size)
+
+    @staticmethod
+    def from_bytes(data, length=None):
+        """
+        Wrap raw bytes as a BitSequence without copying them.
+
+        :param      data:               bytes, bytearray, memoryview or any other buffer
+        :param      length:             Number of bits to use, defaults to every bit of the buffer
+        :return:    BitSequence
+        """
+        return BitSequence(data, length)
+
+    @staticmethod
+    def adapt(binary_data):
+        """
+        Return the input as a BitSequence. The test functions call this on their input so that they accept both a
+        BitSequence and the original string of '0' and '1' characters.
+
+        :param      binary_data:        BitSequence, SequenceContext, str of '0'/'1' or an array of 0/1 values
+        :return:    BitSequence
+        """
+        if isinstance(binary_data, BitSequence):
+            return binary_data
+        elif isinstance(binary_data, str):
+            return BitSequence.from_string(binary_data)
+        elif isinstance(binary_data, (np.ndarray, list, tuple)):
+            return BitSequence.from_bits(binary_data)
+        elif isinstance(getattr(binary_data, 'bits', None), BitSequence):
+            # An analysis context (SequenceContext) is replaced by its sequence
+            return binary_data.bits
+        else:
+            raise TypeError('Unsupported binary data type: %s' % type(binary_data).__name__)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._length)
+            if step != 1:
+                raise ValueError('BitSequence slices do not support a step.')
+            stop = max(start, stop)
+
+            if start % 8 == 0:
+                # Byte aligned, share the underlying buffer
+                return BitSequence(self._packed[start // 8:(stop + 7) // 8], stop - start)
+
+            return BitSequence.from_bits(self.unpacked(start, stop))
+
+        index = item + self._length if item < 0 else item
+        if not 0 <= index < self._length:
+            raise IndexError('BitSequence index out of range')
+        return int((self._packed[index // 8] >> (7 - index % 8)) & 1)
+
+    def __repr__(self):
+        return 'BitSequence(length=%d)' % self._length
+
+    @property
+    def packed(self):
+        """
+        The packed bytes of the sequence. Bits of the last byte past the end of the sequence are undefined.
+        """
+        return self._packed[:(self._length + 7) // 8]
+
+    def unpacked(self, start=0, stop=None):
+        """
+        :param      start:              First bit to unpack
+        :param      stop:               One past the last bit to unpack, defaults to the end of the sequence
+        :return:    uint8 array with one 0/1 element per bit
+        """
+        if stop is None or stop > self._length:
+            stop = self._length
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+
+        first_byte = start // 8
+        last_byte = (stop + 7) // 8
+        bits = np.unpackbits(self._packed[first_byte:last_byte])
+        offset = start - 8 * first_byte
+        return bits[offset:offset + stop - start]
+
+    def plus_minus_one(self, dtype=np.int8):
+        """
+        :param      dtype:              The NumPy type of the result
+        :return:    The sequence X = x1, x2, ..., xn where xi = 2εi - 1
+        """
+        values = self.unpacked().astype(dtype)
+        values *= 2
+        values -= 1
+        return values
+
+    def count_ones(self):
+        """
+        :return:    The number of ones in the sequence, counted with a per-byte popcount table
+        """
+        full_bytes = self._length // 8
+        ones = 0
+        for start in range(0, full_bytes, CHUNK_BYTES):
+            chunk = self._packed[start:min(start + CHUNK_BYTES, full_bytes)]
+            ones += int(POPCOUNT_TABLE[chunk].sum(dtype=np.int64))
+
+        remainder = self._length % 8
+        if remainder:
+            mask = (0xFF << (8 - remainder)) & 0xFF
+            ones += int(POPCOUNT_TABLE[self._packed[full_bytes] & mask])
+
+        return ones
+
+    def block_ones(self, block_size, count=None):
+        """
+        Count the ones in consecutive non-overlapping blocks with a reshape-and-sum. Blocks that are a whole number
+        of bytes are counted with the popcount table directly on the packed bytes.
+
+        :param      block_size:         The number of bits in each block
+        :param      count:              Number of blocks, defaults to every complete block
+        :return:    int64 array with the number of ones in each block
+        """
+        available = self._length // block_size
+        if count is None or count > available:
+            count = available
+
+        ones = np.zeros(count, dtype=np.int64)
+        if block_size % 8 == 0:
+            block_bytes = block_size // 8
+            rows = max(CHUNK_BYTES // block_bytes, 1)
+            for row in range(0, count, rows):
+                last = min(row + rows, count)
+                chunk = self._packed[row * block_bytes:last * block_bytes].reshape(last - row, block_bytes)
+                ones[row:last] = POPCOUNT_TABLE[chunk].sum(axis=1, dtype=np.int64)
+        else:
+            rows = max(8 * CHUNK_BYTES // block_size, 1)
+            for row in range(0, count, rows):
+                last = min(row + rows, count)
+                chunk = self.unpacked(row * block_size, last * block_size).reshape(last - row, block_size)
+                ones[row:last] = chunk.sum(axis=1, dtype=np.int64)
+
+        return ones
+
+    def prefix_ones(self, positions):
+        """
+        Count the ones in the first p bits of the sequence for every p in positions, in a single pass over the data.
+        The number of ones in any range of bits is the difference of two prefix counts, which lets blocks of several
+        different sizes be counted together.
+
+        :param      positions:          Sorted array of bit positions between 0 and len(self)
+        :return:    int64 array with the number of ones before each position
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        prefix = np.zeros(len(positions), dtype=np.int64)
+        byte_index = positions // 8
+        # Mask that keeps the leading (position % 8) bits of the byte holding the position
+        partial_mask = (0xFF00 >> (positions % 8)).astype(np.uint8)
+
+        total_bytes = (self._length + 7) // 8
+        running = 0
+        first = 0
+        for start in range(0, total_bytes, CHUNK_BYTES):
+            end = min(start + CHUNK_BYTES, total_bytes)
+            chunk = self._packed[start:end]
+            last = int(np.searchsorted(byte_index, end, side='left'))
+            if last > first:
+                # Ones in the whole bytes before each position plus the leading bits of its own byte
+                before = np.concatenate(([0], np.cumsum(POPCOUNT_TABLE[chunk], dtype=np.int64)))
+                local = byte_index[first:last] - start
+                prefix[first:last] = running + before[local] + \
+                    POPCOUNT_TABLE[chunk[local] & partial_mask[first:last]]
+                running += int(before[-1])
+            else:
+                running += int(POPCOUNT_TABLE[chunk].sum(dtype=np.int64))
+            first = last
+
+        # Positions at the very end of a whole number of bytes
+        prefix[first:] = running
+        return prefix
+
+    def words(self, word_size, count=None, start=0):
+        """
+        Split the sequence into consecutive non-overlapping words of word_size bits, first bit most significant.
+
+        :param      word_size:          The number of bits in each word (1 to 64)
+        :param      count:              Number of words to extract, defaults to every complete word
+        :param      start:              Index of the first word to extract
+        :return:    uint64 array of words
+        """
+        if not 0 < word_size <= 64:
+            raise ValueError('Word size must be between 1 and 64 bits.')
+
+        available = max(self._length // word_size - start, 0)
+        if count is None or count > available:
+            count = available
+
+        bits = self.unpacked(start * word_size, (start + count) * word_size).reshape(count, word_size)
+        return BitSequence._bits_to_codes(bits)
+
+    def windows(self, window_size, wrap=False, start=0, stop=None):
+        """
+        The overlapping m-bit word starting at each position of the sequence, first bit most significant.
+
+        :param      window_size:        The number of bits in each window (1 to 64)
+        :param      wrap:               True to append the first m-1 bits to the end of the sequence so that there
+                                        is one window per bit, False to return the n-m+1 windows inside the sequence
+        :param      start:              Position of the first window to return
+        :param      stop:               One past the position of the last window to return, defaults to every window
+        :return:    uint64 array of window codes
+        """
+        if not 0 < window_size <= 64:
+            raise ValueError('Window size must be between 1 and 64 bits.')
+
+        last = self._length if wrap else max(self._length - window_size + 1, 0)
+        if stop is None or stop > last:
+            stop = last
+        count = max(stop - start, 0)
+
+        bits = self.unpacked(start, stop + window_size - 1)
+        if wrap and count > 0 and stop + window_size - 1 > self._length:
+            bits = np.concatenate((bits, self.unpacked(0, stop + window_size - 1 - self._length)))
+
+        return BitSequence.window_codes(bits, window_size, count)
+
+    def to_string(self):
+        """
+        :return:    The sequence as a string of '0' and '1' characters
+        """
+        return (self.unpacked() + ord('0')).tobytes().decode('ascii')
+
+    @staticmethod
+    def window_codes(bits, window_size, count=None):
+        """
+        :param      bits:               Array of 0/1 values, one element per bit
+        :param      window_size:        The number of bits in each window (1 to 64)
+        :param      count:              Number of windows, defaults to every window inside the array
+        :return:    uint64 array with the value of the window starting at each position, first bit most significant
+        """
+        if count is None:
+            count = max(len(bits) - window_size + 1, 0)
+
+        codes = np.zeros(count, dtype=np.uint64)
+        for offset in range(window_size):
+            codes <<= np.uint64(1)
+            codes |= bits[offset:offset + count]
+        return codes
+
+    @staticmethod
+    def _bits_to_codes(bits):
+        """
+        :param      bits:               2-D array of 0/1 values, one word per row
+        :return:    uint64 array with the value of each row, first column most significant
+        """
+        word_size = bits.shape[1]
+        row_bytes = np.packbits(bits, axis=1).astype(np.uint64)
+
+        codes = np.zeros(bits.shape[0], dtype=np.uint64)
+        for column in range(row_bytes.shape[1]):
+            codes <<= np.uint64(8)
+            codes |= row_bytes[:, column]
+
+        codes >>= np.uint64(8 * row_bytes.shape[1] - word_size)
+        return codes
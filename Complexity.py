@@ -1,13 +1,18 @@
-from copy import copy as copy
-from numpy import dot as dot
+from concurrent.futures import ProcessPoolExecutor as ProcessPoolExecutor
 from numpy import histogram as histogram
-from numpy import zeros as zeros
+from numpy import packbits as packbits
 from scipy.special import gammaincc as gammaincc
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from TestResult import TestResult
 
 class ComplexityTest:
 
+    # Number of set bits of an integer, int.bit_count is only available from Python 3.10
+    _popcount = staticmethod(int.bit_count if hasattr(int, 'bit_count') else lambda value: bin(value).count('1'))
+
     @staticmethod
-    def linear_complexity_test(binary_data:str, verbose=False, block_size=500):
+    def linear_complexity_test(binary_data:str, verbose=False, block_size=500, processes=None):
         """
         Note that this description is taken from the NIST documentation [1]
         [1] http://csrc.nist.gov/publications/nistpubs/800-22-rev1a/SP800-22rev1a.pdf
@@ -15,13 +20,14 @@ class ComplexityTest:
         determine whether or not the sequence is complex enough to be considered random. Random sequences are
         characterized by longer LFSRs. An LFSR that is too short implies non-randomness.
 
-        :param      binary_data:    a binary string
+        :param      binary_data:    a binary string or BitSequence
         :param      verbose         True to display the debug messgae, False to turn off debug message
         :param      block_size:     Size of the block
+        :param      processes:      Number of worker processes the blocks are spread over, None to run in-process
         :return:    (p_value, bool) A tuple which contain the p_value and result of frequency_test(True or False)
 
         """
-
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary_data = len(binary_data)
 
         # The number of degrees of freedom;
@@ -32,23 +38,25 @@ class ComplexityTest:
         #  are the probabilities computed by the equations in Section 3.10
         pi = [0.01047, 0.03125, 0.125, 0.5, 0.25, 0.0625, 0.020833]
 
-        t2 = (block_size / 3.0 + 2.0 / 9) / 2 ** block_size
+        t2 = (block_size / 3.0 + 2.0 / 9) * 2.0 ** -block_size
         mean = 0.5 * block_size + (1.0 / 36) * (9 + (-1) ** (block_size + 1)) - t2
 
         number_of_block = int(length_of_binary_data / block_size)
 
         if number_of_block > 1:
-            block_end = block_size
-            block_start = 0
-            blocks = []
-            for i in range(number_of_block):
-                blocks.append(binary_data[block_start:block_end])
-                block_start += block_size
-                block_end += block_size
-
-            complexities = []
-            for block in blocks:
-                complexities.append(ComplexityTest.berlekamp_massey_algorithm(block))
+            # Each block as an integer, first bit most significant
+            blocks = ComplexityTest._block_integers(binary_data, block_size, number_of_block)
+
+            if processes is not None and processes > 1:
+                # Spread contiguous runs of blocks over the worker processes
+                step = -(-number_of_block // (4 * processes))
+                runs = [blocks[start:start + step] for start in range(0, number_of_block, step)]
+                complexities = []
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    for run in executor.map(ComplexityTest._linear_complexities, runs, [block_size] * len(runs)):
+                        complexities.extend(run)
+            else:
+                complexities = ComplexityTest._linear_complexities(blocks, block_size)
 
             t = ([-1.0 * (((-1) ** block_size) * (chunk - mean) + 2.0 / 9) for chunk in complexities])
             vg = histogram(t, bins=[-9999999999, -2.5, -1.5, -0.5, 0.5, 1.5, 2.5, 9999999999])[0][::-1]
@@ -73,7 +81,7 @@ class ComplexityTest:
                 print('DEBUG END.')
 
 
-            return (p_value, (p_value >= 0.01))
+            return TestResult(p_value, (p_value >= 0.01), xObs)
         else:
             return (-1.0, False)
 
@@ -86,30 +94,68 @@ class ComplexityTest:
         for a given binary output sequence. The algorithm will also find the minimal polynomial of a linearly recurrent
         sequence in an arbitrary field. The field requirement means that the Berlekamp–Massey algorithm requires all
         non-zero elements to have a multiplicative inverse.
-        :param block_data:
-        :return:
+        :param block_data:  the bits of the block, as a binary string or a sequence of 0/1 integers
+        :return:            the linear complexity of the block
         """
         n = len(block_data)
-        c = zeros(n)
-        b = zeros(n)
-        c[0], b[0] = 1, 1
-        l, m, i = 0, -1, 0
-        int_data = [int(el) for el in block_data]
-        while i < n:
-            v = int_data[(i - l):i]
-            v = v[::-1]
-            cc = c[1:l + 1]
-            d = (int_data[i] + dot(v, cc)) % 2
+        if isinstance(block_data, str):
+            return ComplexityTest._berlekamp_massey(int(block_data, 2) if n > 0 else 0, n)
+
+        word = 0
+        for bit in block_data:
+            word = (word << 1) | int(bit)
+        return ComplexityTest._berlekamp_massey(word, n)
+
+    @staticmethod
+    def _berlekamp_massey(word, n):
+        """
+        Berlekamp Massey over GF(2) with the connection polynomial C(x) held as an integer (bit k is the coefficient of
+        x^k). At step i the bits s_i, s_i-1, ..., s_0 of the block are the integer word >> (n - 1 - i), with s_i in bit 0,
+        so the discrepancy s_i + c_1 s_i-1 + ... + c_L s_i-L is the parity of the popcount of C AND that integer.
+
+        :param word:        the bits of the block as an integer, first bit most significant
+        :param n:           the number of bits in the block
+        :return:            the linear complexity of the block
+        """
+        popcount = ComplexityTest._popcount
+        c, b = 1, 1
+        l, m = 0, -1
+        for i in range(n):
+            d = popcount(c & (word >> (n - 1 - i))) & 1
             if d == 1:
-                temp = copy(c)
-                p = zeros(n)
-                for j in range(0, l):
-                    if b[j] == 1:
-                        p[j + i - m] = 1
-                c = (c + p) % 2
+                temp = c
+                c ^= b << (i - m)
                 if l <= 0.5 * i:
                     l = i + 1 - l
                     m = i
                     b = temp
-            i += 1
-        return l
\ No newline at end of file
+        return l
+
+    @staticmethod
+    def _linear_complexities(blocks, block_size):
+        """
+        :param blocks:      the blocks as integers, first bit most significant
+        :param block_size:  the number of bits in each block
+        :return:            list with the linear complexity of each block
+        """
+        return [ComplexityTest._berlekamp_massey(block, block_size) for block in blocks]
+
+    @staticmethod
+    def _block_integers(binary_data, block_size, number_of_block):
+        """
+        Convert consecutive blocks of the sequence to Python integers, a chunk of blocks at a time.
+
+        :param binary_data:     the BitSequence being tested
+        :param block_size:      the number of bits in each block
+        :param number_of_block: the number of blocks to convert
+        :return:                list of integers, first bit of each block most significant
+        """
+        padding = -block_size % 8
+        blocks_per_chunk = max((8 * CHUNK_BYTES) // block_size, 1)
+        blocks = []
+        for first in range(0, number_of_block, blocks_per_chunk):
+            count = min(blocks_per_chunk, number_of_block - first)
+            bits = binary_data.unpacked(first * block_size, (first + count) * block_size).reshape(count, block_size)
+            for row in packbits(bits, axis=1):
+                blocks.append(int.from_bytes(row.tobytes(), 'big') >> padding)
+        return blocks
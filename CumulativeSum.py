@@ -1,11 +1,11 @@
-from numpy import abs as abs
-from numpy import array as array
+from numpy import arange as arange
+from numpy import concatenate as concatenate
 from numpy import floor as floor
-from numpy import max as max
 from numpy import sqrt as sqrt
 from numpy import sum as sum
-from numpy import zeros as zeros
 from scipy.stats import norm as norm
+from SequenceContext import SequenceContext
+from TestResult import TestResult
 
 class CumulativeSums:
 
@@ -21,61 +21,83 @@ class CumulativeSums:
         For a random sequence, the excursions of the random walk should be near zero. For certain types of non-random
         sequences, the excursions of this random walk from zero will be large.
 
-        :param      binary_data:    a binary string
+        :param      binary_data:    a binary string or BitSequence
         :param      mode            A switch for applying the test either forward through the input sequence (mode = 0)
                                     or backward through the sequence (mode = 1).
         :param      verbose         True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool) A tuple which contain the p_value and result of frequency_test(True or False)
 
         """
+        return CumulativeSums.cumulative_sums_tests(binary_data, verbose, modes=(mode,))[0]
 
-        length_of_binary_data = len(binary_data)
-        counts = zeros(length_of_binary_data)
+    @staticmethod
+    def cumulative_sums_tests(binary_data:str, verbose=False, modes=(0, 1)):
+        """
+        Run the Cumulative Sums test forward and backward from a single pass over the random walk (see RandomWalk).
+        With S0 = 0 and Sk the partial sums of the adjusted (-1, +1) digits, the backward partial sums are Sn - Sj, so
+        both test statistics follow from the minimum and maximum of the forward walk:
+            forward z  = max(max Sk, -min Sk)
+            backward z = max(Sn - min Sk, max Sk - Sn)
 
-        # Determine whether forward or backward data
-        if not mode == 0:
-            binary_data = binary_data[::-1]
+        :param      binary_data:    a binary string or BitSequence
+        :param      verbose         True to display the debug messgae, False to turn off debug message
+        :param      modes           The directions to return, 0 for forward and 1 for backward
+        :return:    ((p_value, bool), ...) One result for each mode
 
-        counter = 0
-        for char in binary_data:
-            sub = 1
-            if char == '0':
-                sub = -1
-            if counter > 0:
-                counts[counter] = counts[counter -1] + sub
-            else:
-                counts[counter] = sub
+        """
+        context = SequenceContext.adapt(binary_data)
+        length_of_binary_data = len(context)
+
+        # The extremes of the partial sums S(k) of the adjusted (-1, +1) digits, from the walk shared with the
+        # Random Excursions tests
+        walk = context.walk
+        total = walk.total
+        lowest = walk.lowest
+        highest = walk.highest
 
-            counter += 1
         # Compute the test statistic z =max1≤k≤n|Sk|, where max1≤k≤n|Sk| is the largest of the
         # absolute values of the partial sums Sk.
-        abs_max = max(abs(counts))
+        abs_max = {0: float(max(highest, -lowest)), 1: float(max(total - lowest, highest - total))}
+
+        results = []
+        for mode in modes:
+            p_value = CumulativeSums._p_value(length_of_binary_data, abs_max[mode])
+
+            if verbose:
+                print('Cumulative Sums Test DEBUG BEGIN:')
+                print("\tLength of input:\t", length_of_binary_data)
+                print('\tMode:\t\t\t\t', mode)
+                print('\tValue of z:\t\t\t', abs_max[mode])
+                print('\tP-Value:\t\t\t', p_value)
+                print('DEBUG END.')
 
+            results.append(TestResult(p_value, (p_value >= 0.01), abs_max[mode]))
+
+        return tuple(results)
+
+    @staticmethod
+    def _p_value(length_of_binary_data, abs_max):
+        """
+        :param      length_of_binary_data:  the length n of the sequence
+        :param      abs_max:                the test statistic z
+        :return:    the p value of the test, with both series of normal distribution terms evaluated in one call
+        """
         start = int(floor(0.25 * floor(-length_of_binary_data / abs_max + 1)))
         end = int(floor(0.25 * floor(length_of_binary_data / abs_max - 1)))
-
-        terms_one = []
-        for k in range(start, end + 1):
-            sub = norm.cdf((4 * k - 1) * abs_max / sqrt(length_of_binary_data))
-            terms_one.append(norm.cdf((4 * k + 1) * abs_max / sqrt(length_of_binary_data)) - sub)
+        k_one = arange(start, end + 1)
 
         start = int(floor(0.25 * floor(-length_of_binary_data / abs_max - 3)))
         end = int(floor(0.25 * floor(length_of_binary_data / abs_max) - 1))
+        k_two = arange(start, end + 1)
 
-        terms_two = []
-        for k in range(start, end + 1):
-            sub = norm.cdf((4 * k + 1) * abs_max / sqrt(length_of_binary_data))
-            terms_two.append(norm.cdf((4 * k + 3) * abs_max / sqrt(length_of_binary_data)) - sub)
-
-        p_value = 1.0 - sum(array(terms_one))
-        p_value += sum(array(terms_two))
+        multipliers = concatenate((4 * k_one + 1, 4 * k_one - 1, 4 * k_two + 3, 4 * k_two + 1))
+        cdf = norm.cdf(multipliers * abs_max / sqrt(length_of_binary_data))
+        size_one = len(k_one)
+        size_two = len(k_two)
 
-        if verbose:
-            print('Cumulative Sums Test DEBUG BEGIN:')
-            print("\tLength of input:\t", length_of_binary_data)
-            print('\tMode:\t\t\t\t', mode)
-            print('\tValue of z:\t\t\t', abs_max)
-            print('\tP-Value:\t\t\t', p_value)
-            print('DEBUG END.')
+        terms_one = cdf[:size_one] - cdf[size_one:2 * size_one]
+        terms_two = cdf[2 * size_one:2 * size_one + size_two] - cdf[2 * size_one + size_two:]
 
-        return (p_value, (p_value >= 0.01))
\ No newline at end of file
+        p_value = 1.0 - sum(terms_one)
+        p_value += sum(terms_two)
+        return p_value
@@ -1,8 +1,18 @@
 from math import fabs as fabs
 from math import floor as floor
 from math import sqrt as sqrt
+from numpy import arange as arange
+from numpy import concatenate as concatenate
+from numpy import diff as diff
+from numpy import int64 as int64
+from numpy import searchsorted as searchsorted
+from numpy import sort as sort
+from numpy import zeros as zeros
 from scipy.special import erfc as erfc
 from scipy.special import gammaincc as gammaincc
+from BitSequence import BitSequence
+from SequenceContext import SequenceContext
+from TestResult import TestResult
 
 class FrequencyTest:
 
@@ -18,24 +28,29 @@ class FrequencyTest:
         if p_value < 0.01, then conclude that the sequence is non-random (return False).
         Otherwise, conclude that the the sequence is random (return True).
 
-        :param      binary_data         The seuqnce of bit being tested
+        :param      binary_data         The seuqnce of bit being tested (BitSequence or binary string)
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
 
         """
+        context = SequenceContext.adapt(binary_data)
+        length_of_bit_string = len(context)
 
-        length_of_bit_string = len(binary_data)
+        one_count = context.count_ones()
+        return FrequencyTest._monobit_result(one_count, length_of_bit_string, verbose)
+
+    @staticmethod
+    def _monobit_result(one_count, length_of_bit_string, verbose=False):
+        """
+        Compute the Frequency (Monobit) Test from the number of ones in the sequence.
 
-        # Variable for S(n)
-        count = 0
-        # Iterate each bit in the string and compute for S(n)
-        for bit in binary_data:
-            if bit == '0':
-                # If bit is 0, then -1 from the S(n)
-                count -= 1
-            elif bit == '1':
-                # If bit is 1, then +1 to the S(n)
-                count += 1
+        :param      one_count:          The number of ones
+        :param      length_of_bit_string: The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        # Compute S(n): every 1 adds +1 and every 0 adds -1
+        count = 2 * one_count - length_of_bit_string
 
         # Compute the test statistic
         sObs = count / sqrt(length_of_bit_string)
@@ -46,8 +61,8 @@ class FrequencyTest:
         if verbose:
             print('Frequency Test (Monobit Test) DEBUG BEGIN:')
             print("\tLength of input:\t", length_of_bit_string)
-            print('\t# of \'0\':\t\t\t', binary_data.count('0'))
-            print('\t# of \'1\':\t\t\t', binary_data.count('1'))
+            print('\t# of \'0\':\t\t\t', length_of_bit_string - one_count)
+            print('\t# of \'1\':\t\t\t', one_count)
             print('\tS(n):\t\t\t\t', count)
             print('\tsObs:\t\t\t\t', sObs)
             print('\tf:\t\t\t\t\t',fabs(sObs) / sqrt(2))
@@ -55,7 +70,7 @@ class FrequencyTest:
             print('DEBUG END.')
 
         # return a p_value and randomness result
-        return (p_value, (p_value >= 0.01))
+        return TestResult(p_value, (p_value >= 0.01), sObs)
 
     @staticmethod
     def block_frequency(binary_data:str, block_size=128, verbose=False):
@@ -65,15 +80,14 @@ class FrequencyTest:
         as would be expected under an assumption of randomness.
         For block size M=1, this test degenerates to test 1, the Frequency (Monobit) test.
 
-        :param      binary_data:        The length of each block
-        :param      block_size:         The seuqnce of bit being tested
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
+        :param      block_size:         The length of each block
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
-
+        binary_data = BitSequence.adapt(binary_data)
         length_of_bit_string = len(binary_data)
 
-
         if length_of_bit_string < block_size:
             block_size = length_of_bit_string
 
@@ -84,31 +98,76 @@ class FrequencyTest:
             # For block size M=1, this test degenerates to test 1, the Frequency (Monobit) test.
             return FrequencyTest.monobit_test(binary_data[0:block_size])
 
-        # Initialized variables
-        block_start = 0
-        block_end = block_size
-        proportion_sum = 0.0
+        # Determine the number of ones in every M-bit block at once
+        block_ones = binary_data.block_ones(block_size, number_of_blocks)
+
+        return FrequencyTest._block_frequency_result(FrequencyTest._proportion_sum(block_ones, block_size),
+                                                     number_of_blocks, block_size, length_of_bit_string, verbose)
+
+    @staticmethod
+    def block_frequencies(binary_data:str, block_sizes=(128, 1000, 10000), verbose=False):
+        """
+        Run the Frequency Test within a Block for several block sizes with a single pass over the data.
+        The number of ones in each block is taken from the count of ones before every block boundary of every
+        block size, which are all collected together.
 
-        # Create a for loop to process each block
-        for counter in range(number_of_blocks):
-            # Partition the input sequence and get the data for block
-            block_data = binary_data[block_start:block_end]
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
+        :param      block_sizes:        The length of the blocks for each test
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    [(p_value, bool)]   The result of block_frequency for each block size, in the same order
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        length_of_bit_string = len(binary_data)
 
-            # Determine the proportion 蟺i of ones in each M-bit
-            one_count = 0
-            for bit in block_data:
-                if bit == '1':
-                    one_count += 1
-            # compute π
-            pi = one_count / block_size
+        layouts = []
+        boundaries = []
+        for block_size in block_sizes:
+            block_size = min(block_size, length_of_bit_string)
+            number_of_blocks = floor(length_of_bit_string / block_size)
+            layouts.append((block_size, number_of_blocks))
+            if number_of_blocks > 1:
+                boundaries.append(arange(number_of_blocks + 1, dtype=int64) * block_size)
+
+        positions = sort(concatenate(boundaries)) if len(boundaries) > 0 else zeros(0, dtype=int64)
+        prefix = binary_data.prefix_ones(positions)
+
+        results = []
+        for block_size, number_of_blocks in layouts:
+            if number_of_blocks == 1:
+                # For block size M=1, this test degenerates to test 1, the Frequency (Monobit) test.
+                results.append(FrequencyTest.monobit_test(binary_data[0:block_size], verbose))
+                continue
+
+            block_prefix = prefix[searchsorted(positions, arange(number_of_blocks + 1, dtype=int64) * block_size)]
+            block_ones = diff(block_prefix)
+            results.append(FrequencyTest._block_frequency_result(FrequencyTest._proportion_sum(block_ones, block_size),
+                                                                 number_of_blocks, block_size, length_of_bit_string,
+                                                                 verbose))
+
+        return results
 
-            # Compute Σ(πi -½)^2.
-            proportion_sum += pow(pi - 0.5, 2.0)
+    @staticmethod
+    def _proportion_sum(block_ones, block_size):
+        """
+        :param      block_ones:         The number of ones in each M-bit block
+        :param      block_size:         The length of each block
+        :return:    Σ(πi -½)^2 where πi is the proportion of ones in block i
+        """
+        pi = block_ones / block_size
+        return float(((pi - 0.5) ** 2).sum())
 
-            # Next Block
-            block_start += block_size
-            block_end += block_size
+    @staticmethod
+    def _block_frequency_result(proportion_sum, number_of_blocks, block_size, length_of_bit_string, verbose=False):
+        """
+        Compute the Frequency Test within a Block from the proportions of ones in the blocks.
 
+        :param      proportion_sum:     Σ(πi -½)^2 over the blocks (see _proportion_sum)
+        :param      number_of_blocks:   The number of blocks N
+        :param      block_size:         The length of each block
+        :param      length_of_bit_string: The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
         # Compute 4M Σ(πi -½)^2.
         result = 4.0 * block_size * proportion_sum
 
@@ -126,4 +185,4 @@ class FrequencyTest:
             print('\tP-Value:\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value >= 0.01))
\ No newline at end of file
+        return TestResult(p_value, (p_value >= 0.01), result)
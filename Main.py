@@ -12,6 +12,8 @@ from GUI import LabelTag
 from GUI import RandomExcursionTestItem
 from GUI import TestItem
 from Tools import Tools
+from BitFile import BitFile
+from BatteryRunner import BatteryRunner
 
 from ApproximateEntropy import ApproximateEntropy as aet
 from Complexity import ComplexityTest as ct
@@ -54,6 +56,12 @@ class Main(Frame):
                             '16. Random Excursions Variant Test']
 
 
+        # Name of each test in the SequenceContext schedule
+        self._test_name = ['monobit', 'block_frequency', 'runs', 'longest_run', 'matrix_rank', 'spectral',
+                           'non_overlapping', 'overlapping', 'universal', 'linear_complexity', 'serial',
+                           'approximate_entropy', 'cumulative_sums', 'cumulative_sums', 'random_excursions',
+                           'random_excursions_variant']
+
         self.__test_function = {
             0:ft.monobit_test,
             1:ft.block_frequency,
@@ -273,13 +281,8 @@ class Main(Frame):
         if not len(self.__binary_input.get_data()) == 0:
             input.append(self.__binary_input.get_data())
         elif not len(self.__binary_data_file_input.get_data()) == 0:
-            temp = []
-            if self.__file_name:
-                handle = open(self.__file_name)
-            for data in handle:
-                temp.append(data.strip().rstrip())
-            test_data = ''.join(temp)
-            input.append(test_data[:1000000])
+            # The file is memory-mapped, ASCII '0'/'1' text or raw bytes, and only the bits tested are read
+            input.append(BitFile(self.__file_name).window(0, 1000000))
         elif not len(self.__string_data_file_input.get_data()) == 0:
             data = []
             count = 1
@@ -300,16 +303,17 @@ class Main(Frame):
 
         try:
             for test_data in input:
-                count = 0
                 results = [(), (), (), (), (), (), (), (), (), (), (), (), (), (), (), ()]
-                for item in self._test:
-                    if item.get_check_box_value() == 1:
-                        print(self._test_type[count], 'selected.')
-                        if count == 13:
-                            results[count] = self.__test_function[count](test_data, mode=1)
-                        else:
-                            results[count] = self.__test_function[count](test_data)
-                    count += 1
+                # The selected tests run over a pool of worker processes sharing one copy of the sequence
+                selected = [index for index in range(len(self._test)) if self._test[index].get_check_box_value() == 1]
+                for index in selected:
+                    print(self._test_type[index], 'selected.')
+                tests = set(self._test_name[index] for index in selected)
+                for name, result in BatteryRunner().results(test_data, tests):
+                    for index in selected:
+                        if self._test_name[index] == name:
+                            # The forward and backward Cumulative Sums tests are computed together
+                            results[index] = result[index - 12] if name == 'cumulative_sums' else result
                 self._test_result.insert(0, results)
 
             self.write_results(self._test_result[0])
@@ -1,7 +1,9 @@
 from BinaryMatrix import BinaryMatrix as bm
 from math import exp as exp
 from math import floor as floor
-from numpy import zeros as zeros
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from TestResult import TestResult
 
 class Matrix:
 
@@ -14,68 +16,72 @@ class Matrix:
         to check for linear dependence among fixed length sub strings of the original sequence. Note that this test
         also appears in the DIEHARD battery of tests.
 
-        :param      binary_data         The seuqnce of bit being tested
+        :param      binary_data         The seuqnce of bit being tested (BitSequence or binary string)
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :param      rows_in_matrix      Fixed for 32
         :param      columns_in_matrix   Fixed for 32
         :return     (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
 
-        shape = (rows_in_matrix, columns_in_matrix)
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary_data = len(binary_data)
         block_size = int(rows_in_matrix * columns_in_matrix)
         number_of_block = floor(length_of_binary_data / block_size)
-        block_start = 0
-        block_end = block_size
 
         if number_of_block > 0:
             max_ranks = [0, 0, 0]
 
-            for im in range(number_of_block):
-                block_data = binary_data[block_start:block_end]
-                block = zeros(len(block_data))
+            # Rank the matrices a batch at a time, each matrix row held as one integer word
+            matrices_per_batch = max((8 * CHUNK_BYTES) // block_size, 1)
+            for batch_start in range(0, number_of_block, matrices_per_batch):
+                batch_size = min(matrices_per_batch, number_of_block - batch_start)
+                batch_data = binary_data[batch_start * block_size:(batch_start + batch_size) * block_size]
+                rows = batch_data.words(columns_in_matrix).reshape(batch_size, rows_in_matrix)
+                ranks = bm.batch_rank(rows, columns_in_matrix)
 
-                for count in range(len(block_data)):
-                    if block_data[count] == '1':
-                        block[count] = 1.0
+                max_ranks[0] += int((ranks == rows_in_matrix).sum())
+                max_ranks[1] += int((ranks == rows_in_matrix - 1).sum())
+                max_ranks[2] += int((ranks < rows_in_matrix - 1).sum())
 
-                matrix = block.reshape(shape)
-                ranker = bm(matrix, rows_in_matrix, columns_in_matrix)
-                rank = ranker.compute_rank()
+            return Matrix._rank_result(max_ranks, length_of_binary_data, rows_in_matrix, columns_in_matrix, verbose)
+        else:
+            return (-1.0, False)
 
-                if rank == rows_in_matrix:
-                    max_ranks[0] += 1
-                elif rank == (rows_in_matrix - 1):
-                    max_ranks[1] += 1
-                else:
-                    max_ranks[2] += 1
+    @staticmethod
+    def _rank_result(max_ranks, length_of_binary_data, rows_in_matrix=32, columns_in_matrix=32, verbose=False):
+        """
+        Compute the Binary Matrix Rank Test from the number of matrices of each rank.
 
-                block_start += block_size
-                block_end += block_size
+        :param      max_ranks           The number of matrices of full rank, of full rank - 1 and of lower rank
+        :param      length_of_binary_data The length of the sequence being tested
+        :param      rows_in_matrix      Fixed for 32
+        :param      columns_in_matrix   Fixed for 32
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return     (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        number_of_block = sum(max_ranks)
 
-            pi = [1.0, 0.0, 0.0]
-            for x in range(1, 50):
-                pi[0] *= 1 - (1.0 / (2 ** x))
-            pi[1] = 2 * pi[0]
-            pi[2] = 1 - pi[0] - pi[1]
+        pi = [1.0, 0.0, 0.0]
+        for x in range(1, 50):
+            pi[0] *= 1 - (1.0 / (2 ** x))
+        pi[1] = 2 * pi[0]
+        pi[2] = 1 - pi[0] - pi[1]
 
-            xObs = 0.0
-            for i in range(len(pi)):
-                xObs += pow((max_ranks[i] - pi[i] * number_of_block), 2.0) / (pi[i] * number_of_block)
+        xObs = 0.0
+        for i in range(len(pi)):
+            xObs += pow((max_ranks[i] - pi[i] * number_of_block), 2.0) / (pi[i] * number_of_block)
 
-            p_value = exp(-xObs / 2)
+        p_value = exp(-xObs / 2)
 
-            if verbose:
-                print('Binary Matrix Rank Test DEBUG BEGIN:')
-                print("\tLength of input:\t", length_of_binary_data)
-                print("\tSize of Row:\t\t", rows_in_matrix)
-                print("\tSize of Column:\t\t", columns_in_matrix)
-                print('\tValue of N:\t\t\t', number_of_block)
-                print('\tValue of Pi:\t\t', pi)
-                print('\tValue of xObs:\t\t', xObs)
-                print('\tP-Value:\t\t\t', p_value)
-                print('DEBUG END.')
+        if verbose:
+            print('Binary Matrix Rank Test DEBUG BEGIN:')
+            print("\tLength of input:\t", length_of_binary_data)
+            print("\tSize of Row:\t\t", rows_in_matrix)
+            print("\tSize of Column:\t\t", columns_in_matrix)
+            print('\tValue of N:\t\t\t', number_of_block)
+            print('\tValue of Pi:\t\t', pi)
+            print('\tValue of xObs:\t\t', xObs)
+            print('\tP-Value:\t\t\t', p_value)
+            print('DEBUG END.')
 
-            return (p_value, (p_value >= 0.01))
-        else:
-            return (-1.0, False)
\ No newline at end of file
+        return TestResult(p_value, (p_value >= 0.01), xObs)
@@ -0,0 +1,98 @@
+from weakref import WeakKeyDictionary as WeakKeyDictionary
+from numpy import bincount as bincount
+from numpy import int64 as int64
+from numpy import intp as intp
+from numpy import zeros as zeros
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+
+
+class PatternCounter:
+
+    # One counter per sequence, shared by the tests run on the same BitSequence
+    _counters = WeakKeyDictionary()
+
+    def __init__(self, binary_data):
+        """
+        Histograms of the overlapping m-bit patterns of a sequence, with the first m-1 bits appended to the end so
+        that every position starts a pattern (the augmented sequence of the Serial and Approximate Entropy tests).
+        The histogram of the (m-1)-bit patterns is the m-bit histogram with each pair of patterns that differ only in
+        their last bit added together, so only the longest pattern length requested is counted from the bits and the
+        shorter ones are folded down from it.
+
+        :param      binary_data:        a binary string or BitSequence
+        """
+        self._binary_data = BitSequence.adapt(binary_data)
+        self._histograms = {}
+
+    @staticmethod
+    def of(binary_data):
+        """
+        The counter of a sequence, created on first use and shared while the BitSequence is alive.
+
+        :param      binary_data:        a binary string or BitSequence
+        :return:    PatternCounter
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        counter = PatternCounter._counters.get(binary_data)
+        if counter is None:
+            counter = PatternCounter(binary_data)
+            PatternCounter._counters[binary_data] = counter
+        return counter
+
+    def counts(self, pattern_length):
+        """
+        :param      pattern_length:     the length of the pattern (m)
+        :return:    int64 array of 2^m counts, the count of pattern p at index p (first bit most significant)
+        """
+        if pattern_length <= 0:
+            # The only 0-bit pattern starts at every position
+            return zeros(1, dtype=int64) + len(self._binary_data)
+        if pattern_length - 1 > len(self._binary_data):
+            # Not folded from or into the other lengths, the windows are not those of the augmented sequence
+            return self._count_short(pattern_length)
+
+        if pattern_length not in self._histograms:
+            longer = [length for length in self._histograms if length > pattern_length]
+            if longer:
+                histogram = self._histograms[min(longer)]
+                for length in range(min(longer), pattern_length, -1):
+                    histogram = histogram.reshape(-1, 2).sum(axis=1)
+            else:
+                histogram = self._count(pattern_length)
+            self._histograms[pattern_length] = histogram
+
+        return self._histograms[pattern_length]
+
+    def _count_short(self, pattern_length):
+        """
+        Count the m-bit patterns of a sequence shorter than the m-1 bits to append. As the string implementation of
+        the tests did, the sequence is appended to itself once and a window running past the end is cut short, its
+        bits counted as a shorter number, so too short a sequence still gives a result.
+
+        :param      pattern_length:     the length of the pattern (m)
+        :return:    int64 array of 2^m counts
+        """
+        bits = self._binary_data.unpacked().tolist() * 2
+        histogram = zeros(pow(2, pattern_length), dtype=int64)
+        for start in range(len(self._binary_data)):
+            code = 0
+            for bit in bits[start:start + pattern_length]:
+                code = (code << 1) | bit
+            histogram[code] += 1
+        return histogram
+
+    def _count(self, pattern_length):
+        """
+        Count the circular m-bit patterns from the rolling window codes, a chunk of positions at a time.
+
+        :param      pattern_length:     the length of the pattern (m)
+        :return:    int64 array of 2^m counts
+        """
+        length = len(self._binary_data)
+        histogram = zeros(pow(2, pattern_length), dtype=int64)
+        step = 8 * CHUNK_BYTES
+        for start in range(0, length, step):
+            codes = self._binary_data.windows(pattern_length, wrap=True, start=start, stop=start + step)
+            histogram += bincount(codes.astype(intp), minlength=len(histogram))
+        return histogram
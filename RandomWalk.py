@@ -0,0 +1,149 @@
+from weakref import WeakKeyDictionary as WeakKeyDictionary
+from numpy import abs as abs
+from numpy import arange as arange
+from numpy import array as array
+from numpy import bincount as bincount
+from numpy import cumsum as cumsum
+from numpy import int64 as int64
+from numpy import minimum as minimum
+from numpy import zeros as zeros
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+
+
+class RandomWalk:
+
+    # The states -9, ..., -1, +1, ..., +9 of the random excursions tests, in column order
+    STATES = array([-9, -8, -7, -6, -5, -4, -3, -2, -1, 1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    # One walk per sequence, shared by the tests run on the same BitSequence
+    _walks = WeakKeyDictionary()
+
+    def __init__(self, binary_data):
+        """
+        Cycle decomposition of the cumulative sum random walk S' = 0, S1, ..., Sn, 0 of a sequence, as used by the
+        Cumulative Sums, Random Excursions and Random Excursions Variant tests. The walk is computed a chunk at a time. Positions are
+        labelled with their cycle by a cumulative sum over the returns to zero, and the number of visits of every
+        cycle to every state is counted with a single bincount over (cycle, state) pairs. Only the cycle that is
+        still open at the end of a chunk is carried over, so memory does not grow with the number of cycles.
+
+        :param      binary_data:        a binary string or BitSequence
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        number_of_states = len(RandomWalk.STATES)
+
+        # Visits to each state over the whole walk
+        self._visits = zeros(number_of_states, dtype=int64)
+        # Number of cycles visiting each state 0, 1, 2, 3, 4 and 5 or more times
+        self._frequencies = zeros((number_of_states, 6), dtype=int64)
+        # J, the number of cycles of S' (the zeros of S' less one)
+        self._cycles = 1
+        # Sn and the smallest and largest of the partial sums S0 = 0, S1, ..., Sn
+        self._lowest = 0
+        self._highest = 0
+
+        open_cycle = zeros(number_of_states, dtype=int64)
+        position = 0
+        step = 8 * CHUNK_BYTES
+        for start in range(0, len(binary_data), step):
+            walk = cumsum(binary_data.unpacked(start, start + step).astype(int64) * 2 - 1) + position
+            position = int(walk[-1])
+            self._lowest = min(self._lowest, int(walk.min()))
+            self._highest = max(self._highest, int(walk.max()))
+
+            # Cycle of every position, 0 for the cycle left open by the previous chunk
+            returns = walk == 0
+            cycle = cumsum(returns)
+            rows = int(cycle[-1]) + 1
+
+            in_range = (abs(walk) <= 9) & ~returns
+            column = walk[in_range] + 9
+            column[column > 9] -= 1
+            visits = bincount(cycle[in_range] * number_of_states + column,
+                              minlength=rows * number_of_states).reshape(rows, number_of_states)
+            self._visits += visits.sum(axis=0)
+
+            visits[0] += open_cycle
+            self._add_cycles(visits[:-1])
+            open_cycle = visits[-1]
+            self._cycles += rows - 1
+
+        # The zero appended to the end of the walk closes the last cycle
+        self._add_cycles(open_cycle.reshape(1, number_of_states))
+        self._total = position
+
+    @staticmethod
+    def of(binary_data):
+        """
+        The random walk of a sequence, created on first use and shared while the BitSequence is alive.
+
+        :param      binary_data:        a binary string or BitSequence
+        :return:    RandomWalk
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        walk = RandomWalk._walks.get(binary_data)
+        if walk is None:
+            walk = RandomWalk(binary_data)
+            RandomWalk._walks[binary_data] = walk
+        return walk
+
+    @property
+    def cycles(self):
+        """
+        J, the number of cycles of the walk
+        """
+        return self._cycles
+
+    @property
+    def total(self):
+        """
+        Sn, the final value of the walk
+        """
+        return self._total
+
+    @property
+    def lowest(self):
+        """
+        The smallest partial sum, including S0 = 0
+        """
+        return self._lowest
+
+    @property
+    def highest(self):
+        """
+        The largest partial sum, including S0 = 0
+        """
+        return self._highest
+
+    def visits(self, states):
+        """
+        :param      states:             The states to report
+        :return:    int64 array with the number of times the walk visits each state
+        """
+        return self._visits[RandomWalk._columns(states)]
+
+    def frequencies(self, states):
+        """
+        :param      states:             The states to report
+        :return:    int64 array (one row per state) with the number of cycles visiting the state 0, 1, 2, 3, 4
+                    and 5 or more times
+        """
+        return self._frequencies[RandomWalk._columns(states)]
+
+    def _add_cycles(self, visits):
+        """
+        Add closed cycles to the visit frequency table.
+
+        :param      visits:             int64 array of visits, one row per cycle and one column per state
+        """
+        number_of_states = len(RandomWalk.STATES)
+        clipped = minimum(visits, 5) + arange(number_of_states) * 6
+        self._frequencies += bincount(clipped.ravel(), minlength=number_of_states * 6).reshape(number_of_states, 6)
+
+    @staticmethod
+    def _columns(states):
+        """
+        :param      states:             States between -9 and +9, excluding 0
+        :return:    The column of each state
+        """
+        return array([RandomWalk.STATES.tolist().index(int(state)) for state in states])
@@ -3,7 +3,21 @@ from math import floor as floor
 from math import sqrt as sqrt
 from scipy.special import erfc as erfc
 from scipy.special import gammaincc as gammaincc
+from numpy import arange
+from numpy import bincount
+from numpy import clip
+from numpy import concatenate
+from numpy import count_nonzero
+from numpy import diff
+from numpy import flatnonzero
+from numpy import int64
+from numpy import maximum
+from numpy import searchsorted
 from numpy import zeros
+from BitSequence import CHUNK_BYTES
+from BitSequence import BitSequence
+from SequenceContext import SequenceContext
+from TestResult import TestResult
 
 class RunTest:
 
@@ -18,35 +32,61 @@ class RunTest:
         expected for a random sequence. In particular, this test determines whether the
         oscillation between such zeros and ones is too fast or too slow.
 
-        :param      binary_data:        The seuqnce of bit being tested
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
-        one_count = 0
-        vObs = 0
+        context = SequenceContext.adapt(binary_data)
+        binary_data = context.bits
         length_of_binary_data = len(binary_data)
 
+        # Step 1 - Compute the pre-test proportion πof ones in the input sequence: π = Σjεj / n
+        one_count = context.count_ones()
+
+        # Step 2 - If it can be shown that absolute value of (π - 0.5) is greater than or equal to tau
+        # then the run test need not be performed.
+        vObs = None
+        if not RunTest._skip_run_test(one_count, length_of_binary_data):
+            # Step 3 - Compute vObs
+            # The number of runs does not depend on the block size, so an encoding made for the Longest Run of Ones
+            # Test on the same context serves as well
+            encodings = context.variants('runs')
+            if len(encodings) > 0:
+                vObs = encodings[0][0]
+            else:
+                vObs, _ = context.get('runs', lambda: RunTest.run_length_encode(binary_data))
+
+        return RunTest._run_result(one_count, vObs, length_of_binary_data, verbose)
+
+    @staticmethod
+    def _skip_run_test(one_count, length_of_binary_data):
+        """
+        :return:    True when the proportion of ones fails the Frequency pre-test and the Runs Test is not performed
+        """
         # Predefined tau = 2 / sqrt(n)
         # TODO Confirm with Frank about the discrepancy between the formula and the sample of 2.3.8
         tau = 2 / sqrt(length_of_binary_data)
+        pi = one_count / length_of_binary_data
+        return abs(pi - 0.5) >= tau
 
-        # Step 1 - Compute the pre-test proportion πof ones in the input sequence: π = Σjεj / n
-        one_count = binary_data.count('1')
+    @staticmethod
+    def _run_result(one_count, vObs, length_of_binary_data, verbose=False):
+        """
+        Compute the Runs Test from the number of ones and the total number of runs.
 
+        :param      one_count:          The number of ones in the sequence
+        :param      vObs:               The total number of runs V(n)
+        :param      length_of_binary_data: The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        tau = 2 / sqrt(length_of_binary_data)
         pi = one_count / length_of_binary_data
 
-        # Step 2 - If it can be shown that absolute value of (π - 0.5) is greater than or equal to tau
-        # then the run test need not be performed.
-        if abs(pi - 0.5) >= tau:
+        if RunTest._skip_run_test(one_count, length_of_binary_data):
             ##print("The test should not have been run because of a failure to pass test 1, the Frequency (Monobit) test.")
-            return (0.0000, False)
+            return TestResult(0.0000, False, vObs)
         else:
-            # Step 3 - Compute vObs
-            for item in range(1, length_of_binary_data):
-                if binary_data[item] != binary_data[item - 1]:
-                    vObs += 1
-            vObs += 1
-
             # Step 4 - Compute p_value = erfc((|vObs − 2nπ * (1−π)|)/(2 * sqrt(2n) * π * (1−π)))
             p_value = erfc(abs(vObs - (2 * (length_of_binary_data) * pi * (1 - pi))) / (2 * sqrt(2 * length_of_binary_data) * pi * (1 - pi)))
 
@@ -55,13 +95,13 @@ class RunTest:
             print("\tLength of input:\t\t\t\t", length_of_binary_data)
             print("\tTau (2/sqrt(length of input)):\t", tau)
             print('\t# of \'1\':\t\t\t\t\t\t', one_count)
-            print('\t# of \'0\':\t\t\t\t\t\t', binary_data.count('0'))
+            print('\t# of \'0\':\t\t\t\t\t\t', length_of_binary_data - one_count)
             print('\tPI (1 count / length of input):\t', pi)
             print('\tvObs:\t\t\t\t\t\t\t', vObs)
             print('\tP-Value:\t\t\t\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value > 0.01))
+        return TestResult(p_value, (p_value > 0.01), vObs)
 
     @staticmethod
     def longest_one_block_test(binary_data:str, verbose=False):
@@ -72,71 +112,61 @@ class RunTest:
         length of the longest run of ones implies that there is also an irregularity in the expected length of the
         longest run of zeroes. Therefore, only a test for ones is necessary.
 
-        :param      binary_data:        The sequence of bits being tested
+        :param      binary_data:        The sequence of bits being tested (BitSequence or binary string)
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
+        context = SequenceContext.adapt(binary_data)
+        binary_data = context.bits
         length_of_binary_data = len(binary_data)
         # print('Length of binary string: ', length_of_binary_data)
 
-        # Initialized k, m. n, pi and v_values
-        if length_of_binary_data < 128:
+        parameters = RunTest.longest_run_parameters(length_of_binary_data)
+        if parameters is None:
             # Not enough data to run this test
             return (0.00000, False, 'Error: Not enough data to run this test')
-        elif length_of_binary_data < 6272:
-            k = 3
-            m = 8
-            v_values = [1, 2, 3, 4]
-            pi_values = [0.21484375, 0.3671875, 0.23046875, 0.1875]
-        elif length_of_binary_data < 750000:
-            k = 5
-            m = 128
-            v_values = [4, 5, 6, 7, 8, 9]
-            pi_values = [0.1174035788, 0.242955959, 0.249363483, 0.17517706, 0.102701071, 0.112398847]
-        else:
-            # If length_of_bit_string > 750000
-            k = 6
-            m = 10000
-            v_values = [10, 11, 12, 13, 14, 15, 16]
-            pi_values = [0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727]
-
-        number_of_blocks = floor(length_of_binary_data / m)
-        block_start = 0
-        block_end = m
-        xObs = 0
-        # This will intialized an array with a number of 0 you specified.
-        frequencies = zeros(k + 1)
+        k, m, v_values, pi_values = parameters
 
-        # print('Number of Blocks: ', number_of_blocks)
+        # The longest run of ones in each M-bit block
+        number_of_runs, longest_runs = context.get('runs', lambda: RunTest.run_length_encode(binary_data, m), m)
 
-        for count in range(number_of_blocks):
-            block_data = binary_data[block_start:block_end]
-            max_run_count = 0
-            run_count = 0
+        # Tally the longest runs into the k + 1 categories: <= v[0], v[1], ..., >= v[k]
+        frequencies = bincount(clip(longest_runs - v_values[0], 0, k), minlength=k + 1)
 
-            # This will count the number of ones in the block
-            for bit in block_data:
-                if bit == '1':
-                    run_count += 1
-                    max_run_count = max(max_run_count, run_count)
-                else:
-                    max_run_count = max(max_run_count, run_count)
-                    run_count = 0
+        return RunTest._longest_run_result(frequencies, length_of_binary_data, verbose)
 
-            max(max_run_count, run_count)
+    @staticmethod
+    def longest_run_parameters(length_of_binary_data):
+        """
+        The parameters of the Longest Run of Ones Test for a sequence of length n.
 
-            #print('Block Data: ', block_data, '. Run Count: ', max_run_count)
+        :param      length_of_binary_data: The length n of the sequence
+        :return:    (K, M, v_values, pi_values), or None when the sequence is shorter than 128 bits
+        """
+        if length_of_binary_data < 128:
+            return None
+        elif length_of_binary_data < 6272:
+            return 3, 8, [1, 2, 3, 4], [0.21484375, 0.3671875, 0.23046875, 0.1875]
+        elif length_of_binary_data < 750000:
+            return 5, 128, [4, 5, 6, 7, 8, 9], [0.1174035788, 0.242955959, 0.249363483, 0.17517706, 0.102701071,
+                                                0.112398847]
+        else:
+            # If length_of_bit_string > 750000
+            return 6, 10000, [10, 11, 12, 13, 14, 15, 16], [0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727]
 
-            if max_run_count < v_values[0]:
-                frequencies[0] += 1
-            for j in range(k):
-                if max_run_count == v_values[j]:
-                    frequencies[j] += 1
-            if max_run_count > v_values[k - 1]:
-                frequencies[k] += 1
+    @staticmethod
+    def _longest_run_result(frequencies, length_of_binary_data, verbose=False):
+        """
+        Compute the Longest Run of Ones Test from the number of blocks in each longest run category.
 
-            block_start += m
-            block_end += m
+        :param      frequencies:        The number of blocks whose longest run is <= v[0], v[1], ..., >= v[K]
+        :param      length_of_binary_data: The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        k, m, v_values, pi_values = RunTest.longest_run_parameters(length_of_binary_data)
+        number_of_blocks = floor(length_of_binary_data / m)
+        xObs = 0
 
         # print("Frequencies: ", frequencies)
         # Compute xObs
@@ -158,4 +188,60 @@ class RunTest:
             print('\tP-Value:\t\t\t\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value > 0.01))
\ No newline at end of file
+        return TestResult(p_value, (p_value > 0.01), xObs)
+
+    @staticmethod
+    def run_length_encode(binary_data:str, block_size=None):
+        """
+        Run-length encode the sequence from the positions where adjacent bits differ. The encoding gives the total
+        number of runs V(n) for the Runs Test and, with the runs split at the boundaries of the M-bit blocks, the
+        longest run of ones in each block for the Longest Run of Ones Test. The sequence is unpacked a whole number
+        of blocks at a time, so the memory used does not depend on its length.
+
+        :param      binary_data:        The sequence of bits being tested (BitSequence or binary string)
+        :param      block_size:         The length of each block, None to only count the runs
+        :return:    (int, array)        The number of runs V(n) and the longest run of ones in each complete block
+                                        (None when no block size is given)
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        length_of_binary_data = len(binary_data)
+
+        if block_size is None:
+            step = 8 * CHUNK_BYTES
+            number_of_blocks = 0
+            longest_runs = None
+        else:
+            step = max(8 * CHUNK_BYTES // block_size, 1) * block_size
+            number_of_blocks = length_of_binary_data // block_size
+            longest_runs = zeros(number_of_blocks, dtype=int64)
+
+        number_of_runs = 1 if length_of_binary_data > 0 else 0
+        previous_bit = None
+        for chunk_start in range(0, length_of_binary_data, step):
+            bits = binary_data.unpacked(chunk_start, chunk_start + step)
+
+            # Every position where the bit differs from the one before starts a new run
+            changes = bits[1:] != bits[:-1]
+            number_of_runs += int(count_nonzero(changes))
+            if previous_bit is not None and bits[0] != previous_bit:
+                number_of_runs += 1
+            previous_bit = bits[-1]
+
+            first_block = chunk_start // block_size if block_size else 0
+            blocks_in_chunk = min(len(bits) // block_size, number_of_blocks - first_block) if block_size else 0
+            if blocks_in_chunk > 0:
+                # Split the runs at the block boundaries so that no run spans two blocks, the run starts then
+                # stay in order and the first run of every block is at the block start
+                end = blocks_in_chunk * block_size
+                changes = changes[:end - 1]
+                changes[block_size - 1::block_size] = True
+                starts = concatenate(([0], flatnonzero(changes) + 1))
+                run_lengths = diff(starts, append=end)
+
+                # Only the runs of ones count, then take the longest run that starts in each block
+                one_run_lengths = run_lengths * bits[starts]
+                first_run = searchsorted(starts, arange(blocks_in_chunk, dtype=int64) * block_size)
+                longest_runs[first_block:first_block + blocks_in_chunk] = maximum.reduceat(one_run_lengths,
+                                                                                          first_run)
+
+        return number_of_runs, longest_runs
@@ -0,0 +1,124 @@
+from BitSequence import BitSequence
+from PatternCounter import PatternCounter
+from RandomWalk import RandomWalk
+
+
+class SequenceContext:
+
+    # The data derived from a sequence that more than one test uses, and the tests that use it
+    CONSUMERS = {
+        'ones': ('monobit', 'runs'),
+        'runs': ('runs', 'longest_run'),
+        'patterns': ('serial', 'approximate_entropy'),
+        'walk': ('cumulative_sums', 'random_excursions', 'random_excursions_variant'),
+    }
+
+    def __init__(self, binary_data, tests=None):
+        """
+        The analysis context of one sequence. The tests take the data they derive from the sequence (the count of
+        ones, the run-length encoding, the overlapping pattern histograms and the random walk) from the context,
+        which computes each of them the first time it is asked for and then keeps it for the other tests.
+        When the tests that will be run are given, each derived item is released as soon as the last test that uses
+        it has been released with release(), so only the data still needed by the remaining tests is held.
+
+        :param      binary_data:        a binary string or BitSequence
+        :param      tests:              Names of the tests that will be run on the context (see CONSUMERS), None to
+                                        keep every derived item for the life of the context
+        """
+        self._bits = BitSequence.adapt(binary_data)
+        self._pending = None if tests is None else list(tests)
+        self._cache = {}
+
+    @staticmethod
+    def adapt(binary_data):
+        """
+        Return the input as a SequenceContext. The test functions call this on their input so that they accept a
+        context as well as a BitSequence or a binary string.
+
+        :param      binary_data:        SequenceContext, BitSequence or binary string
+        :return:    SequenceContext
+        """
+        if isinstance(binary_data, SequenceContext):
+            return binary_data
+        return SequenceContext(binary_data)
+
+    def __len__(self):
+        return len(self._bits)
+
+    def __repr__(self):
+        return 'SequenceContext(length=%d, cached=%s)' % (len(self._bits), sorted(set(name for name, _ in self._cache)))
+
+    @property
+    def bits(self):
+        """
+        The BitSequence being tested
+        """
+        return self._bits
+
+    def get(self, name, factory, variant=None):
+        """
+        :param      name:               The name of the derived item
+        :param      factory:            Function computing the item, called only when it is not cached
+        :param      variant:            Parameter of the item (e.g. a block size), items with the same name and
+                                        different variants are cached separately and released together
+        :return:    The derived item
+        """
+        key = (name, variant)
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    def variants(self, name):
+        """
+        :param      name:               The name of the derived item
+        :return:    List of the cached variants of the item
+        """
+        return [value for (cached_name, _), value in self._cache.items() if cached_name == name]
+
+    def count_ones(self):
+        """
+        :return:    The number of ones in the sequence
+        """
+        return self.get('ones', self._bits.count_ones)
+
+    @property
+    def patterns(self):
+        """
+        The overlapping pattern histograms of the sequence (PatternCounter)
+        """
+        return self.get('patterns', lambda: self._shared(PatternCounter))
+
+    @property
+    def walk(self):
+        """
+        The cumulative sum random walk of the sequence (RandomWalk)
+        """
+        return self.get('walk', lambda: self._shared(RandomWalk))
+
+    def release(self, test):
+        """
+        Record that a scheduled test has finished and drop the derived items no remaining test uses.
+
+        :param      test:               The name of the test
+        """
+        if self._pending is None:
+            return
+
+        if test in self._pending:
+            self._pending.remove(test)
+
+        for name, consumers in SequenceContext.CONSUMERS.items():
+            if not any(consumer in self._pending for consumer in consumers):
+                for key in [key for key in self._cache if key[0] == name]:
+                    del self._cache[key]
+
+    def _shared(self, engine):
+        """
+        A context without a schedule shares the engines kept per BitSequence, so that tests called one by one on
+        the same sequence still reuse each other's work. A scheduled context owns its engines so that releasing
+        them frees the memory.
+
+        :param      engine:             PatternCounter or RandomWalk
+        :return:    The engine of the sequence
+        """
+        return engine.of(self._bits) if self._pending is None else engine(self._bits)
@@ -1,5 +1,8 @@
 from numpy import zeros as zeros
 from scipy.special import gammaincc as gammaincc
+from SequenceContext import SequenceContext
+from TestResult import TestResult
+
 class Serial:
 
     @staticmethod
@@ -13,39 +16,39 @@ class Serial:
         sequences have uniformity; that is, every m-bit pattern has the same chance of appearing as every other
         m-bit pattern. Note that for m = 1, the Serial test is equivalent to the Frequency test of Section 2.1.
 
-        :param      binary_data:        a binary string
+        :param      binary_data:        a binary string or BitSequence
         :param      verbose             True to display the debug message, False to turn off debug message
         :param      pattern_length:     the length of the pattern (m)
         :return:    ((p_value1, bool), (p_value2, bool)) A tuple which contain the p_value and result of serial_test(True or False)
         """
-        length_of_binary_data = len(binary_data)
-        binary_data += binary_data[:(pattern_length -1):]
-
-        # Get max length one patterns for m, m-1, m-2
-        max_pattern = ''
-        for i in range(pattern_length + 1):
-            max_pattern += '1'
+        context = SequenceContext.adapt(binary_data)
+        length_of_binary_data = len(context)
 
         # Step 02: Determine the frequency of all possible overlapping m-bit blocks,
         # all possible overlapping (m-1)-bit blocks and
         # all possible overlapping (m-2)-bit blocks.
-        vobs_01 = zeros(int(max_pattern[0:pattern_length:], 2) + 1)
-        vobs_02 = zeros(int(max_pattern[0:pattern_length - 1:], 2) + 1)
-        vobs_03 = zeros(int(max_pattern[0:pattern_length - 2:], 2) + 1)
+        # The first m-1 bits are appended to the end of the sequence so every position starts a block.
+        # The shorter patterns are folded down from the m-bit counts, which are shared through the context.
+        counter = context.patterns
+        vobs = [counter.counts(pattern_length - i) for i in range(3)]
 
-        for i in range(length_of_binary_data):
-            # Work out what pattern is observed
-            vobs_01[int(binary_data[i:i + pattern_length:], 2)] += 1
-            vobs_02[int(binary_data[i:i + pattern_length - 1:], 2)] += 1
-            vobs_03[int(binary_data[i:i + pattern_length - 2:], 2)] += 1
+        return Serial._serial_result(vobs, length_of_binary_data, pattern_length, verbose)
 
-        vobs = [vobs_01, vobs_02, vobs_03]
+    @staticmethod
+    def _serial_result(vobs, length_of_binary_data, pattern_length, verbose=False):
+        """
+        Compute the Serial Test from the frequencies of the overlapping patterns.
 
+        :param      vobs:               The counts of the m-bit, (m-1)-bit and (m-2)-bit patterns
+        :param      length_of_binary_data: The length of the sequence being tested
+        :param      pattern_length:     the length of the pattern (m)
+        :param      verbose             True to display the debug message, False to turn off debug message
+        :return:    ((p_value1, bool), (p_value2, bool)) A tuple which contain the p_value and result of serial_test(True or False)
+        """
         # Step 03 Compute for ψs
         sums = zeros(3)
         for i in range(3):
-            for j in range(len(vobs[i])):
-                sums[i] += pow(vobs[i][j], 2)
+            sums[i] = float((vobs[i].astype(float) ** 2).sum())
             sums[i] = (sums[i] * pow(2, pattern_length - i) / length_of_binary_data) - length_of_binary_data
 
         # Cimpute the test statistics and p values
@@ -66,4 +69,5 @@ class Serial:
             print('\tP-Value 02:\t\t\t', p_value_02)
             print('DEBUG END.')
 
-        return ((p_value_01, p_value_01 >= 0.01), (p_value_02, p_value_02 >= 0.01))
\ No newline at end of file
+        return (TestResult(p_value_01, p_value_01 >= 0.01, nabla_01),
+                TestResult(p_value_02, p_value_02 >= 0.01, nabla_02))
\ No newline at end of file
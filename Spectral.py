@@ -2,14 +2,21 @@ from math import fabs as fabs
 from math import floor as floor
 from math import log as log
 from math import sqrt as sqrt
-from numpy import where as where
-from scipy import fftpack as sff
+from numpy import count_nonzero as count_nonzero
+from numpy import empty as empty
+from numpy import float32 as float32
+from numpy import float64 as float64
+from numpy import square as square
+from scipy import fft as sff
 from scipy.special import erfc as erfc
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from TestResult import TestResult
 
 class SpectralTest:
 
     @staticmethod
-    def spectral_test(binary_data:str, verbose=False):
+    def spectral_test(binary_data:str, verbose=False, workers=None, low_memory=False):
         """
         Note that this description is taken from the NIST documentation [1]
         [1] http://csrc.nist.gov/publications/nistpubs/800-22-rev1a/SP800-22rev1a.pdf
@@ -18,30 +25,30 @@ class SpectralTest:
         sequence that would indicate a deviation from the assumption of randomness. The intention is to detect whether
         the number of peaks exceeding the 95 % threshold is significantly different than 5 %.
 
-        :param      binary_data:        The seuqnce of bit being tested
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
         :param      verbose             True to display the debug messgae, False to turn off debug message
+        :param      workers:            Number of threads used by the FFT, None for one and -1 for every core
+        :param      low_memory:         True to transform in single precision and count the peaks chunk by chunk,
+                                        for sequences in the 10^8 bit range
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary_data = len(binary_data)
-        plus_one_minus_one = []
 
         # Step 1 - The zeros and ones of the input sequence (ε) are converted to values of –1 and +1
         # to create the sequence X = x1, x2, …, xn, where xi = 2εi – 1.
-        for char in binary_data:
-            if char == '0':
-                plus_one_minus_one.append(-1)
-            elif char == '1':
-                plus_one_minus_one.append(1)
+        plus_one_minus_one = SpectralTest._plus_minus_one(binary_data, float32 if low_memory else float64)
 
         # Step 2 - Apply a Discrete Fourier transform (DFT) on X to produce: S = DFT(X).
         # A sequence of complex variables is produced which represents periodic
         # components of the sequence of bits at different frequencies
-        spectral = sff.fft(plus_one_minus_one)
+        # X is real, so only the non-negative frequencies are computed (the rest are their complex conjugates)
+        spectral = sff.rfft(plus_one_minus_one, overwrite_x=True, workers=workers)
+        del plus_one_minus_one
 
         # Step 3 - Calculate M = modulus(S´) ≡ |S'|, where S´ is the substring consisting of the first n/2
         # elements in S, and the modulus function produces a sequence of peak heights.
         slice = floor(length_of_binary_data / 2)
-        modulus = abs(spectral[0:slice])
 
         # Step 4 - Compute T = sqrt(log(1 / 0.05) * length_of_string) the 95 % peak height threshold value.
         # Under an assumption of randomness, 95 % of the values obtained from the test should not exceed T.
@@ -52,7 +59,14 @@ class SpectralTest:
         n0 = 0.95 * (length_of_binary_data / 2)
 
         # Step 6 - Compute N1 = the actual observed number of peaks in M that are less than T.
-        n1 = len(where(modulus < tau)[0])
+        if low_memory:
+            # Compare the squared modulus with T^2 a chunk at a time instead of holding a full modulus array
+            n1 = 0
+            for start in range(0, slice, CHUNK_BYTES):
+                chunk = spectral[start:min(start + CHUNK_BYTES, slice)]
+                n1 += int(count_nonzero(square(chunk.real) + square(chunk.imag) < tau * tau))
+        else:
+            n1 = int(count_nonzero(abs(spectral[0:slice]) < tau))
 
         # Step 7 - Compute d = (n_1 - n_0) / sqrt (length_of_string * (0.95) * (0.05) / 4)
         d = (n1 - n0) / sqrt(length_of_binary_data * (0.95) * (0.05) / 4)
@@ -70,4 +84,24 @@ class SpectralTest:
             print('\tP-Value:\t\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value >= 0.01))
+        return TestResult(p_value, (p_value >= 0.01), d)
+
+    @staticmethod
+    def _plus_minus_one(binary_data, dtype):
+        """
+        Build the -1/+1 sequence directly in a floating point array, unpacking the bits a chunk at a time.
+
+        :param      binary_data:        The BitSequence being tested
+        :param      dtype:              The floating point type of the result
+        :return:    The sequence X = x1, x2, ..., xn where xi = 2εi - 1
+        """
+        length = len(binary_data)
+        values = empty(length, dtype=dtype)
+        step = 8 * CHUNK_BYTES
+        for start in range(0, length, step):
+            stop = min(start + step, length)
+            chunk = values[start:stop]
+            chunk[:] = binary_data.unpacked(start, stop)
+            chunk *= 2
+            chunk -= 1
+        return values
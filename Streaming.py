@@ -0,0 +1,560 @@
+import time
+import numpy as np
+
+from ApproximateEntropy import ApproximateEntropy
+from BinaryMatrix import BinaryMatrix
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from FrequencyTest import FrequencyTest
+from Matrix import Matrix
+from PatternCounter import PatternCounter
+from RunTest import RunTest
+from Serial import Serial
+from TemplateMatching import TemplateMatching
+from Tools import Tools
+
+
+class BlockBuffer:
+
+    def __init__(self, block_size):
+        """
+        Cut a stream of bits into consecutive M-bit blocks, carrying the bits of an incomplete block over to the
+        next chunk.
+
+        :param      block_size:         The length M of the blocks
+        """
+        self._block_size = block_size
+        self._carry = np.zeros(0, dtype=np.uint8)
+
+    def split(self, bits):
+        """
+        :param      bits:               The next chunk of the stream, one 0/1 element per bit
+        :return:    2-D uint8 array of the blocks completed by the chunk, one block per row
+        """
+        if len(self._carry) > 0:
+            bits = np.concatenate((self._carry, bits))
+        whole = len(bits) - len(bits) % self._block_size
+        self._carry = bits[whole:].copy()
+        return bits[:whole].reshape(-1, self._block_size)
+
+
+class WindowBuffer:
+
+    def __init__(self, window_size):
+        """
+        The overlapping m-bit windows of a stream of bits. The last m-1 bits of each chunk are carried over so that
+        the windows spanning two chunks are produced, and the first m-1 bits of the stream are kept for the windows
+        that wrap around its end.
+
+        :param      window_size:        The length m of the windows
+        """
+        self._window_size = window_size
+        self._tail = np.zeros(0, dtype=np.uint8)
+        self._head = np.zeros(0, dtype=np.uint8)
+        self._position = 0
+
+    def codes(self, bits):
+        """
+        :param      bits:               The next chunk of the stream, one 0/1 element per bit
+        :return:    (codes, position)   uint64 codes of the windows completed by the chunk, and the position in the
+                                        stream of the first of them
+        """
+        if len(self._head) < self._window_size - 1:
+            self._head = np.concatenate((self._head, bits[:self._window_size - 1 - len(self._head)]))
+
+        data = np.concatenate((self._tail, bits))
+        count = max(len(data) - self._window_size + 1, 0)
+        codes = BitSequence.window_codes(data, self._window_size, count)
+        position = self._position
+        self._position += count
+        self._tail = data[count:].copy()
+        return codes, position
+
+    def wrap_codes(self):
+        """
+        :return:    uint64 codes of the m-1 windows that start in the last m-1 bits of the stream and continue with
+                    its first bits, as when the first m-1 bits are appended to the end of the sequence
+        """
+        return BitSequence.window_codes(np.concatenate((self._tail, self._head)), self._window_size)
+
+
+class PatternHistogram:
+
+    def __init__(self, pattern_length):
+        """
+        The histogram of the overlapping m-bit patterns of a stream of bits, with the first m-1 bits appended to the
+        end (see PatternCounter). Histograms of shorter patterns are folded down from it.
+
+        :param      pattern_length:     The longest pattern length m needed
+        """
+        self._pattern_length = pattern_length
+        self._windows = WindowBuffer(pattern_length)
+        self._histogram = np.zeros(pow(2, pattern_length), dtype=np.int64)
+        self._finished = False
+        self._length = 0
+        # The first m-1 bits of the stream, the whole stream when it is shorter
+        self._head = np.zeros(0, dtype=np.uint8)
+
+    def update(self, bits):
+        if len(self._head) < self._pattern_length - 1:
+            self._head = np.concatenate((self._head, bits[:self._pattern_length - 1 - len(self._head)]))
+        self._length += len(bits)
+        codes, _ = self._windows.codes(bits)
+        self._histogram += np.bincount(codes.astype(np.intp), minlength=len(self._histogram))
+
+    def counts(self, pattern_length):
+        """
+        :param      pattern_length:     The length of the pattern, at most the length given to the constructor
+        :return:    int64 array of 2^m counts, the count of pattern p at index p
+        """
+        if self._pattern_length - 1 > self._length:
+            # A stream shorter than the bits to append is counted whole, as the test functions count it
+            return PatternCounter(BitSequence.from_bits(self._head)).counts(pattern_length)
+
+        if not self._finished:
+            codes = self._windows.wrap_codes()
+            self._histogram += np.bincount(codes.astype(np.intp), minlength=len(self._histogram))
+            self._finished = True
+
+        histogram = self._histogram
+        for length in range(self._pattern_length, pattern_length, -1):
+            histogram = histogram.reshape(-1, 2).sum(axis=1)
+        return histogram
+
+
+class StreamAccumulator:
+
+    def __init__(self):
+        """
+        Accumulates the sufficient statistic of a test over a sequence delivered a chunk at a time. Subclasses
+        implement _update and result.
+        """
+        self._length = 0
+
+    def update(self, bits):
+        """
+        :param      bits:               The next chunk of the sequence, uint8 array with one 0/1 element per bit
+        """
+        self._length += len(bits)
+        self._update(bits)
+
+    def _update(self, bits):
+        raise NotImplementedError()
+
+    def result(self, verbose=False):
+        """
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    The result of the test on the whole sequence, as the test function returns it
+        """
+        raise NotImplementedError()
+
+
+class MonobitAccumulator(StreamAccumulator):
+
+    def __init__(self):
+        StreamAccumulator.__init__(self)
+        self._ones = 0
+
+    def _update(self, bits):
+        self._ones += int(np.count_nonzero(bits))
+
+    def result(self, verbose=False):
+        return FrequencyTest._monobit_result(self._ones, self._length, verbose)
+
+
+class BlockFrequencyAccumulator(StreamAccumulator):
+
+    def __init__(self, block_size=128):
+        StreamAccumulator.__init__(self)
+        self._block_size = block_size
+        self._blocks = BlockBuffer(block_size)
+        self._proportion_sum = 0.0
+        self._number_of_blocks = 0
+        # Needed when the sequence holds a single block and the test degenerates to the Monobit test
+        self._ones = 0
+        self._first_block_ones = None
+
+    def _update(self, bits):
+        self._ones += int(np.count_nonzero(bits))
+        blocks = self._blocks.split(bits)
+        if len(blocks) > 0:
+            block_ones = blocks.sum(axis=1, dtype=np.int64)
+            if self._first_block_ones is None:
+                self._first_block_ones = int(block_ones[0])
+            self._proportion_sum += FrequencyTest._proportion_sum(block_ones, self._block_size)
+            self._number_of_blocks += len(blocks)
+
+    def result(self, verbose=False):
+        if self._number_of_blocks == 0:
+            # Shorter than one block, the block is the whole sequence
+            return FrequencyTest._monobit_result(self._ones, self._length, verbose)
+        elif self._number_of_blocks == 1:
+            return FrequencyTest._monobit_result(self._first_block_ones, self._block_size, verbose)
+        return FrequencyTest._block_frequency_result(self._proportion_sum, self._number_of_blocks, self._block_size,
+                                                     self._length, verbose)
+
+
+class RunsAccumulator(StreamAccumulator):
+
+    def __init__(self):
+        StreamAccumulator.__init__(self)
+        self._ones = 0
+        self._runs = 0
+        self._last_bit = None
+
+    def _update(self, bits):
+        if len(bits) == 0:
+            return
+        self._ones += int(np.count_nonzero(bits))
+        self._runs += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        if self._last_bit is None or bits[0] != self._last_bit:
+            self._runs += 1
+        self._last_bit = bits[-1]
+
+    def result(self, verbose=False):
+        return RunTest._run_result(self._ones, self._runs, self._length, verbose)
+
+
+class LongestRunAccumulator(StreamAccumulator):
+
+    # Sequence lengths selecting each block size M of the test (see RunTest.longest_run_parameters)
+    LENGTHS = (128, 6272, 750000)
+
+    def __init__(self):
+        """
+        The block size of the Longest Run of Ones Test depends on the length of the sequence, which is only known at
+        the end of the stream, so the blocks of every possible size are tallied.
+        """
+        StreamAccumulator.__init__(self)
+        self._parameters = [RunTest.longest_run_parameters(length) for length in LongestRunAccumulator.LENGTHS]
+        self._blocks = [BlockBuffer(m) for _, m, _, _ in self._parameters]
+        self._frequencies = [np.zeros(k + 1, dtype=np.int64) for k, _, _, _ in self._parameters]
+
+    def _update(self, bits):
+        for (k, m, v_values, _), blocks, frequencies in zip(self._parameters, self._blocks, self._frequencies):
+            complete = blocks.split(bits)
+            if len(complete) > 0:
+                _, longest_runs = RunTest.run_length_encode(BitSequence.from_bits(complete.ravel()), m)
+                frequencies += np.bincount(np.clip(longest_runs - v_values[0], 0, k), minlength=k + 1)
+
+    def result(self, verbose=False):
+        parameters = RunTest.longest_run_parameters(self._length)
+        if parameters is None:
+            # Not enough data to run this test
+            return (0.00000, False, 'Error: Not enough data to run this test')
+        index = [m for _, m, _, _ in self._parameters].index(parameters[1])
+        return RunTest._longest_run_result(self._frequencies[index], self._length, verbose)
+
+
+class MatrixRankAccumulator(StreamAccumulator):
+
+    def __init__(self, rows_in_matrix=32, columns_in_matrix=32):
+        StreamAccumulator.__init__(self)
+        self._rows = rows_in_matrix
+        self._columns = columns_in_matrix
+        self._blocks = BlockBuffer(rows_in_matrix * columns_in_matrix)
+        self._max_ranks = [0, 0, 0]
+
+    def _update(self, bits):
+        matrices = self._blocks.split(bits)
+        if len(matrices) > 0:
+            rows = BitSequence._bits_to_codes(matrices.reshape(-1, self._columns)).reshape(-1, self._rows)
+            ranks = BinaryMatrix.batch_rank(rows, self._columns)
+            self._max_ranks[0] += int((ranks == self._rows).sum())
+            self._max_ranks[1] += int((ranks == self._rows - 1).sum())
+            self._max_ranks[2] += int((ranks < self._rows - 1).sum())
+
+    def result(self, verbose=False):
+        if sum(self._max_ranks) == 0:
+            return (-1.0, False)
+        return Matrix._rank_result(self._max_ranks, self._length, self._rows, self._columns, verbose)
+
+
+class NonOverlappingAccumulator(StreamAccumulator):
+
+    def __init__(self, length, template_pattern='000000001', block=8):
+        """
+        :param      length:             The length of the sequence, which sets the block size M = n / N
+        :param      template_pattern:   The pattern to match to
+        :param      block:              The number of independent blocks N
+        """
+        StreamAccumulator.__init__(self)
+        self._pattern_size = len(template_pattern)
+        self._template_code = int(template_pattern, 2)
+        self._block = block
+        self._block_size = length // block
+        self._windows = WindowBuffer(self._pattern_size)
+        self._pattern_counts = np.zeros(block)
+        # An aperiodic template cannot overlap itself, so its hits never need to be skipped
+        self._aperiodic = template_pattern in TemplateMatching.aperiodic_templates(self._pattern_size)
+        self._next_allowed = 0
+
+    def _update(self, bits):
+        codes, position = self._windows.codes(bits)
+        hits = np.flatnonzero(codes == self._template_code) + position
+
+        # Only the windows that lie inside one of the N blocks count
+        block_of_hit = hits // self._block_size
+        valid = (block_of_hit < self._block) & (hits - block_of_hit * self._block_size <= self._block_size -
+                                                 self._pattern_size)
+        hits = hits[valid]
+        block_of_hit = block_of_hit[valid]
+
+        if self._aperiodic:
+            self._pattern_counts += np.bincount(block_of_hit, minlength=self._block)[:self._block]
+        else:
+            # After a hit the search resumes after the template, and at the start of every block
+            for hit, count in zip(hits.tolist(), block_of_hit.tolist()):
+                if hit >= max(self._next_allowed, count * self._block_size):
+                    self._pattern_counts[count] += 1
+                    self._next_allowed = hit + self._pattern_size
+
+    def result(self, verbose=False):
+        return TemplateMatching._non_overlapping_result(self._pattern_counts, self._block_size, self._pattern_size,
+                                                        self._length, verbose)
+
+
+class OverlappingAccumulator(StreamAccumulator):
+
+    def __init__(self, pattern_size=9, block_size=1032, template_pattern=None, degrees_of_freedom=5):
+        StreamAccumulator.__init__(self)
+        if template_pattern is None:
+            template_pattern = '1' * pattern_size
+        self._template_pattern = template_pattern
+        self._pattern_size = len(template_pattern)
+        self._template_code = int(template_pattern, 2)
+        self._block_size = block_size
+        self._degrees_of_freedom = degrees_of_freedom
+        self._windows = WindowBuffer(self._pattern_size)
+        self._pattern_counts = np.zeros(degrees_of_freedom + 1)
+        # Hits of the blocks not yet complete, starting with block _first_open
+        self._first_open = 0
+        self._open_hits = np.zeros(0, dtype=np.int64)
+
+    def _update(self, bits):
+        codes, position = self._windows.codes(bits)
+        windows_seen = position + len(codes)
+        hits = np.flatnonzero(codes == self._template_code) + position
+
+        # Only the first M-m+1 windows of every block count
+        block_of_hit = hits // self._block_size
+        valid = hits - block_of_hit * self._block_size <= self._block_size - self._pattern_size
+        complete = (windows_seen - (self._block_size - self._pattern_size + 1)) // self._block_size + 1
+        open_blocks = max(complete, self._first_open + 1) - self._first_open
+        block_hits = np.bincount(block_of_hit[valid] - self._first_open, minlength=open_blocks)
+        block_hits[:len(self._open_hits)] += self._open_hits
+
+        # Tally the blocks whose windows have all been seen
+        closed = max(complete - self._first_open, 0)
+        self._tally(block_hits[:closed])
+        self._open_hits = block_hits[closed:]
+        self._first_open += closed
+
+    def _tally(self, block_hits):
+        self._pattern_counts += np.bincount(np.minimum(block_hits, self._degrees_of_freedom),
+                                            minlength=self._degrees_of_freedom + 1)
+
+    def result(self, verbose=False):
+        # Only complete blocks of the sequence are tested
+        number_of_block = self._length // self._block_size
+        pattern_counts = self._pattern_counts.copy()
+        remaining = number_of_block - self._first_open
+        if remaining > 0:
+            open_hits = np.zeros(remaining, dtype=np.int64)
+            open_hits[:min(remaining, len(self._open_hits))] = self._open_hits[:remaining]
+            pattern_counts += np.bincount(np.minimum(open_hits, self._degrees_of_freedom),
+                                          minlength=self._degrees_of_freedom + 1)
+
+        pi = TemplateMatching.template_probabilities(self._template_pattern, self._block_size,
+                                                     self._degrees_of_freedom)
+        return TemplateMatching._overlapping_result(pattern_counts, pi, self._length, verbose)
+
+
+class SerialAccumulator(StreamAccumulator):
+
+    def __init__(self, pattern_length=16, patterns=None):
+        """
+        :param      pattern_length:     the length of the pattern (m)
+        :param      patterns:           A PatternHistogram fed by the caller and shared with other accumulators, None
+                                        to keep one of its own
+        """
+        StreamAccumulator.__init__(self)
+        self._pattern_length = pattern_length
+        self._own_patterns = patterns is None
+        self._patterns = PatternHistogram(pattern_length) if patterns is None else patterns
+
+    def _update(self, bits):
+        if self._own_patterns:
+            self._patterns.update(bits)
+
+    def result(self, verbose=False):
+        vobs = [self._patterns.counts(self._pattern_length - i) for i in range(3)]
+        return Serial._serial_result(vobs, self._length, self._pattern_length, verbose)
+
+
+class ApproximateEntropyAccumulator(StreamAccumulator):
+
+    def __init__(self, pattern_length=10, patterns=None):
+        """
+        :param      pattern_length:     the length of the pattern (m)
+        :param      patterns:           A PatternHistogram fed by the caller and shared with other accumulators, None
+                                        to keep one of its own
+        """
+        StreamAccumulator.__init__(self)
+        self._pattern_length = pattern_length
+        self._own_patterns = patterns is None
+        self._patterns = PatternHistogram(pattern_length + 1) if patterns is None else patterns
+
+    def _update(self, bits):
+        if self._own_patterns:
+            self._patterns.update(bits)
+
+    def result(self, verbose=False):
+        vobs = [self._patterns.counts(self._pattern_length), self._patterns.counts(self._pattern_length + 1)]
+        return ApproximateEntropy._approximate_entropy_result(vobs, self._length, self._pattern_length, verbose)
+
+
+class StreamRunner:
+
+    # The tests with a streaming mode, in the order of the battery
+    TESTS = ['monobit', 'block_frequency', 'runs', 'longest_run', 'matrix_rank', 'non_overlapping', 'overlapping',
+             'serial', 'approximate_entropy']
+
+    # The accumulator of each test. The keyword arguments of a test are those of its accumulator, except the length
+    # and the shared pattern histogram (see INJECTED), which the runner passes itself.
+    ACCUMULATORS = {
+        'monobit': MonobitAccumulator,
+        'block_frequency': BlockFrequencyAccumulator,
+        'runs': RunsAccumulator,
+        'longest_run': LongestRunAccumulator,
+        'matrix_rank': MatrixRankAccumulator,
+        'non_overlapping': NonOverlappingAccumulator,
+        'overlapping': OverlappingAccumulator,
+        'serial': SerialAccumulator,
+        'approximate_entropy': ApproximateEntropyAccumulator,
+    }
+    INJECTED = ('length', 'patterns')
+
+    def __init__(self, tests=None, length=None, ascii=False, chunk_bytes=CHUNK_BYTES, parameters=None):
+        """
+        Run tests over a sequence read a chunk at a time from a file, a pipe or a generator. Each test keeps only
+        its sufficient statistic and the bits of the blocks or windows that span two chunks, so the memory used does
+        not depend on the length of the sequence and the results are those of the test functions on the whole
+        sequence.
+
+        :param      tests:              Names of the tests to run (see TESTS), defaults to all of them
+        :param      length:             Number of bits to test, the rest of the input is ignored. Required by the
+                                        Non-overlapping Template Matching test, whose block size depends on it.
+        :param      ascii:              True when the input is ASCII '0'/'1' text, False for raw bytes
+        :param      chunk_bytes:        Number of bytes read from a file or pipe at a time
+        :param      parameters:         dict from test name to the keyword arguments of the test, named as for the
+                                        test function (e.g. {'serial': {'pattern_length': 10}})
+        """
+        if tests is None:
+            tests = StreamRunner.TESTS
+        unknown = set(tests) - set(StreamRunner.TESTS)
+        if len(unknown) > 0:
+            raise ValueError('No streaming mode for the tests: %s' % ', '.join(sorted(unknown)))
+        parameters = {} if parameters is None else parameters
+        if 'non_overlapping' in tests and length is None:
+            raise ValueError('The Non-overlapping Template Matching test needs the length of the sequence.')
+
+        self._length = length
+        self._ascii = ascii
+        self._chunk_bytes = chunk_bytes
+        self._consumed = 0
+        # The time spent by each test on the chunks, in seconds
+        self.timings = dict((test, 0.0) for test in tests)
+
+        # Serial and Approximate Entropy share one histogram of the longest pattern either needs
+        self._patterns = None
+        if 'serial' in tests and 'approximate_entropy' in tests:
+            self._patterns = PatternHistogram(max(parameters.get('serial', {}).get('pattern_length', 16),
+                                                  parameters.get('approximate_entropy', {}).get('pattern_length',
+                                                                                                10) + 1))
+
+        injected = {
+            'non_overlapping': {'length': length},
+            'serial': {'patterns': self._patterns},
+            'approximate_entropy': {'patterns': self._patterns},
+        }
+        self._accumulators = [(test, StreamRunner.ACCUMULATORS[test](**injected.get(test, {}),
+                                                                     **parameters.get(test, {})))
+                              for test in tests]
+
+    def __len__(self):
+        """
+        The number of bits fed to the tests so far
+        """
+        return self._consumed
+
+    def update(self, data):
+        """
+        Feed the next chunk of the sequence to every test.
+
+        :param      data:               bytes-like (raw bytes, or ASCII text when the runner was created with
+                                        ascii=True), str of '0'/'1', BitSequence or array of 0/1 values
+        """
+        if isinstance(data, (BitSequence, str, np.ndarray, list, tuple)):
+            bits = BitSequence.adapt(data).unpacked()
+        elif self._ascii:
+            bits = Tools.ascii_to_bits(data).unpacked()
+        else:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+        if self._length is not None:
+            bits = bits[:max(self._length - self._consumed, 0)]
+        self._consumed += len(bits)
+        if len(bits) == 0:
+            return
+
+        if self._patterns is not None:
+            # The shared histogram is timed with the Serial test
+            start = time.perf_counter()
+            self._patterns.update(bits)
+            self.timings['serial'] += time.perf_counter() - start
+        for test, accumulator in self._accumulators:
+            start = time.perf_counter()
+            accumulator.update(bits)
+            self.timings[test] += time.perf_counter() - start
+
+    def run(self, source, verbose=False):
+        """
+        Feed a whole source to the tests and return their results.
+
+        :param      source:             Path of a file, binary file object or pipe (anything with read()), or an
+                                        iterable of chunks accepted by update()
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    dict from test name to the result of the test
+        """
+        if isinstance(source, str):
+            with open(source, 'rb') as handle:
+                return self.run(handle, verbose)
+
+        if hasattr(source, 'read'):
+            while self._length is None or self._consumed < self._length:
+                data = source.read(self._chunk_bytes)
+                if not data:
+                    break
+                self.update(data)
+        else:
+            for data in source:
+                self.update(data)
+                if self._length is not None and self._consumed >= self._length:
+                    break
+
+        return self.results(verbose)
+
+    def results(self, verbose=False):
+        """
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    dict from test name to the result of the test on the bits fed so far
+        """
+        if self._length is not None and self._consumed < self._length:
+            raise ValueError('The stream ended after %d of the %d bits to test.' % (self._consumed, self._length))
+        results = {}
+        for test, accumulator in self._accumulators:
+            start = time.perf_counter()
+            results[test] = accumulator.result(verbose)
+            self.timings[test] += time.perf_counter() - start
+        return results
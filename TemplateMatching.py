@@ -1,9 +1,19 @@
+from functools import lru_cache as lru_cache
 from math import floor as floor
 from numpy import array as array
+from numpy import bincount as bincount
+from numpy import bool_ as bool_
+from numpy import count_nonzero as count_nonzero
 from numpy import exp as exp
+from numpy import intp as intp
+from numpy import minimum as minimum
 from numpy import zeros as zeros
+from numpy.linalg import matrix_power as matrix_power
 from scipy.special import gammaincc as gammaincc
 from scipy.special import hyp1f1 as hyp1f1
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from TestResult import TestResult
 
 
 class TemplateMatching:
@@ -16,38 +26,68 @@ class TemplateMatching:
         For this test and for the Overlapping Template Matching test of Section 2.8, an m-bit window is used to
         search for a specific m-bit pattern. If the pattern is not found, the window slides one bit position. If the
         pattern is found, the window is reset to the bit after the found pattern, and the search resumes.
-        :param      binary_data:        The seuqnce of bit being tested
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
         :param      template_pattern:   The pattern to match to
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :param      block               The number of independent blocks. Has been fixed at 8 in the test code.
         :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
         """
-
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary = len(binary_data)
         pattern_size = len(template_pattern)
         block_size = floor(length_of_binary / block)
         pattern_counts = zeros(block)
 
+        # The m-bit word starting at each position of the sequence
+        window_codes = binary_data.windows(pattern_size)
+        template_code = int(template_pattern, 2)
+
         # For each block in the data
         for count in range(block):
-            block_start = count * block_size
-            block_end = block_start + block_size
-            block_data = binary_data[block_start:block_end]
+            block_start, block_end = TemplateMatching._block_bounds(count, block_size, pattern_size)
+            block_codes = window_codes[block_start:block_end].tolist()
             # Count the number of pattern hits
             inner_count = 0
-            while inner_count < block_size:
-                sub_block = block_data[inner_count:inner_count+pattern_size]
-                if sub_block == template_pattern:
+            while inner_count < len(block_codes):
+                if block_codes[inner_count] == template_code:
                     pattern_counts[count] += 1
                     inner_count += pattern_size
                 else:
                     inner_count += 1
 
-            # Calculate the theoretical mean and variance
-            # Mean - µ = (M-m+1)/2m
-            mean = (block_size - pattern_size + 1) / pow(2, pattern_size)
-            # Variance - σ2 = M((1/pow(2,m)) - ((2m -1)/pow(2, 2m)))
-            variance = block_size * ((1 / pow(2, pattern_size)) - (((2 * pattern_size) - 1) / (pow(2, pattern_size * 2))))
+        return TemplateMatching._non_overlapping_result(pattern_counts, block_size, pattern_size, length_of_binary,
+                                                        verbose)
+
+    @staticmethod
+    def _block_bounds(count, block_size, pattern_size):
+        """
+        :param      count:              The index of the block
+        :param      block_size:         The length M of each block
+        :param      pattern_size:       The length m of the template
+        :return:    (start, end) of the m-bit windows that lie inside the block, an empty range when M < m
+        """
+        block_start = count * block_size
+        return block_start, max(block_start + block_size - pattern_size + 1, block_start)
+
+    @staticmethod
+    def _non_overlapping_result(pattern_counts, block_size, pattern_size, length_of_binary, verbose=False):
+        """
+        Compute the Non-overlapping Template Matching test from the number of template hits in each block.
+
+        :param      pattern_counts:     The number of hits W in each of the N blocks
+        :param      block_size:         The length M of each block
+        :param      pattern_size:       The length m of the template
+        :param      length_of_binary:   The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool)     A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        block = len(pattern_counts)
+
+        # Calculate the theoretical mean and variance
+        # Mean - µ = (M-m+1)/2m
+        mean = (block_size - pattern_size + 1) / pow(2, pattern_size)
+        # Variance - σ2 = M((1/pow(2,m)) - ((2m -1)/pow(2, 2m)))
+        variance = block_size * ((1 / pow(2, pattern_size)) - (((2 * pattern_size) - 1) / (pow(2, pattern_size * 2))))
 
         # Calculate the xObs Squared statistic for these pattern matches
         xObs = 0
@@ -67,10 +107,79 @@ class TemplateMatching:
             print('\tP-Value:\t\t\t\t', p_value)
             print('DEBUG END.')
 
-        return (p_value, (p_value >= 0.01))
+        return TestResult(p_value, (p_value >= 0.01), xObs)
+
+    @staticmethod
+    def non_overlapping_sweep(binary_data:str, verbose=False, pattern_size=9, block=8):
+        """
+        Run the Non-overlapping Template Matching test for every aperiodic template of length m, as the NIST
+        reference implementation does (148 templates for m = 9).
+        An aperiodic template cannot overlap a shifted copy of itself, so two of its occurrences are always at least
+        m bits apart and the non-overlapping count of a block equals the number of m-bit windows inside the block
+        that match it. The windows of the sequence are therefore computed once and every template is counted with a
+        single bincount over (block, window) pairs.
+
+        :param      binary_data:        The seuqnce of bit being tested (BitSequence or binary string)
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :param      pattern_size:       The length m of the templates
+        :param      block:              The number of independent blocks. Has been fixed at 8 in the test code.
+        :return:    [(template, p_value, bool), ...] one entry per aperiodic template in ascending order
+        """
+        binary_data = BitSequence.adapt(binary_data)
+        length_of_binary = len(binary_data)
+        block_size = floor(length_of_binary / block)
+        number_of_codes = pow(2, pattern_size)
+        window_codes = binary_data.windows(pattern_size)
+
+        # Number of windows matching each m-bit word, for each block
+        pattern_counts = zeros((block, number_of_codes))
+        for count in range(block):
+            block_start, block_end = TemplateMatching._block_bounds(count, block_size, pattern_size)
+            block_codes = window_codes[block_start:block_end].astype(intp)
+            pattern_counts[count] = bincount(block_codes, minlength=number_of_codes)
+
+        templates = TemplateMatching.aperiodic_templates(pattern_size)
+        template_codes = array([int(template, 2) for template in templates], dtype=intp)
+
+        # Mean - µ = (M-m+1)/2m
+        mean = (block_size - pattern_size + 1) / pow(2, pattern_size)
+        # Variance - σ2 = M((1/pow(2,m)) - ((2m -1)/pow(2, 2m)))
+        variance = block_size * ((1 / pow(2, pattern_size)) - (((2 * pattern_size) - 1) / (pow(2, pattern_size * 2))))
+
+        # xObs Squared statistic and p value of every template at once
+        xObs = (((pattern_counts[:, template_codes] - mean) ** 2) / variance).sum(axis=0)
+        p_values = gammaincc((block / 2), (xObs / 2))
+
+        if verbose:
+            print('Non-Overlapping Template Sweep DEBUG BEGIN:')
+            print("\tLength of input:\t\t", length_of_binary)
+            print('\tNumber of templates:\t', len(templates))
+            print('\tValue of Mean (µ):\t\t', mean)
+            print('\tValue of Variance(σ):\t', variance)
+            print('\tRejected templates:\t\t', int((p_values < 0.01).sum()))
+            print('DEBUG END.')
+
+        return [(template, float(p_value), bool(p_value >= 0.01)) for template, p_value in zip(templates, p_values)]
+
+    @staticmethod
+    def aperiodic_templates(pattern_size):
+        """
+        List the aperiodic templates of length m, the m-bit patterns for which no proper prefix is also a suffix
+        (the pattern cannot overlap a shifted copy of itself).
+
+        :param      pattern_size:       The length m of the templates
+        :return:    List of the templates as binary strings in ascending order
+        """
+        templates = []
+        for code in range(pow(2, pattern_size)):
+            template = format(code, '0%db' % pattern_size)
+            if all(template[shift:] != template[:pattern_size - shift] for shift in range(1, pattern_size)):
+                templates.append(template)
+        return templates
 
     @staticmethod
-    def overlapping_patterns(binary_data:str, verbose=False, pattern_size=9, block_size=1032):
+    def overlapping_patterns(binary_data:str, verbose=False, pattern_size=9, block_size=1032, template_pattern=None,
+                             degrees_of_freedom=5):
         """
         Note that this description is taken from the NIST documentation [1]
         [1] http://csrc.nist.gov/publications/nistpubs/800-22-rev1a/SP800-22rev1a.pdf
@@ -80,51 +189,59 @@ class TemplateMatching:
         the window slides one bit position. The difference between this test and the test in Section 2.7 is that
         when the pattern is found, the window slides only one bit before resuming the search.
 
-        :param      binary_data:    a binary string
+        :param      binary_data:    a binary string or BitSequence
         :param      verbose         True to display the debug messgae, False to turn off debug message
         :param      pattern_size:   the length of the pattern
         :param      block_size:     the length of the block
+        :param      template_pattern: the pattern to match to, defaults to m ones. The category probabilities are
+                                    those NIST derives for the all-ones pattern, and are computed exactly for any
+                                    other pattern (see template_probabilities).
+        :param      degrees_of_freedom: K, blocks with K or more hits share the last category
         :return:    (p_value, bool) A tuple which contain the p_value and result of frequency_test(True or False)
         """
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary_data = len(binary_data)
-        pattern = ''
-        for count in range(pattern_size):
-            pattern += '1'
+        if template_pattern is None:
+            template_pattern = '1' * pattern_size
+        pattern_size = len(template_pattern)
+        template_code = int(template_pattern, 2)
 
         number_of_block = floor(length_of_binary_data / block_size)
+        pi = TemplateMatching.template_probabilities(template_pattern, block_size, degrees_of_freedom)
 
-        # λ = (M-m+1)/pow(2, m)
-        lambda_val = float(block_size - pattern_size + 1) / pow(2, pattern_size)
-        # η = λ/2
-        eta = lambda_val / 2.0
+        # Count the pattern hits of each block from the m-bit window codes, a batch of blocks at a time
+        windows_per_block = block_size - pattern_size + 1
+        blocks_per_batch = max((8 * CHUNK_BYTES) // block_size, 1)
+        pattern_counts = zeros(degrees_of_freedom + 1)
+        for first in range(0, number_of_block, blocks_per_batch):
+            last = min(first + blocks_per_batch, number_of_block)
+            window_codes = binary_data.windows(pattern_size, start=first * block_size, stop=last * block_size)
+            pattern_hits = zeros((last - first) * block_size, dtype=bool_)
+            pattern_hits[:len(window_codes)] = window_codes == template_code
+            block_hits = count_nonzero(pattern_hits.reshape(last - first, block_size)[:, :windows_per_block], axis=1)
+            pattern_counts += bincount(minimum(block_hits, degrees_of_freedom), minlength=degrees_of_freedom + 1)
 
-        pi = [TemplateMatching.get_prob(i, eta) for i in range(5)]
-        diff = float(array(pi).sum())
-        pi.append(1.0 - diff)
+        return TemplateMatching._overlapping_result(pattern_counts, pi, length_of_binary_data, verbose)
 
-        pattern_counts = zeros(6)
-        for i in range(number_of_block):
-            block_start = i * block_size
-            block_end = block_start + block_size
-            block_data = binary_data[block_start:block_end]
-            # Count the number of pattern hits
-            pattern_count = 0
-            j = 0
-            while j < block_size:
-                sub_block = block_data[j:j + pattern_size]
-                if sub_block == pattern:
-                    pattern_count += 1
-                j += 1
-            if pattern_count <= 4:
-                pattern_counts[pattern_count] += 1
-            else:
-                pattern_counts[5] += 1
+    @staticmethod
+    def _overlapping_result(pattern_counts, pi, length_of_binary_data, verbose=False):
+        """
+        Compute the Overlapping Template Matching test from the number of blocks in each category.
+
+        :param      pattern_counts:     The number of blocks with 0, 1, ..., K-1 and K or more hits
+        :param      pi:                 The probability of each category
+        :param      length_of_binary_data: The length of the sequence being tested
+        :param      verbose             True to display the debug messgae, False to turn off debug message
+        :return:    (p_value, bool) A tuple which contain the p_value and result of frequency_test(True or False)
+        """
+        number_of_block = sum(pattern_counts)
+        degrees_of_freedom = len(pattern_counts) - 1
 
         xObs = 0.0
         for i in range(len(pattern_counts)):
             xObs += pow(pattern_counts[i] - number_of_block * pi[i], 2.0) / (number_of_block * pi[i])
 
-        p_value = gammaincc(5.0 / 2.0, xObs / 2.0)
+        p_value = gammaincc(degrees_of_freedom / 2.0, xObs / 2.0)
 
         if verbose:
             print('Overlapping Template Test DEBUG BEGIN:')
@@ -134,8 +251,66 @@ class TemplateMatching:
             print('\tP-Value:\t\t\t\t', p_value)
             print('DEBUG END.')
 
+        return TestResult(p_value, (p_value >= 0.01), xObs)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def overlapping_probabilities(pattern_size, block_size, degrees_of_freedom=5):
+        """
+        The probabilities π0, ..., πK of a block having 0, 1, ..., K-1 and K or more overlapping template hits.
+        The values depend only on (m, M, K) and are cached.
+
+        :param      pattern_size:       The length m of the template
+        :param      block_size:         The length M of the block
+        :param      degrees_of_freedom: K
+        :return:    Tuple of K + 1 probabilities
+        """
+        # λ = (M-m+1)/pow(2, m)
+        lambda_val = float(block_size - pattern_size + 1) / pow(2, pattern_size)
+        # η = λ/2
+        eta = lambda_val / 2.0
+
+        pi = [TemplateMatching.get_prob(i, eta) for i in range(degrees_of_freedom)]
+        diff = float(array(pi).sum())
+        pi.append(1.0 - diff)
+        return tuple(pi)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def template_probabilities(template_pattern, block_size, degrees_of_freedom=5):
+        """
+        The probabilities π0, ..., πK of a block having 0, 1, ..., K-1 and K or more overlapping hits of the given
+        template. The all-ones template uses the probabilities of NIST (see overlapping_probabilities). For any
+        other template they depend on how the template overlaps itself and are computed exactly: the state of a
+        block is the length of the longest template prefix the bits read end with and the number of hits so far
+        (capped at K), a Markov chain whose transition matrix is raised to the power M.
+        The values depend only on (template, M, K) and are cached.
+
+        :param      template_pattern:   The template as a binary string
+        :param      block_size:         The length M of the block
+        :param      degrees_of_freedom: K
+        :return:    Tuple of K + 1 probabilities
+        """
+        pattern_size = len(template_pattern)
+        if template_pattern == '1' * pattern_size:
+            return TemplateMatching.overlapping_probabilities(pattern_size, block_size, degrees_of_freedom)
+
+        categories = degrees_of_freedom + 1
+        transitions = zeros((pattern_size * categories, pattern_size * categories))
+        for state in range(pattern_size):
+            for bit in '01':
+                read = template_pattern[:state] + bit
+                hit = int(read == template_pattern)
+                # The longest proper prefix of the template that the bits read end with
+                following = max(length for length in range(min(len(read), pattern_size - 1) + 1)
+                                if read.endswith(template_pattern[:length]))
+                for hits in range(categories):
+                    transitions[state * categories + hits,
+                                following * categories + min(hits + hit, degrees_of_freedom)] += 0.5
 
-        return (p_value, (p_value >= 0.01))
+        # Every block starts with no prefix read and no hit
+        distribution = matrix_power(transitions, block_size)[0]
+        return tuple(float(p) for p in distribution.reshape(pattern_size, categories).sum(axis=0))
 
     @staticmethod
     def get_prob(u, x):
@@ -0,0 +1,22 @@
+class TestResult(tuple):
+
+    # Not a test class, for test runners collecting the names starting with Test
+    __test__ = False
+
+    def __new__(cls, p_value, passed, statistic=None):
+        """
+        The result of a test: the tuple (p_value, bool) every test returns, which also carries the test statistic the
+        P-value is computed from (χ², V_obs, f_n, ...) as the attribute statistic. The tuple still unpacks, compares
+        and prints as (p_value, bool).
+
+        :param      p_value:            The P-value of the test
+        :param      passed:             True when the sequence passes the test
+        :param      statistic:          The test statistic, None when it does not apply
+        """
+        result = tuple.__new__(cls, (p_value, passed))
+        result.statistic = statistic
+        return result
+
+    def __getnewargs__(self):
+        # Results are pickled back from the worker processes of BatteryRunner
+        return self[0], self[1], self.statistic
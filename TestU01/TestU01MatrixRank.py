@@ -1,6 +1,9 @@
 import numpy as np
 import math
 
+from BinaryMatrix import BinaryMatrix
+from BitSequence import BitSequence
+
 def matrix_rank_test(data, rows=3, cols=3 ):
     """
     Implements the Matrix Rank Test for randomness.
@@ -23,25 +26,20 @@ def matrix_rank_test(data, rows=3, cols=3 ):
     if n < matrix_size:
         raise ValueError("Data length must be at least as large as the matrix size.")
 
-    # Split data into blocks of size `rows * cols`
+    # Split data into blocks of size `rows * cols`, each matrix row held as one integer word
     num_matrices = n // matrix_size
-    matrices = [
-        np.array(data[i * matrix_size:(i + 1) * matrix_size]).reshape(rows, cols)
-        for i in range(num_matrices)
-    ]
+    matrices = BitSequence.from_bits(data[:num_matrices * matrix_size]).words(cols).reshape(num_matrices, rows)
 
-    # Calculate ranks of each matrix
+    # Calculate the binary rank of each matrix
     full_rank = min(rows, cols)
-    rank_counts = {full_rank: 0, full_rank - 1: 0, full_rank - 2: 0}
-
-    for matrix in matrices:
-        rank = np.linalg.matrix_rank(matrix)
-        if rank in rank_counts:
-            rank_counts[rank] += 1
-
-    # Calculate probabilities for full rank, one less than full rank, and two less
-    prob_full_rank = 1 - (1 / (2 ** (rows * cols - rows - cols + 1)))
-    prob_one_less = (rows * cols - rows) / (2 ** (rows * cols - rows - cols + 1))
+    ranks = BinaryMatrix.batch_rank(matrices, cols)
+    rank_counts = {full_rank: int(np.count_nonzero(ranks == full_rank)),
+                   full_rank - 1: int(np.count_nonzero(ranks == full_rank - 1)),
+                   full_rank - 2: int(np.count_nonzero(ranks <= full_rank - 2))}
+
+    # Calculate probabilities for full rank, one less than full rank, and two or more less
+    prob_full_rank = BinaryMatrix.rank_probability(full_rank, rows, cols)
+    prob_one_less = BinaryMatrix.rank_probability(full_rank - 1, rows, cols)
     prob_two_less = 1 - prob_full_rank - prob_one_less
 
     expected_counts = [
@@ -1,7 +1,23 @@
+import numpy as np
+
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+
+# ASCII whitespace allowed between the digits of a '0'/'1' text file
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[[ord(' '), ord('\t'), ord('\n'), ord('\r'), ord('\v'), ord('\f')]] = True
+
+
 class Tools:
 
     @staticmethod
     def string_to_binary(input:str):
+        try:
+            # Every character fits in one byte, convert them all at once
+            return Tools.string_to_bits(input).to_string()
+        except ValueError:
+            pass
+
         binary = []
         for char in input:
             temp = bin(ord(char))[2:]
@@ -28,7 +44,64 @@ class Tools:
 
     @staticmethod
     def bytes_to_binary(input:bytes):
-        binary = []
-        for b in input:
-            binary.append(f'{b:08b}')
-        return ''.join(binary)
+        return Tools.bytes_to_bits(input).to_string()
+
+    @staticmethod
+    def bytes_to_bits(input, length=None):
+        """
+        Use raw bytes as a packed bit sequence (first bit of each byte most significant). The buffer is wrapped with
+        numpy.frombuffer, so bytes, bytearray, memoryview and mmap inputs are not copied.
+
+        :param      input:              bytes, bytearray, memoryview, mmap or any other buffer
+        :param      length:             Number of bits to use, defaults to every bit of the buffer
+        :return:    BitSequence
+        """
+        return BitSequence.from_bytes(input, length)
+
+    @staticmethod
+    def string_to_bits(input:str):
+        """
+        The packed bit sequence of a text, 8 bits per character, as string_to_binary produces it.
+
+        :param      input:              Text whose characters are all below U+0100
+        :return:    BitSequence
+        """
+        try:
+            encoded = input.encode('latin-1')
+        except UnicodeEncodeError:
+            raise ValueError('Only characters below U+0100 can be converted to 8 bits each.')
+        return BitSequence.from_bytes(encoded)
+
+    @staticmethod
+    def ascii_to_bits(input):
+        """
+        Convert text made of the characters '0' and '1' to a packed bit sequence, ignoring whitespace such as the
+        line breaks of the data/data.e format. The text is processed a chunk at a time with NumPy.
+
+        :param      input:              str, or bytes, bytearray, memoryview or mmap holding ASCII text
+        :return:    BitSequence
+        """
+        if isinstance(input, str):
+            input = input.encode('ascii', errors='replace')
+        raw = np.frombuffer(input, dtype=np.uint8)
+
+        packed = []
+        carry = np.zeros(0, dtype=np.uint8)
+        length = 0
+        for start in range(0, len(raw), 8 * CHUNK_BYTES):
+            chunk = raw[start:start + 8 * CHUNK_BYTES]
+            bits = chunk - np.uint8(ord('0'))
+            is_digit = bits <= 1
+            if not np.all(is_digit | WHITESPACE[chunk]):
+                raise ValueError('Binary data may only contain the characters \'0\' and \'1\'.')
+
+            # Pack whole bytes and carry the remaining bits over to the next chunk
+            bits = np.concatenate((carry, bits[is_digit]))
+            whole = len(bits) - len(bits) % 8
+            packed.append(np.packbits(bits[:whole]))
+            carry = bits[whole:]
+            length += whole
+
+        packed.append(np.packbits(carry))
+        length += len(carry)
+        return BitSequence(np.concatenate(packed), length)
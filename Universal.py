@@ -1,8 +1,15 @@
 from math import floor as floor
-from math import log as log
 from math import sqrt as sqrt
+from numpy import append as append
+from numpy import argsort as argsort
+from numpy import int64 as int64
+from numpy import intp as intp
+from numpy import log2 as log2
 from numpy import zeros as zeros
 from scipy.special import erfc as erfc
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from TestResult import TestResult
 
 class Universal:
 
@@ -17,10 +24,11 @@ class Universal:
         to be non-random. **This test is always skipped because the requirements on the lengths of the binary
         strings are too high i.e. there have not been enough trading days to meet the requirements.
 
-        :param      binary_data:    a binary string
+        :param      binary_data:    a binary string or BitSequence
         :param      verbose             True to display the debug messgae, False to turn off debug message
         :return:    (p_value, bool) A tuple which contain the p_value and result of frequency_test(True or False)
         """
+        binary_data = BitSequence.adapt(binary_data)
         length_of_binary_data = len(binary_data)
         pattern_size = 5
         if length_of_binary_data >= 387840:
@@ -46,16 +54,7 @@ class Universal:
         if length_of_binary_data >= 1059061760:
             pattern_size = 16
 
-        if 5 < pattern_size < 16:
-            # Create the biggest binary string of length pattern_size
-            ones = ""
-            for i in range(pattern_size):
-                ones += "1"
-
-            # How long the state list should be
-            num_ints = int(ones, 2)
-            vobs = zeros(num_ints + 1)
-
+        if 5 < pattern_size <= 16:
             # Keeps track of the blocks, and whether were are initializing or summing
             num_blocks = floor(length_of_binary_data / pattern_size)
             # Q = 10 * pow(2, pattern_size)
@@ -70,25 +69,11 @@ class Universal:
                         10.170032, 11.168765, 12.168070, 13.167693, 14.167488, 15.167379]
             sigma = c * sqrt(variance[pattern_size] / test_bits)
 
-            cumsum = 0.0
             # Examine each of the K blocks in the test segment and determine the number of blocks since the
             # last occurrence of the same L-bit block (i.e., i – Tj). Replace the value in the table with the
             # location of the current block (i.e., Tj= i). Add the calculated distance between re-occurrences of
             # the same L-bit block to an accumulating log2 sum of all the differences detected in the K blocks
-            for i in range(num_blocks):
-                block_start = i * pattern_size
-                block_end = block_start + pattern_size
-                block_data = binary_data[block_start: block_end]
-                # Work out what state we are in
-                int_rep = int(block_data, 2)
-
-                # Initialize the state list
-                if i < init_bits:
-                    vobs[int_rep] = i + 1
-                else:
-                    initial = vobs[int_rep]
-                    vobs[int_rep] = i + 1
-                    cumsum += log(i - initial + 1, 2)
+            cumsum = Universal._log_distance_sum(binary_data, pattern_size, num_blocks, init_bits)
 
             # Compute the statistic
             phi = float(cumsum / test_bits)
@@ -106,6 +91,47 @@ class Universal:
                 print('\tP-Value:\t\t\t\t', p_value)
                 print('DEBUG END.')
 
-            return (p_value, (p_value>=0.01))
+            return TestResult(p_value, (p_value>=0.01), phi)
         else:
-            return (-1.0, False)
\ No newline at end of file
+            return (-1.0, False)
+
+    @staticmethod
+    def _log_distance_sum(binary_data, pattern_size, num_blocks, init_bits):
+        """
+        Sum of log2(i - Tj) over the blocks of the test segment, where Tj is the (1-based) position of the previous
+        occurrence of the same L-bit block, or 0 if the block has not occurred before.
+        The blocks are processed a chunk at a time. Within a chunk they are stably sorted by value so that the
+        previous occurrence of each block is either its predecessor in the sorted order or, for the first block of
+        each value, the entry of an int64 last-seen table carried over from the earlier chunks.
+
+        :param      binary_data:        The BitSequence being tested
+        :param      pattern_size:       The length L of the blocks
+        :param      num_blocks:         The number of blocks Q + K
+        :param      init_bits:          The number of blocks Q in the initialization segment
+        :return:    The accumulated sum
+        """
+        last_seen = zeros(pow(2, pattern_size), dtype=int64)
+        blocks_per_chunk = max((8 * CHUNK_BYTES) // pattern_size, 1)
+        cumsum = 0.0
+        for first in range(0, num_blocks, blocks_per_chunk):
+            count = min(blocks_per_chunk, num_blocks - first)
+            block_codes = binary_data.words(pattern_size, count, first).astype(intp)
+
+            order = argsort(block_codes, kind='stable')
+            sorted_codes = block_codes[order]
+            positions = order + (first + 1)
+
+            # Position of the previous occurrence of each block, in sorted order
+            previous = last_seen[sorted_codes]
+            same_code = sorted_codes[1:] == sorted_codes[:-1]
+            previous[1:][same_code] = positions[:-1][same_code]
+
+            # Only the blocks of the test segment contribute to the sum
+            in_test = positions > init_bits
+            cumsum += float(log2(positions[in_test] - previous[in_test]).sum())
+
+            # The last block of each value becomes the new entry of the table
+            last_of_code = append(~same_code, True)
+            last_seen[sorted_codes[last_of_code]] = positions[last_of_code]
+
+        return cumsum
@@ -0,0 +1,358 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import scipy
+
+from BatteryRunner import BatteryRunner
+from BitFile import BitFile
+from BitSequence import BitSequence
+from nist_cli import records
+
+from diehardtest.Diehard3DSphere import Diehard3DSphereTest
+from diehardtest.DiehardBinaryRank32x32 import Diehard32x32BinaryRank
+from diehardtest.DiehardBinaryRank6x8 import Diehard6x8BinaryRank
+from diehardtest.DiehardBirthdaySpacings import DiehardBirthdaySpacings
+from diehardtest.DiehardBitstream import DiehardBitstream
+from diehardtest.DiehardCount1Byte import DiehardCountOnesByte
+from diehardtest.DiehardCount1Stream import DiehardCountOnes
+from diehardtest.DiehardCraps import DiehardCraps
+from diehardtest.DiehardDNA import DiehardDNATest
+from diehardtest.DiehardMinimumDistance import DiehardMinimumDistance
+from diehardtest.DiehardOPSO import DiehardOPSOTest
+from diehardtest.DiehardOQSO import DiehardOQSOTest
+from diehardtest.DiehardOperm5 import DiehardOPERM5
+from diehardtest.DiehardOverlappingSums import DiehardOverlappingSums
+from diehardtest.DiehardParkingLot import DiehardParkingLotTest
+from diehardtest.DiehardRuns import DiehardRuns
+from diehardtest.DiehardSqueeze import DiehardSqueezeTest
+from TestU01 import TestU01_Runs, TestU01AutoCorrelation, TestU01BirthdaySpacing, TestU01Collision
+from TestU01 import TestU01CouponCollector, TestU01Gap, TestU01LinearComplexity, TestU01LoongestRun
+from TestU01 import TestU01MatrixRank, TestU01Serial, TestU01SimplePoker
+
+# The P-values of SP 800-22 Appendix B for the first 1,000,000 bits of each constant. The Random Excursions value is
+# the one of state x = +1 and the Random Excursions Variant value the one of state x = -1. The second Serial P-value
+# of pi, sqrt(2) and sqrt(3) could not be corroborated and is left out (None).
+KNOWN_ANSWERS = {
+    'e': {
+        'monobit': 0.953749, 'block_frequency': 0.211072, 'cumulative_sums': [0.669887, 0.724266],
+        'runs': 0.561917, 'longest_run': 0.718945, 'matrix_rank': 0.306156, 'spectral': 0.847187,
+        'non_overlapping': 0.078790, 'overlapping': 0.110434, 'universal': 0.282568,
+        'approximate_entropy': 0.700073, 'random_excursions': 0.786868, 'random_excursions_variant': 0.826009,
+        'linear_complexity': 0.826335, 'serial': [0.766182, 0.462921],
+    },
+    'pi': {
+        'monobit': 0.578211, 'block_frequency': 0.380615, 'cumulative_sums': [0.628308, 0.663369],
+        'runs': 0.419268, 'longest_run': 0.024390, 'matrix_rank': 0.083553, 'spectral': 0.010186,
+        'non_overlapping': 0.165757, 'overlapping': 0.296897, 'universal': 0.669012,
+        'approximate_entropy': 0.361595, 'random_excursions': 0.844143, 'random_excursions_variant': 0.760966,
+        'linear_complexity': 0.255475, 'serial': [0.143005, None],
+    },
+    'sqrt2': {
+        'monobit': 0.811881, 'block_frequency': 0.833222, 'cumulative_sums': [0.879009, 0.957206],
+        'runs': 0.313427, 'longest_run': 0.012117, 'matrix_rank': 0.823810, 'spectral': 0.581909,
+        'non_overlapping': 0.569461, 'overlapping': 0.791982, 'universal': 0.130805,
+        'approximate_entropy': 0.884740, 'random_excursions': 0.216235, 'random_excursions_variant': 0.566118,
+        'linear_complexity': 0.317127, 'serial': [0.861925, None],
+    },
+    'sqrt3': {
+        'monobit': 0.610051, 'block_frequency': 0.473961, 'cumulative_sums': [0.917121, 0.689519],
+        'runs': 0.261123, 'longest_run': 0.446726, 'matrix_rank': 0.314498, 'spectral': 0.776046,
+        'non_overlapping': 0.532235, 'overlapping': 0.082716, 'universal': 0.165981,
+        'approximate_entropy': 0.180481, 'random_excursions': 0.783283, 'random_excursions_variant': 0.155066,
+        'linear_complexity': 0.346469, 'serial': [0.157500, None],
+    },
+}
+
+# The states whose P-value Appendix B gives for the random excursions tests
+KNOWN_STATES = {'random_excursions': '+1', 'random_excursions_variant': '-1.0'}
+
+# The Diehard tests take the data as bytes, the TestU01 tests as a string of '0' and '1'
+DIEHARD_TESTS = {
+    'birthday_spacings': DiehardBirthdaySpacings.run_test,
+    'overlapping_sums': DiehardOverlappingSums.run_test,
+    'runs': DiehardRuns.run_test,
+    'craps': DiehardCraps.run_test,
+    'binary_rank_32x32': Diehard32x32BinaryRank.run_test,
+    'binary_rank_6x8': Diehard6x8BinaryRank.run_test,
+    'bitstream': DiehardBitstream.run_test,
+    'minimum_distance': DiehardMinimumDistance.run_test,
+    'count_ones_stream': DiehardCountOnes.run_test,
+    'count_ones_byte': DiehardCountOnesByte.run_test,
+    'parking_lot': DiehardParkingLotTest.run_test,
+    'operm5': DiehardOPERM5.run_test,
+    'sphere_3d': Diehard3DSphereTest.run_test,
+    'squeeze': DiehardSqueezeTest.run_test,
+    'opso': DiehardOPSOTest.run_test,
+    'oqso': DiehardOQSOTest.run_test,
+    'dna': DiehardDNATest.run_test,
+}
+
+TESTU01_TESTS = {
+    'runs': TestU01_Runs.runs_test,
+    'auto_correlation': TestU01AutoCorrelation.auto_correlation_test,
+    'birthday_spacing': TestU01BirthdaySpacing.birthday_spacing_test,
+    'collision': TestU01Collision.collision_test,
+    'coupon_collector': TestU01CouponCollector.coupon_collector_test,
+    'gap': TestU01Gap.gap_test,
+    'linear_complexity': TestU01LinearComplexity.linear_complexity_test,
+    'longest_run': TestU01LoongestRun.longest_run_test,
+    'matrix_rank': TestU01MatrixRank.matrix_rank_test,
+    'serial': TestU01Serial.serial_test,
+    'simple_poker': TestU01SimplePoker.simp_poker_test,
+}
+
+SUITES = {
+    'nist': BatteryRunner.TESTS,
+    'diehard': DIEHARD_TESTS,
+    'testu01': TESTU01_TESTS,
+}
+
+# Where the results are stored, and the results later runs are compared with
+RESULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result')
+BASELINE = os.path.join(RESULT_DIRECTORY, 'benchmark_baseline.json')
+
+
+def check_known_answers(tolerance=1e-6):
+    """
+    Run the NIST tests on the first 1,000,000 bits of data/data.e, data.pi, data.sqrt2 and data.sqrt3 and compare the
+    P-values with the known answers.
+
+    :param      tolerance:          Largest difference accepted, the known answers have six decimals
+    :return:    List of dict (constant, test, item, expected, p_value, passed), with an entry for every P-value the
+                tests return, expected being None where no known answer is recorded
+    """
+    answers = []
+    for constant, expected in KNOWN_ANSWERS.items():
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'data.' + constant)
+        with BitFile(path) as data:
+            results = BatteryRunner(1).run(data.window(0, 1000000))
+
+        for name in BatteryRunner.ORDER:
+            rows = records(name, results[name], None)
+            known = expected[name] if isinstance(expected[name], list) else [expected[name]]
+            if name in KNOWN_STATES:
+                known = [known[0] if row['item'] == KNOWN_STATES[name] else None for row in rows]
+            for row, answer in zip(rows, known + [None] * (len(rows) - len(known))):
+                passed = None
+                if answer is not None:
+                    passed = row['p_value'] is not None and abs(row['p_value'] - answer) <= tolerance
+                answers.append({'constant': constant, 'test': name, 'item': row['item'], 'expected': answer,
+                                'p_value': row['p_value'], 'passed': passed})
+    return answers
+
+
+def measure(suite, test, length, seed, connection):
+    """
+    Run one test on length random bits in a process of its own, so that the peak resident memory is the test's.
+    The result is sent back through the connection.
+
+    :param      suite:              The name of the suite (see SUITES)
+    :param      test:               The name of the test in the suite
+    :param      length:             The number of bits
+    :param      seed:               Seed of the NumPy generator of the bits
+    :param      connection:         The sending end of a multiprocessing Pipe
+    """
+    data = np.random.default_rng(seed).bytes(length // 8)
+    if suite == 'nist':
+        data = BitSequence.from_bytes(data)
+    elif suite == 'testu01':
+        data = BitSequence.from_bytes(data).to_string()
+
+    start = time.perf_counter()
+    try:
+        result = SUITES[suite][test](data)
+        status = 'ok'
+    except Exception as e:
+        result = None
+        status = 'error: %s' % e
+    seconds = time.perf_counter() - start
+
+    if result is None:
+        values = None
+    elif suite == 'nist':
+        values = [row['p_value'] for row in records(test, result, seconds)]
+    else:
+        values = [number(result[0])]
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    connection.send({'suite': suite, 'test': test, 'bits': length, 'status': status, 'seconds': seconds,
+                     'bits_per_second': length / seconds if seconds > 0 else None, 'peak_rss_mb': peak,
+                     'values': values})
+    connection.close()
+
+
+def benchmark(sizes, suites=('nist', 'diehard', 'testu01'), tests=None, timeout=600.0, seed=2018):
+    """
+    Time every test of the suites at every size. Each test runs in a new process on the same random data for a
+    given size and seed. A test that crashes or runs longer than the timeout is not run at the larger sizes, a test
+    that raises an error is, since most errors come from too short an input.
+
+    :param      sizes:              The numbers of bits to test
+    :param      suites:             Names of the suites (see SUITES)
+    :param      tests:              Names of the tests to run in each suite, defaults to all of them
+    :param      timeout:            Seconds a test may run before it is stopped
+    :param      seed:               Seed of the NumPy generator of the data
+    :return:    List of dict (suite, test, bits, status, seconds, bits_per_second, peak_rss_mb, values)
+    """
+    measurements = []
+    for suite in suites:
+        for test in SUITES[suite]:
+            if tests is not None and test not in tests:
+                continue
+            for length in sorted(sizes):
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=measure, args=(suite, test, length, seed, sender))
+                process.start()
+                sender.close()
+                measurement = {'suite': suite, 'test': test, 'bits': length, 'status': 'timeout', 'seconds': None,
+                               'bits_per_second': None, 'peak_rss_mb': None, 'values': None}
+                if receiver.poll(timeout):
+                    try:
+                        measurement = receiver.recv()
+                    except EOFError:
+                        # The process ended without a result (killed for lack of memory, for instance)
+                        measurement['status'] = 'crashed'
+                else:
+                    process.terminate()
+                process.join()
+                measurements.append(measurement)
+                print('%-8s %-26s %10d bits  %s' % (suite, test, length, describe(measurement)), file=sys.stderr)
+                if measurement['status'] in ('timeout', 'crashed'):
+                    break
+    return measurements
+
+
+def describe(measurement):
+    if measurement['status'] != 'ok':
+        return measurement['status']
+    return '%9.3f s  %12.0f bits/s  %8.1f MB' % (measurement['seconds'], measurement['bits_per_second'],
+                                                 measurement['peak_rss_mb'])
+
+
+def compare(report, baseline, slowdown=1.5, tolerance=1e-9, noise=0.05):
+    """
+    Compare a report with an earlier one run on the same data. The run times are only compared when both reports
+    were made on the same machine, the results always are.
+
+    :param      report:             The report of this run
+    :param      baseline:           The report it is compared with
+    :param      slowdown:           Ratio of run times above which a test is reported as slower
+    :param      tolerance:          Largest relative difference accepted between the results of a test
+    :param      noise:              Seconds of difference always accepted, so that tests taking a few milliseconds
+                                    are not reported for timer noise
+    :return:    List of regression messages, empty when nothing regressed
+    """
+    regressions = ['%s known answer %s %s: expected %s, got %s' % (answer['constant'], answer['test'],
+                                                                    answer['item'] or '', answer['expected'],
+                                                                    answer['p_value'])
+                   for answer in report['known_answers'] if answer['passed'] is False]
+
+    timed = baseline.get('machine') == report.get('machine')
+    if not timed and len(baseline.get('benchmark', [])) > 0:
+        print('The baseline was made on another machine (%s), the run times are not compared' %
+              baseline.get('machine'), file=sys.stderr)
+
+    earlier = dict(((item['suite'], item['test'], item['bits']), item) for item in baseline.get('benchmark', []))
+    for item in report['benchmark']:
+        before = earlier.get((item['suite'], item['test'], item['bits']))
+        if before is None or before['status'] != 'ok':
+            continue
+        name = '%s %s at %d bits' % (item['suite'], item['test'], item['bits'])
+        if item['status'] != 'ok':
+            regressions.append('%s: %s' % (name, item['status']))
+            continue
+        if timed and item['seconds'] > max(slowdown * before['seconds'], before['seconds'] + noise):
+            regressions.append('%s: %.3f s, was %.3f s' % (name, item['seconds'], before['seconds']))
+        if baseline.get('seed') == report.get('seed') and not same_values(item['values'], before['values'],
+                                                                           tolerance):
+            regressions.append('%s: results %s, were %s' % (name, item['values'], before['values']))
+    return regressions
+
+
+def number(value):
+    """
+    :return:    The value as a float, None when it is not a number
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def same_values(values, expected, tolerance):
+    if values is None or expected is None or len(values) != len(expected):
+        return values == expected
+    for value, answer in zip(values, expected):
+        if (value is None) != (answer is None):
+            return False
+        if value is not None and abs(value - answer) > tolerance * max(abs(value), abs(answer), 1e-300):
+            return False
+    return True
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmark the NIST, Diehard and TestU01 tests and check the NIST '
+                                                 'P-values of e, pi, sqrt(2) and sqrt(3) against SP 800-22 '
+                                                 'Appendix B.')
+    parser.add_argument('--sizes', default='100000,1000000,10000000,100000000',
+                        help='comma separated numbers of bits to test (default: 10^5 to 10^8)')
+    parser.add_argument('--suites', default='nist,diehard,testu01', help='comma separated suites to run')
+    parser.add_argument('--tests', help='comma separated names of the tests to run, all by default')
+    parser.add_argument('--timeout', type=float, default=600.0, help='seconds a test may run (default: 600)')
+    parser.add_argument('--seed', type=int, default=2018, help='seed of the random test data')
+    parser.add_argument('--known-answers-only', action='store_true', help='only check the known answers')
+    parser.add_argument('--baseline', default=BASELINE, help='report to compare with (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='store this report as the baseline')
+    parser.add_argument('--slowdown', type=float, default=1.5,
+                        help='ratio of run times reported as a regression (default: 1.5)')
+    options = parser.parse_args(arguments)
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': os.cpu_count(),
+                    'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__},
+        'seed': options.seed,
+        'known_answers': check_known_answers(),
+        'benchmark': [],
+    }
+    failed = [answer for answer in report['known_answers'] if answer['passed'] is False]
+    print('Known answers: %d checked, %d failed' %
+          (sum(1 for answer in report['known_answers'] if answer['passed'] is not None), len(failed)), file=sys.stderr)
+
+    if not options.known_answers_only:
+        report['benchmark'] = benchmark([int(size) for size in options.sizes.split(',')],
+                                        options.suites.split(','),
+                                        None if options.tests is None else options.tests.split(','),
+                                        options.timeout, options.seed)
+
+    os.makedirs(RESULT_DIRECTORY, exist_ok=True)
+    path = os.path.join(RESULT_DIRECTORY, time.strftime('benchmark_%Y%m%d_%H%M%S.json'))
+    with open(path, 'w') as output:
+        json.dump(report, output, indent=2)
+    print('Report written to', path, file=sys.stderr)
+
+    # Without a baseline only the known answers are checked
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as handle:
+            baseline = json.load(handle)
+    regressions = compare(report, baseline, options.slowdown)
+    for regression in regressions:
+        print('REGRESSION', regression, file=sys.stderr)
+
+    if options.save_baseline:
+        with open(options.baseline, 'w') as output:
+            json.dump(report, output, indent=2)
+        print('Baseline written to', options.baseline, file=sys.stderr)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
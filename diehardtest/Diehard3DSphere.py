@@ -1,15 +1,19 @@
 import numpy as np
 from scipy.stats import expon, kstest
 
+from diehardtest.DiehardInput import DiehardInput
+from diehardtest.DiehardNearestPair import DiehardNearestPair
+
 class Diehard3DSphereTest:
     @staticmethod
-    def run_test(data, num_points=4000, num_trials=20):
+    def run_test(data, num_points=4000, num_trials=20, processes=None):
         """
         Runs the Diehard 3D Sphere Test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param num_points: Number of points to generate per trial (default: 4000).
         :param num_trials: Number of trials to run (default: 20).
+        :param processes: Number of worker processes the trials are spread over, None to run in-process.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -21,18 +25,9 @@ class Diehard3DSphereTest:
             if len(numerical_data) < total_values_needed:
                 raise ValueError(f"Insufficient data: {len(numerical_data)} values provided, but {total_values_needed} needed.")
 
-            radii = []
-
-            # Perform trials
-            for trial in range(num_trials):
-                start_idx = trial * num_points * 3
-                end_idx = (trial + 1) * num_points * 3
-                points = numerical_data[start_idx:end_idx]
-                points = np.array(points).reshape(-1, 3)
-
-                # Calculate minimum radius for spheres touching the nearest neighbor
-                radius = Diehard3DSphereTest._calculate_min_radius(points)
-                radii.append(radius)
+            # Calculate minimum radius for spheres touching the nearest neighbor in each trial
+            radii = [distance / 2 for distance in
+                     DiehardNearestPair.trial_distances(numerical_data, num_points, 3, num_trials, processes)]
 
             # Fit radii to exponential distribution and calculate p-value using KS test
             scale = np.mean(radii)  # Theoretical scale parameter for exponential distribution
@@ -51,44 +46,17 @@ class Diehard3DSphereTest:
     @staticmethod
     def _prepare_numerical_data(data):
         """
-        Converts input data into a list of floats in the range [0, 1).
+        Converts input data into an array of floats in the range [0, 1), one per byte.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of floats in [0, 1).
+        :param data: Input data (see DiehardInput).
+        :return: Array of floats in [0, 1).
         """
         try:
-            if isinstance(data, str):
-                numerical_data = [ord(char) / 256 for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                numerical_data = [byte / 256 for byte in data]
-            elif isinstance(data, list):
-                numerical_data = [num / 256 for num in data]
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+            numerical_data = DiehardInput.adapt(data).bytes / 256
             return numerical_data
         except Exception as e:
             raise ValueError(f"Error preparing numerical data: {e}")
 
-    @staticmethod
-    def _calculate_min_radius(points):
-        """
-        Calculates the minimum radius of spheres touching the nearest neighbor in a 3D space.
-
-        :param points: Array of points with shape (num_points, 3).
-        :return: Minimum radius.
-        """
-        from scipy.spatial import distance
-
-        # Compute pairwise distances and ignore self-distances
-        dist_matrix = distance.cdist(points, points, 'euclidean')
-        np.fill_diagonal(dist_matrix, np.inf)
-
-        # Find the minimum distance for each point (to its nearest neighbor)
-        min_distances = np.min(dist_matrix, axis=1)
-
-        # Return the minimum radius (half of the minimum distance)
-        return np.min(min_distances) / 2
-
 # Example usage
 if __name__ == "__main__":
     # Generate random test data
@@ -1,13 +1,16 @@
 import numpy as np
 from scipy.stats import chisquare
 
+from BinaryMatrix import BinaryMatrix
+from diehardtest.DiehardInput import DiehardInput
+
 class Diehard32x32BinaryRank:
     @staticmethod
     def run_test(data):
         """
         Runs the Diehard 32x32 Binary Rank test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -39,61 +42,34 @@ class Diehard32x32BinaryRank:
         """
         Converts the input data into a list of 32x32 binary matrices.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of 32x32 numpy matrices.
+        :param data: Input data (see DiehardInput).
+        :return: Array of shape (number of matrices, 32) with the rows of each matrix as 32-bit words.
         """
-        # if isinstance(data, str):
-        #     binary_data = ''.join(f"{ord(char):08b}" for char in data)
-
-        if isinstance(data, str):
-            if data.endswith(".txt"):
-                # Read text file content
-                with open(data, "r") as file:
-                    content = file.read()
-                binary_data = ''.join(f"{ord(char):08b}" for char in content)
-            else:
-                # Assume input is a binary string
-                binary_data = ''.join(f"{ord(char):08b}" for char in data)
-        elif isinstance(data, (bytes, bytearray)):
-            binary_data = ''.join(f"{byte:08b}" for byte in data)
-        elif isinstance(data, list):
-            binary_data = ''.join(f"{num:08b}" for num in data)
-        else:
-            raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+        data = DiehardInput.adapt(data)
 
         # Ensure enough data for at least one 32x32 matrix
-        if len(binary_data) < 32 * 32:
+        if len(data) < 32 * 32:
             raise ValueError("Insufficient data length. At least 1024 bits are required.")
 
-        # Split binary data into 32x32 matrices
-        matrices = []
-        for i in range(0, len(binary_data) - 1024 + 1, 1024):
-            matrix_data = binary_data[i:i + 1024]
-            matrix = np.array([list(map(int, matrix_data[j:j + 32])) for j in range(0, 1024, 32)], dtype=int)
-            matrices.append(matrix)
+        # Split the word stream into 32x32 matrices, each row held as one 32-bit word
+        num_matrices = len(data) // 1024
+        matrices = data.words[:num_matrices * 32].reshape(num_matrices, 32)
 
         return matrices
 
     @staticmethod
     def _calculate_rank_counts(matrices):
         """
-        Calculates the rank counts for a list of 32x32 matrices.
+        Calculates the rank counts for a batch of 32x32 matrices.
 
-        :param matrices: List of 32x32 numpy matrices.
+        :param matrices: Array of shape (number of matrices, 32) with the rows of each matrix as 32-bit words.
         :return: List of counts [full_rank, rank_31, rank_30_or_less].
         """
-        full_rank = 0
-        rank_31 = 0
-        rank_30_or_less = 0
-
-        for matrix in matrices:
-            rank = np.linalg.matrix_rank(matrix)
-            if rank == 32:
-                full_rank += 1
-            elif rank == 31:
-                rank_31 += 1
-            else:
-                rank_30_or_less += 1
+        ranks = BinaryMatrix.batch_rank(matrices, 32)
+
+        full_rank = int(np.count_nonzero(ranks == 32))
+        rank_31 = int(np.count_nonzero(ranks == 31))
+        rank_30_or_less = int(np.count_nonzero(ranks <= 30))
 
         return [full_rank, rank_31, rank_30_or_less]
 
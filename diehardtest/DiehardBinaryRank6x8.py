@@ -1,13 +1,16 @@
 import numpy as np
 from scipy.stats import chisquare
 
+from BinaryMatrix import BinaryMatrix
+from diehardtest.DiehardInput import DiehardInput
+
 class Diehard6x8BinaryRank:
     @staticmethod
     def run_test(data):
         """
         Runs the Diehard 6x8 Binary Rank test on the provided data.
 
-        :param data: Input data as binary string, bytes, list of integers, or file path.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -17,12 +20,14 @@ class Diehard6x8BinaryRank:
             # Perform rank calculations
             rank_counts = Diehard6x8BinaryRank._calculate_rank_counts(matrices)
 
-            # Expected proportions for 6x8 binary rank test
+            # Expected proportions for 6x8 binary rank test (ranks over GF(2))
             total_matrices = len(matrices)
+            full_rank = BinaryMatrix.rank_probability(6, 6, 8)
+            rank_5 = BinaryMatrix.rank_probability(5, 6, 8)
             expected_counts = [
-                total_matrices * 0.00171,  # Full rank (6)
-                total_matrices * 0.146,    # Rank 5
-                total_matrices * 0.85229   # Rank <= 4
+                total_matrices * full_rank,                   # Full rank (6), 0.773118
+                total_matrices * rank_5,                      # Rank 5, 0.217439
+                total_matrices * (1.0 - full_rank - rank_5)   # Rank <= 4, 0.009443
             ]
 
             # Perform chi-square test
@@ -39,58 +44,34 @@ class Diehard6x8BinaryRank:
         """
         Converts the input data into a list of 6x8 binary matrices.
 
-        :param data: Input data as binary string, bytes, list of integers, or file path.
-        :return: List of 6x8 numpy matrices.
+        :param data: Input data (see DiehardInput).
+        :return: Array of shape (number of matrices, 6) with the rows of each matrix as 8-bit words.
         """
-        if isinstance(data, str):
-            if data.endswith(".txt"):
-                # Read text file content
-                with open(data, "r") as file:
-                    content = file.read()
-                binary_data = ''.join(f"{ord(char):08b}" for char in content)
-            else:
-                # Assume input is a binary string
-                binary_data = ''.join(f"{ord(char):08b}" for char in data)
-        elif isinstance(data, (bytes, bytearray)):
-            binary_data = ''.join(f"{byte:08b}" for byte in data)
-        elif isinstance(data, list):
-            binary_data = ''.join(f"{num:08b}" for num in data)
-        else:
-            raise ValueError("Unsupported data type. Provide binary string, bytes, list of integers, or file path.")
+        data = DiehardInput.adapt(data)
 
         # Ensure enough data for at least one 6x8 matrix
-        if len(binary_data) < 6 * 8:
+        if len(data) < 6 * 8:
             raise ValueError("Insufficient data length. At least 48 bits are required.")
 
-        # Split binary data into 6x8 matrices
-        matrices = []
-        for i in range(0, len(binary_data) - 48 + 1, 48):
-            matrix_data = binary_data[i:i + 48]
-            matrix = np.array([list(map(int, matrix_data[j:j + 8])) for j in range(0, 48, 8)], dtype=int)
-            matrices.append(matrix)
+        # Split the byte stream into 6x8 matrices, each row held as one byte
+        num_matrices = len(data) // 48
+        matrices = data.bytes[:num_matrices * 6].reshape(num_matrices, 6)
 
         return matrices
 
     @staticmethod
     def _calculate_rank_counts(matrices):
         """
-        Calculates the rank counts for a list of 6x8 matrices.
+        Calculates the rank counts for a batch of 6x8 matrices.
 
-        :param matrices: List of 6x8 numpy matrices.
+        :param matrices: Array of shape (number of matrices, 6) with the rows of each matrix as 8-bit words.
         :return: List of counts [full_rank, rank_5, rank_4_or_less].
         """
-        full_rank = 0
-        rank_5 = 0
-        rank_4_or_less = 0
-
-        for matrix in matrices:
-            rank = np.linalg.matrix_rank(matrix)
-            if rank == 6:
-                full_rank += 1
-            elif rank == 5:
-                rank_5 += 1
-            else:
-                rank_4_or_less += 1
+        ranks = BinaryMatrix.batch_rank(matrices, 8)
+
+        full_rank = int(np.count_nonzero(ranks == 6))
+        rank_5 = int(np.count_nonzero(ranks == 5))
+        rank_4_or_less = int(np.count_nonzero(ranks <= 4))
 
         return [full_rank, rank_5, rank_4_or_less]
 
@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.stats import chisquare
 
+from diehardtest.DiehardInput import DiehardInput
+
 
 class DiehardBirthdaySpacings:
     @staticmethod
@@ -8,7 +10,7 @@ class DiehardBirthdaySpacings:
         """
         Runs the Birthday Spacings Test on the provided data.
 
-        :param data: Binary data string to be tested
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput
         :param num_bins: Number of bins for chi-square calculation
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random"
         """
@@ -38,23 +40,19 @@ class DiehardBirthdaySpacings:
     @staticmethod
     def _binary_to_numbers(data):
         """
-        Converts binary string to a list of normalized float numbers (0 to 1).
+        Converts the input data to an array of normalized float numbers (0 to 1), one per 32-bit word.
 
-        :param data: Binary data string
-        :return: List of floats between 0 and 1
+        :param data: Input data (see DiehardInput)
+        :return: Array of floats between 0 and 1
         """
-        if not data:
+        data = DiehardInput.adapt(data)
+        if len(data) == 0:
             raise ValueError("No data provided for testing.")
 
         if len(data) % 32 != 0:
             raise ValueError("Binary data length must be a multiple of 32.")
 
-        # Split binary data into 32-bit chunks
-        chunks = [data[i:i + 32] for i in range(0, len(data), 32)]
-
-        # Convert each chunk to an integer and normalize to range [0, 1)
-        numbers = [int(chunk, 2) / (2**32) for chunk in chunks]
-        return numbers
+        return data.uniforms
 
 
 
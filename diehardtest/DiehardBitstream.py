@@ -1,49 +1,44 @@
 import numpy as np
-from scipy.stats import chi2
+
+from diehardtest.DiehardInput import DiehardInput
+from diehardtest.DiehardSparseOccupancy import DiehardSparseOccupancy
 
 class DiehardBitstream:
+    # Standard deviation of the number of missing 20-bit words among 2^21 overlapping words of the stream
+    SIGMA = 428
+
     @staticmethod
-    def run_test(data, bit_length=20, samples=1000000):
+    def run_test(data, num_words=DiehardSparseOccupancy.NUM_WORDS, repetitions=20):
         """
         Runs the Diehard Bitstream test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :param bit_length: Length of the bit blocks to analyze (default: 20).
-        :param samples: Number of bit blocks to test (default: 1,000,000).
+        The input is a stream of bits. A 20-bit word starts at every bit, so num_words + 19 bits give num_words
+        overlapping words, and the number of the 2^20 possible words that never appear is compared with its normal
+        distribution (mean 141909, sigma 428 for 2^21 words). Each repetition uses its own part of the stream and
+        the p-values of the repetitions are combined with a Kolmogorov-Smirnov test of uniformity.
+
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
+        :param num_words: Number of overlapping 20-bit words in each repetition (default: 2^21 = 2,097,152).
+        :param repetitions: Number of repetitions (default: 20). It is reduced to the number the input can supply,
+                            and a shorter input gives a single repetition of fewer words.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
-            # Convert input data to a binary string
-            binary_data = DiehardBitstream._prepare_binary_data(data)
-
-            # Adjust samples if insufficient data is available
-            max_samples = len(binary_data) // bit_length
-            if samples > max_samples:
-                samples = max_samples
-
-            if samples == 0:
-                raise ValueError("Insufficient data length to perform the test.")
-
-            # Extract bit blocks and count occurrences
-            counts = np.zeros(2**bit_length, dtype=float)
-            for i in range(samples):
-                start = i * bit_length
-                end = start + bit_length
-                bit_block = binary_data[start:end]
-                block_index = int(bit_block, 2)
-                counts[block_index] += 1
-
-            # Expected counts for uniform distribution
-            expected = np.full(2**bit_length, samples / (2**bit_length))
+            data = DiehardInput.adapt(data)
 
-            # Calculate chi-square statistic
-            chi_square = np.sum(((counts - expected) ** 2) / expected)
+            # Every repetition needs 19 more bits than it has words
+            num_words, repetitions, bits_needed = DiehardSparseOccupancy.plan(len(data), num_words, 19,
+                                                                              repetitions, "bits")
 
-            # Degrees of freedom
-            ndof = (2**bit_length) - 1
+            mean, deviation = DiehardSparseOccupancy.expected_missing(num_words, DiehardBitstream.SIGMA)
+            p_values = []
+            for repetition in range(repetitions):
+                # Rolling 20-bit codes of the packed stream, marked in an array of the 2^20 words
+                codes = DiehardSparseOccupancy.stream_codes(data, repetition * bits_needed, num_words)
+                missing = DiehardSparseOccupancy.missing_words(codes)
+                p_values.append(DiehardSparseOccupancy.p_value(missing, mean, deviation))
 
-            # Calculate p-value
-            p_value = chi2.sf(chi_square, ndof)
+            p_value = DiehardSparseOccupancy.combine(p_values)
 
             # Determine result based on p-value
             result = "Random" if p_value > 0.01 else "Non-Random"
@@ -51,26 +46,6 @@ class DiehardBitstream:
         except Exception as e:
             raise ValueError(f"Error in Bitstream Test: {e}")
 
-    @staticmethod
-    def _prepare_binary_data(data):
-        """
-        Converts input data into a binary string.
-
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: Binary string.
-        """
-        try:
-            if isinstance(data, str):
-                return ''.join(f"{ord(char):08b}" for char in data)
-            elif isinstance(data, (bytes, bytearray)):
-                return ''.join(f"{byte:08b}" for byte in data)
-            elif isinstance(data, list):
-                return ''.join(f"{num:08b}" for num in data)
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
-        except Exception as e:
-            raise ValueError(f"Error preparing binary data: {e}")
-
 # Example usage
 if __name__ == "__main__":
     # Generate random test data
@@ -2,18 +2,21 @@ import numpy as np
 from scipy.stats import chi2
 import math
 
+from BitSequence import POPCOUNT_TABLE
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardCountOnesByte:
     @staticmethod
     def run_test(data, samples=1000000):
         """
         Runs the Diehard Count the 1s (byte) test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param samples: Number of bytes to test (default: 1,000,000).
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
-            # Convert input data to a list of bytes
+            # Convert input data to an array of bytes
             byte_data = DiehardCountOnesByte._prepare_byte_data(data)
 
             # Adjust samples if insufficient data is available
@@ -24,10 +27,7 @@ class DiehardCountOnesByte:
                 raise ValueError("Insufficient data length to perform the test.")
 
             # Count the number of 1s in each byte
-            counts = np.zeros(9, dtype=float)  # Bytes have 0 to 8 ones
-            for i in range(samples):
-                ones_count = bin(byte_data[i]).count('1')
-                counts[ones_count] += 1
+            counts = np.bincount(POPCOUNT_TABLE[byte_data[:samples]], minlength=9).astype(float)  # Bytes have 0 to 8 ones
 
             # Expected counts for uniform distribution of 1s in bytes
             expected = [samples * (math.comb(8, k) / 256) for k in range(9)]
@@ -50,20 +50,13 @@ class DiehardCountOnesByte:
     @staticmethod
     def _prepare_byte_data(data):
         """
-        Converts input data into a list of bytes.
+        Converts input data into an array of bytes.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of integers (each representing a byte).
+        :param data: Input data (see DiehardInput).
+        :return: uint8 array (each element representing a byte).
         """
         try:
-            if isinstance(data, str):
-                return [ord(char) for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                return list(data)
-            elif isinstance(data, list):
-                return data
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+            return DiehardInput.adapt(data).bytes
         except Exception as e:
             raise ValueError(f"Error preparing byte data: {e}")
 
@@ -2,19 +2,21 @@ import numpy as np
 from scipy.stats import chi2
 import math
 
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardCountOnes:
     @staticmethod
     def run_test(data, block_size=8, samples=1000000):
         """
         Runs the Diehard Count the 1s (stream) test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param block_size: Size of each block in bits (default: 8).
         :param samples: Number of blocks to test (default: 1,000,000).
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
-            # Convert input data to a binary string
+            # Convert input data to a packed bit sequence
             binary_data = DiehardCountOnes._prepare_binary_data(data)
 
             # Adjust samples if insufficient data is available
@@ -26,13 +28,8 @@ class DiehardCountOnes:
                 raise ValueError("Insufficient data length to perform the test.")
 
             # Count the number of 1s in each block
-            counts = np.zeros(block_size + 1, dtype=float)
-            for i in range(samples):
-                start = i * block_size
-                end = start + block_size
-                bit_block = binary_data[start:end]
-                ones_count = bit_block.count('1')
-                counts[ones_count] += 1
+            ones_counts = binary_data.block_ones(block_size, samples)
+            counts = np.bincount(ones_counts, minlength=block_size + 1).astype(float)
 
             # Expected counts for uniform distribution of 1s in blocks
             expected = [samples * (math.comb(block_size, k) / (2 ** block_size)) for k in range(block_size + 1)]
@@ -55,20 +52,13 @@ class DiehardCountOnes:
     @staticmethod
     def _prepare_binary_data(data):
         """
-        Converts input data into a binary string.
+        Converts input data into a packed bit sequence.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: Binary string.
+        :param data: Input data (see DiehardInput).
+        :return: BitSequence.
         """
         try:
-            if isinstance(data, str):
-                return ''.join(f"{ord(char):08b}" for char in data)
-            elif isinstance(data, (bytes, bytearray)):
-                return ''.join(f"{byte:08b}" for byte in data)
-            elif isinstance(data, list):
-                return ''.join(f"{num:08b}" for num in data)
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+            return DiehardInput.adapt(data).sequence
         except Exception as e:
             raise ValueError(f"Error preparing binary data: {e}")
 
@@ -1,13 +1,15 @@
 import numpy as np
 from scipy.stats import chisquare
 
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardCraps:
     @staticmethod
     def run_test(data):
         """
         Runs the Diehard Craps test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -77,19 +79,12 @@ class DiehardCraps:
     @staticmethod
     def _prepare_data(data):
         """
-        Prepares data by converting it to a list of integers.
+        Prepares data by converting it to a list of integers, one per byte.
 
-        :param data: Input data as binary string, bytes, or list.
+        :param data: Input data (see DiehardInput).
         :return: List of integers.
         """
-        if isinstance(data, str):
-            return [ord(char) for char in data]
-        elif isinstance(data, (bytes, bytearray)):
-            return list(data)
-        elif isinstance(data, list):
-            return data
-        else:
-            raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+        return DiehardInput.adapt(data).bytes.tolist()
 
 
 
@@ -0,0 +1,166 @@
+import mmap
+import os
+import numpy as np
+
+from BitFile import BitFile
+from BitSequence import BitSequence
+from Tools import Tools
+from Tools import WHITESPACE
+
+
+class DiehardInput:
+    def __init__(self, data, length=None):
+        """
+        The input of the Diehard tests decoded once into a stream of 32-bit words, first bit most significant.
+        The words, the bytes and the packed bits are views of one buffer, so a battery run decodes its input a single
+        time and every test reads the form it needs from it.
+
+        :param data: Input data as one of:
+                     - str of '0'/'1' characters (whitespace ignored): one bit per character
+                     - path of a data file (str or os.PathLike), raw bytes or ASCII '0'/'1' text (see BitFile)
+                     - any other str: 8 bits per character, as Tools.string_to_binary converts it
+                     - bytes, bytearray, memoryview, mmap or a NumPy uint8/int8 array: 8 bits per byte
+                     - NumPy array of wider integers: one 32-bit word per element
+                     - list or tuple of integers: one byte per value when every value is below 256, one 32-bit
+                       word per value otherwise
+                     - BitSequence or BitFile
+        :param length: Number of bits to use, defaults to every bit of the input.
+        """
+        sequence = DiehardInput._decode(data, length)
+        if length is None or length > len(sequence):
+            length = len(sequence)
+        packed = sequence.packed[:(length + 7) // 8]
+
+        if length % 32 == 0:
+            # Whole words, share the buffer of the input
+            buffer = packed
+        else:
+            # Pad to a whole word with zero bits
+            buffer = np.zeros(-(-length // 32) * 4, dtype=np.uint8)
+            buffer[:len(packed)] = packed
+            if length % 8:
+                buffer[length // 8] &= np.uint8((0xFF << (8 - length % 8)) & 0xFF)
+
+        self._buffer = buffer
+        self._length = length
+        self._uniforms = None
+
+    @staticmethod
+    def adapt(data):
+        """
+        Return the input as a DiehardInput. Every Diehard test calls this on its input, so the tests accept the raw
+        data as well as an input already decoded for the whole battery.
+
+        :param data: DiehardInput or any input accepted by DiehardInput().
+        :return: DiehardInput.
+        """
+        if isinstance(data, DiehardInput):
+            return data
+        return DiehardInput(data)
+
+    @staticmethod
+    def _decode(data, length=None):
+        """
+        Converts input data into a BitSequence.
+
+        :param data: Input data (see DiehardInput()).
+        :param length: Number of bits used, only that many are read from a file.
+        :return: BitSequence.
+        """
+        if isinstance(data, BitSequence):
+            return data
+        elif isinstance(data, BitFile):
+            return data.window(0, len(data) if length is None else length)
+        elif isinstance(data, os.PathLike):
+            return DiehardInput._read_file(os.fspath(data), length)
+        elif isinstance(data, str):
+            raw = np.frombuffer(data.encode('latin-1', errors='replace'), dtype=np.uint8)
+            if np.all((raw - np.uint8(ord('0')) <= 1) | WHITESPACE[raw]):
+                return Tools.ascii_to_bits(raw)
+            elif os.path.isfile(data):
+                return DiehardInput._read_file(data, length)
+            return Tools.string_to_bits(data)
+        elif isinstance(data, (bytes, bytearray, memoryview, mmap.mmap)):
+            return BitSequence.from_bytes(data)
+        elif isinstance(data, np.ndarray):
+            if data.dtype.kind not in 'iub':
+                raise ValueError("Unsupported array type %s. Provide an array of integers." % data.dtype)
+            if data.dtype.itemsize == 1:
+                return BitSequence(data.view(np.uint8))
+            return DiehardInput._values_to_bits(data)
+        elif isinstance(data, (list, tuple)):
+            values = np.asarray(data, dtype=np.int64)
+            if len(values) > 0 and values.max() > 255:
+                return DiehardInput._values_to_bits(values)
+            return DiehardInput._values_to_bits(values, np.uint8)
+        else:
+            raise ValueError("Unsupported data type. Provide binary string, bytes, list of integers, or file path.")
+
+    @staticmethod
+    def _read_file(path, length=None):
+        """
+        :param path: Path of a data file, raw bytes or ASCII '0'/'1' text.
+        :param length: Number of bits to read, defaults to the whole file.
+        :return: BitSequence holding a copy of the bits read.
+        """
+        with BitFile(path) as file:
+            bits = file.window(0, len(file) if length is None else length)
+            return BitSequence(bits.packed.copy(), len(bits))
+
+    @staticmethod
+    def _values_to_bits(values, dtype=np.uint32):
+        """
+        :param values: Array of integers.
+        :param dtype: The unsigned type each value is stored as, np.uint8 or np.uint32.
+        :return: BitSequence of the values, first bit of each value most significant.
+        """
+        values = np.asarray(values).ravel()
+        if len(values) > 0 and (values.min() < 0 or values.max() > np.iinfo(dtype).max):
+            raise ValueError(f"Values must be between 0 and {np.iinfo(dtype).max}.")
+        return BitSequence(values.astype(np.dtype(dtype).newbyteorder('>')).view(np.uint8))
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return 'DiehardInput(length=%d)' % self._length
+
+    @property
+    def words(self):
+        """
+        The 32-bit words of the input as a big-endian uint32 array ('>u4', a view of the buffer). The last word is
+        padded with zero bits when the length is not a multiple of 32.
+        """
+        return self._buffer.view('>u4')
+
+    @property
+    def bytes(self):
+        """
+        The bytes of the input as a uint8 array (a view of the buffer). The last byte is padded with zero bits when
+        the length is not a multiple of 8.
+        """
+        return self._buffer[:(self._length + 7) // 8]
+
+    @property
+    def sequence(self):
+        """
+        The input as a BitSequence over the buffer.
+        """
+        return BitSequence(self._buffer, self._length)
+
+    @property
+    def uniforms(self):
+        """
+        The words as float64 numbers in [0, 1), word / 2^32. Computed on first use and kept.
+        """
+        if self._uniforms is None:
+            self._uniforms = self.words / 2.0 ** 32
+        return self._uniforms
+
+    def bits(self, start=0, stop=None):
+        """
+        :param start: First bit to unpack.
+        :param stop: One past the last bit to unpack, defaults to the end of the input.
+        :return: uint8 array with one 0/1 element per bit.
+        """
+        return self.sequence.unpacked(start, stop)
@@ -1,15 +1,19 @@
 import numpy as np
 from scipy.stats import chi2
 
+from diehardtest.DiehardInput import DiehardInput
+from diehardtest.DiehardNearestPair import DiehardNearestPair
+
 class DiehardMinimumDistance:
     @staticmethod
-    def run_test(data, num_points=10000, num_trials=100):
+    def run_test(data, num_points=10000, num_trials=100, processes=None):
         """
         Runs the Diehard Minimum Distance (2D Circle) Test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param num_points: Number of points to generate per trial (default: 10,000).
         :param num_trials: Number of trials to run (default: 100).
+        :param processes: Number of worker processes the trials are spread over, None to run in-process.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -25,18 +29,8 @@ class DiehardMinimumDistance:
             if num_trials == 0:
                 raise ValueError(f"Insufficient data: {len(numerical_data)} values provided, but at least {num_points * 2} needed.")
 
-            min_distances = []
-
-            # Perform trials
-            for trial in range(num_trials):
-                start_idx = trial * num_points * 2
-                end_idx = (trial + 1) * num_points * 2
-                points = numerical_data[start_idx:end_idx]
-                points = np.array(points).reshape(-1, 2)
-
-                # Calculate the minimum distance for this trial
-                min_distance = DiehardMinimumDistance._calculate_min_distance(points)
-                min_distances.append(min_distance)
+            # Calculate the minimum distance of each trial
+            min_distances = DiehardNearestPair.trial_distances(numerical_data, num_points, 2, num_trials, processes)
 
             # Compute the chi-square statistic based on the distances
             bins = np.linspace(0, np.sqrt(2), 11)  # 10 bins require 11 edges
@@ -63,40 +57,17 @@ class DiehardMinimumDistance:
     @staticmethod
     def _prepare_numerical_data(data):
         """
-        Converts input data into a list of floats in the range [0, 1).
+        Converts input data into an array of floats in the range [0, 1), one per byte.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of floats in [0, 1).
+        :param data: Input data (see DiehardInput).
+        :return: Array of floats in [0, 1).
         """
         try:
-            if isinstance(data, str):
-                numerical_data = [ord(char) / 256 for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                numerical_data = [byte / 256 for byte in data]
-            elif isinstance(data, list):
-                numerical_data = [num / 256 for num in data]
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
-
+            numerical_data = DiehardInput.adapt(data).bytes / 256
             return numerical_data
         except Exception as e:
             raise ValueError(f"Error preparing numerical data: {e}")
 
-    @staticmethod
-    def _calculate_min_distance(points):
-        """
-        Calculates the minimum distance between points in a 2D space.
-
-        :param points: Array of points with shape (num_points, 2).
-        :return: Minimum distance between any two points.
-        """
-        from scipy.spatial import distance
-
-        # Compute pairwise distances and return the minimum distance
-        dist_matrix = distance.cdist(points, points, 'euclidean')
-        np.fill_diagonal(dist_matrix, np.inf)  # Ignore self-distances
-        return np.min(dist_matrix)
-
 # Example usage
 if __name__ == "__main__":
     # Generate random test data
@@ -0,0 +1,42 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+class DiehardNearestPair:
+    @staticmethod
+    def min_distance(points):
+        """
+        The smallest distance between two of the points. Each point is looked up in a k-d tree for its nearest other
+        point, which takes O(n log n) time and O(n) memory instead of the n x n matrix of every pairwise distance.
+
+        :param points: Array of points with shape (num_points, dimensions).
+        :return: Minimum distance between any two points.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) < 2:
+            raise ValueError("At least two points are needed.")
+        # The nearest point of each point is the point itself, the second nearest its nearest neighbour
+        distances, _ = cKDTree(points).query(points, k=2)
+        return distances[:, 1].min()
+
+    @staticmethod
+    def trial_distances(values, num_points, dimensions, num_trials, processes=None):
+        """
+        The minimum distance of each trial. Trial t takes its num_points points from the values
+        t * num_points * dimensions onwards, one coordinate per value.
+
+        :param values: Array of coordinates, at least num_trials * num_points * dimensions of them.
+        :param num_points: Number of points in each trial.
+        :param dimensions: Number of coordinates of each point.
+        :param num_trials: Number of trials.
+        :param processes: Number of worker processes the trials are spread over, None to run in-process.
+        :return: List of the minimum distance of each trial.
+        """
+        trials = np.asarray(values[:num_trials * num_points * dimensions]).reshape(num_trials, num_points, dimensions)
+
+        if processes is not None and processes > 1 and num_trials > 1:
+            chunk_size = -(-num_trials // (4 * processes))
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                return list(executor.map(DiehardNearestPair.min_distance, trials, chunksize=chunk_size))
+        return [DiehardNearestPair.min_distance(points) for points in trials]
@@ -1,20 +1,21 @@
 import numpy as np
 from scipy.stats import chi2
 
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardOPERM5:
     @staticmethod
     def run_test(data, samples=1000000, overlap=True):
         """
         Runs the Diehard OPERM5 test on the provided data.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param samples: Number of 5-permutation samples to use (default: 1,000,000).
         :param overlap: Whether to use overlapping samples (default: True).
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
-            # Convert input to numerical format if necessary
-            data  = list(map(int, data))
+            # Convert input to numerical format
             numerical_data = DiehardOPERM5._prepare_data(data)
 
             # Ensure enough data for the required samples
@@ -74,19 +75,12 @@ class DiehardOPERM5:
     @staticmethod
     def _prepare_data(data):
         """
-        Converts input data into a list of integers.
+        Converts input data into a list of integers, one per byte.
 
-        :param data: Input data as binary string, bytes, or list.
+        :param data: Input data (see DiehardInput).
         :return: List of integers.
         """
-        if isinstance(data, str):
-            return [ord(char) for char in data]
-        elif isinstance(data, (bytes, bytearray)):
-            return list(data)
-        elif isinstance(data, list):
-            return data
-        else:
-            raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+        return DiehardInput.adapt(data).bytes.tolist()
 
 # Example usage
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ import numpy as np
 from scipy.stats import chisquare
 from itertools import permutations
 
+from diehardtest.DiehardInput import DiehardInput
+
 
 class OverlappingPermutationsTest:
     @staticmethod
@@ -9,12 +11,12 @@ class OverlappingPermutationsTest:
         """
         Runs the Overlapping Permutations Test on the provided data.
 
-        :param data: Binary data string to be tested
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput
         :param pattern_length: Length of the permutation patterns to analyze
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random"
         """
         try:
-            # Convert binary string to a list of normalized numbers
+            # Convert the input to a list of normalized numbers
             numbers = OverlappingPermutationsTest._binary_to_numbers(data)
 
             # Generate all possible permutations of the given pattern length
@@ -51,23 +53,19 @@ class OverlappingPermutationsTest:
     @staticmethod
     def _binary_to_numbers(data):
         """
-        Converts binary string to a list of normalized float numbers (0 to 1).
+        Converts the input data to a list of normalized float numbers (0 to 1), one per 32-bit word.
 
-        :param data: Binary data string
+        :param data: Input data (see DiehardInput)
         :return: List of floats between 0 and 1
         """
-        if not data:
+        data = DiehardInput.adapt(data)
+        if len(data) == 0:
             raise ValueError("No data provided for testing.")
 
         if len(data) % 32 != 0:
             raise ValueError("Binary data length must be a multiple of 32.")
 
-        # Split binary data into 32-bit chunks
-        chunks = [data[i:i + 32] for i in range(0, len(data), 32)]
-
-        # Convert each chunk to an integer and normalize to range [0, 1)
-        numbers = [int(chunk, 2) / (2**32) for chunk in chunks]
-        return numbers
+        return data.uniforms.tolist()
 
     @staticmethod
     def _count_permutations(numbers, pattern_length, all_permutations):
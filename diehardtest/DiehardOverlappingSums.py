@@ -1,5 +1,7 @@
 import numpy as np
 
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardOverlappingSums:
     @staticmethod
     def run_test(data, n=10000, shift=256):
@@ -7,7 +9,7 @@ class DiehardOverlappingSums:
         Implements the Diehard Overlapping Sums test.
 
         Parameters:
-        - data: list, numpy array, or string of binary/character data to be tested.
+        - data: binary string, bytes, list of integers, file path, or DiehardInput; each byte is one integer.
         - n: int, the number of sums to calculate (default: 10000).
         - shift: int, the number of integers to sum in each overlapping window (default: 256).
 
@@ -15,23 +17,15 @@ class DiehardOverlappingSums:
         - A dictionary containing the test statistic and p-value.
         """
         try:
-            # Convert data to a numeric format if necessary
-            if isinstance(data, str):
-                data = [ord(char) for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                data = list(data)
-
-            data = np.array(data, dtype=int)
+            # Convert data to a numeric format
+            data = DiehardInput.adapt(data).bytes.astype(int)
 
             if len(data) < n + shift:
                 raise ValueError("Insufficient data length. Ensure len(data) >= n + shift.")
 
-            sums = []
-
-            # Compute the sums for overlapping windows
-            for i in range(n):
-                current_sum = sum(data[i:i + shift])
-                sums.append(current_sum)
+            # Compute the sums for overlapping windows as differences of the running total
+            running = np.concatenate(([0], np.cumsum(data[:n + shift])))
+            sums = running[shift:n + shift] - running[:n]
 
             # Normalize the sums
             sums = np.array(sums, dtype=float)
@@ -1,16 +1,27 @@
 import numpy as np
-from scipy.stats import norm
+from scipy.stats import kstest, norm
+
+from diehardtest.DiehardInput import DiehardInput
 
 class DiehardParkingLotTest:
     @staticmethod
-    def run_test(data, num_attempts=12000, square_size=100, circle_radius=1):
+    def run_test(data, num_attempts=12000, square_size=100, circle_radius=1, repetitions=10, verbose=False):
         """
         Runs the Diehard Parking Lot Test.
- 
-        :param data: Input data as binary string, bytes, or list of integers.
+
+        Cars are parked one after the other at random positions in the square; an attempt crashes when its centre is
+        closer than circle_radius to an already parked car in both coordinates, the rule of the original Diehard
+        program for which the mean 3523 and sigma 21.9 of the number of parked cars hold. Each coordinate is one
+        32-bit word of the input.
+
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param num_attempts: Number of attempts to park circles (default: 12,000).
         :param square_size: Size of the square (default: 100x100).
         :param circle_radius: Radius of each circle to park (default: 1).
+        :param repetitions: Number of repetitions on consecutive parts of the input (default: 10). It is reduced to
+                            the number the input can supply, the p-values of several repetitions are combined with a
+                            Kolmogorov-Smirnov test of uniformity.
+        :param verbose: True to print the number of cars parked in each repetition and the p-value.
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
@@ -18,31 +29,28 @@ class DiehardParkingLotTest:
             numerical_data = DiehardParkingLotTest._prepare_numerical_data(data)
 
             # Ensure enough data for the required number of attempts
-            if len(numerical_data) < num_attempts * 2:
+            repetitions = min(repetitions, len(numerical_data) // (num_attempts * 2))
+            if repetitions == 0:
                 raise ValueError(f"Insufficient data: {len(numerical_data)} values provided, but {num_attempts * 2} needed.")
 
-            parked_circles = []
-            successful_parks = 0
-
-            # Perform attempts to park circles
-            for attempt in range(num_attempts):
-                x, y = numerical_data[attempt * 2] * square_size, numerical_data[attempt * 2 + 1] * square_size
-                
-                # Check for collisions with already parked circles
-                if DiehardParkingLotTest._is_valid_parking(x, y, parked_circles, circle_radius):
-                    parked_circles.append((x, y))
-                    successful_parks += 1
-
-            # Compare the number of successful parks to the expected normal distribution
             mean = 3523
             sigma = 21.9
-            z_score = (successful_parks - mean) / sigma
-            p_value = 2 * (1 - norm.cdf(abs(z_score)))
+            p_values = []
+            for repetition in range(repetitions):
+                part = numerical_data[repetition * num_attempts * 2:(repetition + 1) * num_attempts * 2] * square_size
+                successful_parks = DiehardParkingLotTest._park(part[0::2], part[1::2], square_size, circle_radius)
+
+                # Compare the number of successful parks to the expected normal distribution
+                z_score = (successful_parks - mean) / sigma
+                p_values.append(2 * (1 - norm.cdf(abs(z_score))))
+
+                if verbose:
+                    print(f"Successful Parks: {successful_parks}, Z-Score: {z_score}")
 
-            # Debugging information
-            print(f"Successful Parks: {successful_parks}")
-            print(f"Z-Score: {z_score}, Mean: {mean}, Sigma: {sigma}")
-            print(f"P-Value: {p_value}")
+            p_value = p_values[0] if repetitions == 1 else kstest(p_values, 'uniform').pvalue
+            if verbose:
+                print(f"Mean: {mean}, Sigma: {sigma}, Repetitions: {repetitions}")
+                print(f"P-Value: {p_value}")
 
             # Determine result based on p-value
             result = "Random" if p_value > 0.01 else "Non-Random"
@@ -53,40 +61,61 @@ class DiehardParkingLotTest:
             return -1, "Non-Random"
 
     @staticmethod
-    def _is_valid_parking(x, y, parked_circles, radius, epsilon=1e-6):
+    def _park(xs, ys, square_size, radius):
+        """
+        Parks the cars in turn and counts the successful parks. The square is divided into a grid of cells of side
+        radius: two parked cars are never closer than radius in both coordinates, so a cell holds at most one car and
+        an attempt is only checked against the cars of its own and the eight neighbouring cells.
+
+        :param xs: X-coordinates of the attempts.
+        :param ys: Y-coordinates of the attempts.
+        :param square_size: Size of the square.
+        :param radius: Radius of the cars.
+        :return: Number of cars parked.
+        """
+        # One empty cell on each side, so the neighbours of every cell exist
+        side = int(np.ceil(square_size / radius)) + 2
+        cells = [None] * (side * side)
+
+        cell_x = (np.asarray(xs) // radius).astype(np.int64) + 1
+        cell_y = (np.asarray(ys) // radius).astype(np.int64) + 1
+        successful_parks = 0
+        for x, y, cell in zip(np.asarray(xs).tolist(), np.asarray(ys).tolist(), (cell_x * side + cell_y).tolist()):
+            if DiehardParkingLotTest._is_valid_parking(x, y, cells, cell, side, radius):
+                cells[cell] = (x, y)
+                successful_parks += 1
+        return successful_parks
+
+    @staticmethod
+    def _is_valid_parking(x, y, cells, cell, side, radius):
         """
-        Checks if a circle can be parked at the given coordinates without overlapping others.
+        Checks if a car can be parked at the given coordinates without crashing into the cars of the neighbouring cells.
 
-        :param x: X-coordinate of the circle's center.
-        :param y: Y-coordinate of the circle's center.
-        :param parked_circles: List of coordinates of already parked circles.
-        :param radius: Radius of the circle.
-        :return: True if the circle can be parked, False otherwise.
+        :param x: X-coordinate of the car's center.
+        :param y: Y-coordinate of the car's center.
+        :param cells: Grid of the parked cars, None for an empty cell.
+        :param cell: Index of the cell of the car in the grid.
+        :param side: Number of cells along a side of the grid.
+        :param radius: Radius of the car.
+        :return: True if the car can be parked, False otherwise.
         """
-        for px, py in parked_circles:
-            distance = np.sqrt((x - px) ** 2 + (y - py) ** 2)
-            if distance < (2 * radius-epsilon):  # Overlapping if closer than diameter
-                return False
+        for row in (cell - side, cell, cell + side):
+            for parked in cells[row - 1:row + 2]:
+                if parked is not None and abs(x - parked[0]) < radius and abs(y - parked[1]) < radius:
+                    return False
         return True
 
     @staticmethod
     def _prepare_numerical_data(data):
         """
-        Converts input data into a list of floats in the range [0, 1).
+        Converts input data into an array of floats in the range [0, 1), one per 32-bit word.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of floats in [0, 1).
+        :param data: Input data (see DiehardInput).
+        :return: Array of floats in [0, 1).
         """
         try:
-            if isinstance(data, str):
-                numerical_data = [ord(char) / 256 for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                numerical_data = [byte / 256 for byte in data]
-            elif isinstance(data, list):
-                numerical_data = [num / 256 for num in data]
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
-            return numerical_data
+            data = DiehardInput.adapt(data)
+            return data.uniforms[:len(data) // 32]
         except Exception as e:
             raise ValueError(f"Error preparing numerical data: {e}")
 
@@ -94,10 +123,10 @@ class DiehardParkingLotTest:
 if __name__ == "__main__":
     # Generate random test data
     rng = np.random.default_rng(seed= 42)
-    test_data = rng.integers(0, 256, size=24000, dtype=int).tolist()  # Enough data for 12000 attempts * 2 coordinates
+    test_data = rng.integers(0, 256, size=960000, dtype=int).tolist()  # 10 repetitions of 12000 attempts * 2 coordinates of 4 bytes
 
     try:
-        p_value, result = DiehardParkingLotTest.run_test(test_data)
+        p_value, result = DiehardParkingLotTest.run_test(test_data, verbose=True)
         print(f"Parking Lot Test: P-Value = {p_value}, Result = {result}")
     except Exception as e:
         print(e)
@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.stats import norm
 
+from diehardtest.DiehardInput import DiehardInput
+
 
 class DiehardRuns:
     @staticmethod
@@ -8,11 +10,11 @@ class DiehardRuns:
         """
         Runs the Runs Test on the provided data.
 
-        :param data: Binary data string to be tested
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random"
         """
         try:
-            # Convert binary string to a list of floats (0 to 1)
+            # Convert the input to an array of floats (0 to 1)
             numbers = DiehardRuns._binary_to_numbers(data)
 
             # Perform runs test
@@ -28,47 +30,30 @@ class DiehardRuns:
     @staticmethod
     def _binary_to_numbers(data):
         """
-        Converts binary string to a list of normalized float numbers (0 to 1).
+        Converts the input data to an array of normalized float numbers (0 to 1), one per 32-bit word.
 
-        :param data: Binary data string
-        :return: List of floats between 0 and 1
+        :param data: Input data (see DiehardInput)
+        :return: Array of floats between 0 and 1
         """
-        if not data:
+        data = DiehardInput.adapt(data)
+        if len(data) == 0:
             raise ValueError("No data provided for testing.")
 
-        # if len(data) % 32 != 0:
-        #     raise ValueError("Binary data length must be a multiple of 32.")
-
-        # # Split binary data into 32-bit chunks
-        # chunks = [data[i:i + 32] for i in range(0, len(data), 32)]
-
-        # # Convert each chunk to an integer and normalize to range [0, 1)
-        # numbers = [int(chunk, 2) / (2**32) for chunk in chunks]
-        # return numbers
-
-        # Ensure the data is divided into 32-bit chunks, handle any remainder bits
-        chunk_size = 32
-        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
-
-        # Convert each chunk to an integer and normalize to range [0, 1)
-        numbers = [int(chunk.ljust(chunk_size, '0'), 2) / (2**chunk_size) for chunk in chunks]
-        return numbers
+        # The remainder bits form a last word padded with zero bits
+        return data.uniforms
 
     @staticmethod
     def _calculate_runs(numbers):
         """
         Calculates the Z-statistic and p-value for the Runs Test.
 
-        :param numbers: List of floats between 0 and 1
+        :param numbers: Array of floats between 0 and 1
         :return: Tuple (z_stat, p_value)
         """
         n = len(numbers)
-        runs = 1  # Initialize the number of runs
 
         # Count the number of runs in the data
-        for i in range(1, n):
-            if numbers[i] != numbers[i - 1]:
-                runs += 1
+        runs = 1 + int(np.count_nonzero(numbers[1:] != numbers[:-1]))
         # print("n",n)
         # Calculate the expected number of runs and its standard deviation
         expected_runs = (2 * n - 1) / 3
@@ -0,0 +1,193 @@
+import numpy as np
+from scipy.stats import kstest, norm
+
+from diehardtest.DiehardInput import DiehardInput
+
+class DiehardSparseOccupancy:
+    # Number of cells: every possible 20-bit word
+    CELLS = 1 << 20
+
+    # Number of overlapping words of the standard test, about 141909 of the cells are then expected to be missing
+    NUM_WORDS = 1 << 21
+
+    @staticmethod
+    def run(data, letter_bits, sigma, num_words=NUM_WORDS, repetitions=1, offset=0):
+        """
+        Runs a sparse occupancy test (OPSO, OQSO, DNA) on the provided data. Each 32-bit word of the input gives one
+        letter of letter_bits bits. num_words overlapping words of 20 bits are formed from consecutive letters and
+        the number of the 2^20 possible words that never appear is compared with its normal distribution.
+        Each repetition uses its own part of the input. With several repetitions, the p-values of the repetitions
+        are combined with a Kolmogorov-Smirnov test of uniformity.
+
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
+        :param letter_bits: Number of bits in each letter, 20 / letter_bits letters make a word.
+        :param sigma: Standard deviation of the number of missing words for the standard 2^21 words.
+        :param num_words: Number of overlapping words in each repetition (default: 2^21). It is reduced to the
+                          length of the input when there is not enough data for one repetition.
+        :param repetitions: Number of repetitions (default: 1). It is reduced to the number the input can supply.
+        :param offset: Position of the letter in each 32-bit word, counted in bits from the most significant.
+        :return: Tuple (p_value, p_values), the p-value of the test and the p-value of each repetition.
+        """
+        word_letters = 20 // letter_bits
+        data = DiehardInput.adapt(data)
+        words = data.words[:len(data) // 32]
+
+        # Every repetition needs word_letters - 1 more letters than it has words
+        num_words, repetitions, letters_needed = DiehardSparseOccupancy.plan(len(words), num_words, word_letters - 1,
+                                                                             repetitions, "32-bit words")
+
+        mean, deviation = DiehardSparseOccupancy.expected_missing(num_words, sigma)
+        p_values = []
+        for repetition in range(repetitions):
+            part = words[repetition * letters_needed:(repetition + 1) * letters_needed]
+            letters = DiehardSparseOccupancy.letters(part, letter_bits, offset)
+            missing = DiehardSparseOccupancy.missing_words(
+                DiehardSparseOccupancy.word_codes(letters, letter_bits, word_letters))
+            p_values.append(DiehardSparseOccupancy.p_value(missing, mean, deviation))
+
+        return DiehardSparseOccupancy.combine(p_values), p_values
+
+    @staticmethod
+    def plan(available, num_words, overlap, repetitions, unit):
+        """
+        Shares out the input between the repetitions. When the input is too short for one repetition of num_words
+        words, a single repetition uses all of it.
+
+        :param available: Number of letters (or bits) in the input.
+        :param num_words: Number of overlapping words wanted in each repetition.
+        :param overlap: Number of letters each repetition needs on top of one per word.
+        :param repetitions: Number of repetitions wanted.
+        :param unit: Name of the letters in the error message.
+        :return: Tuple (num_words, repetitions, letters used by each repetition).
+        """
+        needed = num_words + overlap
+        repetitions = min(repetitions, available // needed)
+        if repetitions == 0:
+            if available <= overlap:
+                raise ValueError(f"Insufficient data: {available} {unit} provided, "
+                                 f"but at least {overlap + 1} are needed.")
+            return available - overlap, 1, available
+        return num_words, repetitions, needed
+
+    @staticmethod
+    def p_value(missing, mean, deviation):
+        """
+        :param missing: Number of missing words.
+        :param mean: Expected number of missing words.
+        :param deviation: Standard deviation of the number of missing words.
+        :return: Two-sided p-value of the normal z-score.
+        """
+        z_score = (missing - mean) / deviation
+        return 2 * (1 - norm.cdf(abs(z_score)))
+
+    @staticmethod
+    def combine(p_values):
+        """
+        :param p_values: The p-values of the repetitions.
+        :return: The p-value of a single repetition, or the KS test of uniformity of the p-values of several.
+        """
+        if len(p_values) == 1:
+            return p_values[0]
+        return kstest(p_values, 'uniform').pvalue
+
+    @staticmethod
+    def letters(words, letter_bits, offset=0):
+        """
+        Takes one letter from each 32-bit word with a shift and a mask.
+
+        :param words: Array of 32-bit words.
+        :param letter_bits: Number of bits in each letter.
+        :param offset: Position of the letter in the word, counted in bits from the most significant.
+        :return: uint32 array of letters.
+        """
+        if not 0 <= offset <= 32 - letter_bits:
+            raise ValueError(f"The offset must be between 0 and {32 - letter_bits}.")
+        shift = np.uint32(32 - letter_bits - offset)
+        return (np.asarray(words, dtype=np.uint32) >> shift) & np.uint32((1 << letter_bits) - 1)
+
+    @staticmethod
+    def word_codes(letters, letter_bits, word_letters):
+        """
+        Forms the overlapping words of consecutive letters, the first letter most significant.
+
+        :param letters: Array of letters.
+        :param letter_bits: Number of bits in each letter.
+        :param word_letters: Number of letters in each word.
+        :return: uint32 array with the code of the word starting at each letter that has a complete word.
+        """
+        count = len(letters) - word_letters + 1
+        codes = np.zeros(max(count, 0), dtype=np.uint32)
+        for position in range(word_letters):
+            codes <<= np.uint32(letter_bits)
+            codes |= letters[position:position + count]
+        return codes
+
+    @staticmethod
+    def stream_codes(data, start, count, word_bits=20):
+        """
+        Forms the overlapping words of the bit stream itself, one word starting at every bit. The code of the word
+        at bit 8 * j + r is the 32-bit big-endian window of bytes j to j + 3 shifted right by 32 - word_bits - r,
+        so the codes are computed on the packed bytes with one shift per bit offset r.
+
+        :param data: DiehardInput.
+        :param start: Position of the first word.
+        :param count: Number of words, each one must lie inside the input.
+        :param word_bits: Number of bits in each word (1 to 25).
+        :return: uint32 array of the codes of the words starting at bits start to start + count - 1.
+        """
+        if not 0 < word_bits <= 25:
+            raise ValueError("Word size must be between 1 and 25 bits.")
+        if start < 0 or start + count + word_bits - 1 > len(data):
+            raise ValueError("The words must lie inside the input.")
+
+        first_byte = start // 8
+        last_byte = (start + count + word_bits - 1 + 7) // 8
+        packed = np.zeros(last_byte - first_byte + 3, dtype=np.uint32)
+        packed[:last_byte - first_byte] = data.bytes[first_byte:last_byte]
+
+        window_count = last_byte - first_byte
+        windows = (packed[:window_count] << np.uint32(24)) | (packed[1:window_count + 1] << np.uint32(16)) | \
+                  (packed[2:window_count + 2] << np.uint32(8)) | packed[3:window_count + 3]
+
+        mask = np.uint32((1 << word_bits) - 1)
+        codes = np.empty((window_count, 8), dtype=np.uint32)
+        for offset in range(8):
+            codes[:, offset] = (windows >> np.uint32(32 - word_bits - offset)) & mask
+
+        skip = start - 8 * first_byte
+        return codes.ravel()[skip:skip + count]
+
+    @staticmethod
+    def missing_words(codes, cells=CELLS):
+        """
+        Marks the words that appear in a boolean array of one entry per cell (1 MB for 2^20 cells) and counts the
+        cells left unmarked. Indexing the array with the codes is several times faster than setting the bits of a
+        packed 128 KB bitmap with np.bitwise_or.at.
+
+        :param codes: Array of word codes below cells.
+        :param cells: Number of possible words.
+        :return: Number of words that never appear.
+        """
+        seen = np.zeros(cells, dtype=bool)
+        seen[codes] = True
+        return cells - int(np.count_nonzero(seen))
+
+    @staticmethod
+    def expected_missing(num_words, sigma, cells=CELLS):
+        """
+        The mean and standard deviation of the number of missing words. The mean is K * exp(-N / K). The standard
+        deviation is the one of the standard test scaled by the deviation of the number of empty cells for
+        independent words, the square root of K * exp(-l) * (1 - (1 + l) * exp(-l)) with l = N / K, between N and
+        2^21 words.
+
+        :param num_words: Number of words N.
+        :param sigma: Standard deviation of the number of missing words for 2^21 words.
+        :param cells: Number of possible words K.
+        :return: Tuple (mean, standard deviation).
+        """
+        def variance(words):
+            load = words / cells
+            return cells * np.exp(-load) * (1 - (1 + load) * np.exp(-load))
+
+        scale = np.sqrt(variance(num_words) / variance(DiehardSparseOccupancy.NUM_WORDS))
+        return cells * np.exp(-num_words / cells), sigma * scale
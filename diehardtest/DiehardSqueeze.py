@@ -1,18 +1,19 @@
 import numpy as np
 from scipy.stats import chisquare
 
+from diehardtest.DiehardInput import DiehardInput
+
 class DiehardSqueezeTest:
     @staticmethod
     def run_test(data, num_trials=100000):
         """
         Runs the Diehard Squeeze Test.
 
-        :param data: Input data as binary string, bytes, or list of integers.
+        :param data: Input data as binary string, bytes, list of integers, file path, or DiehardInput.
         :param num_trials: Number of trials to perform (default: 100,000).
         :return: Tuple (p_value, result), where p_value is the calculated p-value, and result is "Random" or "Non-Random".
         """
         try:
-            data  = list(map(int, data))
             # Convert input data to numerical values in the range [0, 1)
             numerical_data = DiehardSqueezeTest._prepare_numerical_data(data)
 
@@ -55,20 +56,13 @@ class DiehardSqueezeTest:
     @staticmethod
     def _prepare_numerical_data(data):
         """
-        Converts input data into a list of floats in the range [0, 1).
+        Converts input data into an array of floats in the range [0, 1), one per byte.
 
-        :param data: Input data as binary string, bytes, or list of integers.
-        :return: List of floats in [0, 1).
+        :param data: Input data (see DiehardInput).
+        :return: Array of floats in [0, 1).
         """
         try:
-            if isinstance(data, str):
-                numerical_data = [ord(char) / 256 for char in data]
-            elif isinstance(data, (bytes, bytearray)):
-                numerical_data = [byte / 256 for byte in data]
-            elif isinstance(data, list):
-                numerical_data = [num / 256 for num in data]
-            else:
-                raise ValueError("Unsupported data type. Provide binary string, bytes, or list of integers.")
+            numerical_data = DiehardInput.adapt(data).bytes / 256
             return numerical_data
         except Exception as e:
             raise ValueError(f"Error preparing numerical data: {e}")
@@ -7,6 +7,7 @@ import tkinter as tk
 
 from GUI import CustomButton, Input, LabelTag, TestItem
 from Tools import Tools
+from diehardtest.DiehardInput import DiehardInput
 from diehardtest.DiehardBirthdaySpacings import DiehardBirthdaySpacings
 from diehardtest.DiehardOperm5 import DiehardOPERM5
 from diehardtest.DiehardBinaryRank32x32 import Diehard32x32BinaryRank
@@ -249,14 +250,8 @@ class Main(Frame):
         if not len(self.__binary_input.get_data()) == 0:
             input_data.append(self.__binary_input.get_data())
         elif not len(self.__binary_file_input.get_data()) == 0:
-            temp = []
-            if self.__file_name:
-                handle = open(self.__file_name,'rb')
-            for data in handle:
-                temp.append(data.strip().rstrip())
-            # test_data = ''.join(temp)
-            test_data = ''.join(item.decode('utf-8', errors='ignore') for item in temp)
-            input_data.append(test_data[:1000000])
+            # Raw bytes or ASCII '0'/'1' text, the first 1,000,000 bits
+            input_data.append(DiehardInput(self.__file_name, 1000000))
         elif not len(self.__string_data_file_input.get_data()) == 0:
             data = []
             count = 1
@@ -275,6 +270,8 @@ class Main(Frame):
         try:
             self._test_results = []
             for data in input_data:
+                # Decode the input once, every test reads its words, bytes or bits
+                data = DiehardInput.adapt(data)
                 results = []
                 for idx, test_item in enumerate(self._test):
                     if test_item.get_check_box_value() == 1:
@@ -0,0 +1,252 @@
+import argparse
+import ast
+import csv
+import inspect
+import json
+import math
+import sys
+import time
+
+from BatteryRunner import BatteryRunner
+from BitFile import BitFile
+from BitSequence import BitSequence
+from BitSequence import CHUNK_BYTES
+from Streaming import StreamRunner
+from Tools import Tools
+
+# Labels of the results of the tests giving more than one P-value
+ITEMS = {
+    'serial': ['p_value1', 'p_value2'],
+    'cumulative_sums': ['forward', 'backward'],
+}
+
+# The columns of the output, one row per P-value
+FIELDS = ['test', 'item', 'p_value', 'passed', 'statistic', 'seconds']
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description='Run the NIST SP 800-22 tests on a data file or on the standard input '
+                                                 'and write the results as JSON or CSV.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='data file of raw bytes or ASCII \'0\'/\'1\' text, - for the standard input (default)')
+    parser.add_argument('-t', '--tests',
+                        help='comma separated names of the tests to run, all by default: %s' %
+                             ', '.join(BatteryRunner.ORDER))
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='TEST.NAME=VALUE',
+                        help='keyword argument of a test function, e.g. serial.pattern_length=10 (repeatable)')
+    parser.add_argument('-n', '--length', type=int, help='number of bits to test, the whole input by default')
+    parser.add_argument('--offset', type=int, default=0, help='position of the first bit to test')
+    data_format = parser.add_mutually_exclusive_group()
+    data_format.add_argument('--ascii', dest='ascii', action='store_const', const=True,
+                             help='the input is ASCII \'0\'/\'1\' text (detected by default)')
+    data_format.add_argument('--raw', dest='ascii', action='store_const', const=False,
+                             help='the input is raw bytes (detected by default)')
+    parser.add_argument('-e', '--engine', choices=['parallel', 'streaming'], default='parallel',
+                        help='parallel: the tests run over a process pool on the sequence held in memory; '
+                             'streaming: the input is read a chunk at a time in bounded memory, for the tests '
+                             'with a streaming mode (%s)' % ', '.join(StreamRunner.TESTS))
+    parser.add_argument('-j', '--processes', type=int, help='worker processes of the parallel engine, one per CPU '
+                                                            'by default')
+    parser.add_argument('-f', '--format', choices=['json', 'csv'], default='json', help='output format')
+    parser.add_argument('-o', '--output', help='output file, the standard output by default')
+    options = parser.parse_args(arguments)
+
+    available = StreamRunner.TESTS if options.engine == 'streaming' else BatteryRunner.ORDER
+    options.tests = list(available) if options.tests is None else [test.strip() for test in options.tests.split(',')]
+    unknown = [test for test in options.tests if test not in available]
+    if len(unknown) > 0:
+        parser.error('unknown tests for the %s engine: %s' % (options.engine, ', '.join(unknown)))
+
+    try:
+        options.parameters = parse_parameters(options.param, options.engine)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if options.engine == 'streaming' and options.length is None and options.input == '-' and \
+            'non_overlapping' in options.tests:
+        parser.error('the streaming non_overlapping test needs --length when reading the standard input')
+    return options
+
+
+def parse_parameters(items, engine='parallel'):
+    """
+    :param      items:              List of TEST.NAME=VALUE strings
+    :param      engine:             'parallel' to check the arguments against the test functions, 'streaming' against
+                                    the accumulators of the streaming engine
+    :return:    dict from test name to the keyword arguments of the test function. A value is converted to the type
+                of the default of the argument, arguments without a default value are parsed as Python literals
+                (template patterns are always kept as strings).
+    """
+    if engine == 'streaming':
+        functions = StreamRunner.ACCUMULATORS
+        reserved = ('self',) + StreamRunner.INJECTED
+    else:
+        functions = BatteryRunner.TESTS
+        reserved = ('binary_data', 'verbose')
+
+    parameters = {}
+    for item in items:
+        key, separator, value = item.partition('=')
+        test, _, name = key.partition('.')
+        if separator == '' or name == '':
+            raise ValueError('parameter %r is not of the form TEST.NAME=VALUE' % item)
+        if test not in functions:
+            raise ValueError('unknown test for the %s engine in parameter %r' % (engine, item))
+
+        signature = inspect.signature(functions[test]).parameters
+        if name not in signature or name in reserved:
+            raise ValueError('%s has no parameter %r for the %s engine' % (test, name, engine))
+
+        default = signature[name].default
+        if isinstance(default, bool):
+            value = value.lower() in ('1', 'true', 'yes')
+        elif isinstance(default, (int, float)):
+            value = type(default)(value)
+        elif isinstance(default, str) or name.endswith('_pattern'):
+            pass
+        else:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+        parameters.setdefault(test, {})[name] = value
+    return parameters
+
+
+def read_sequence(options):
+    """
+    :return:    BitSequence of the bits to test, read whole from the data file or the standard input
+    """
+    stop = None if options.length is None else options.offset + options.length
+    if options.input != '-':
+        data = BitFile(options.input, options.ascii)
+        return data[options.offset:len(data) if stop is None else stop]
+
+    data = sys.stdin.buffer.read()
+    ascii = BitFile.is_ascii(data) if options.ascii is None else options.ascii
+    bits = Tools.ascii_to_bits(data) if ascii else BitSequence.from_bytes(data)
+    return bits[options.offset:stop]
+
+
+def stream_chunks(handle, ascii, offset):
+    """
+    Read a file or pipe a chunk at a time.
+
+    :param      handle:             Binary file object
+    :param      ascii:              True for ASCII '0'/'1' text, False for raw bytes, None to detect from the first chunk
+    :param      offset:             Number of bits to skip at the start
+    :return:    Generator of BitSequence
+    """
+    while True:
+        data = handle.read(CHUNK_BYTES)
+        if not data:
+            return
+        if ascii is None:
+            ascii = BitFile.is_ascii(data)
+        bits = Tools.ascii_to_bits(data) if ascii else BitSequence.from_bytes(data)
+        if offset > 0:
+            skipped = min(offset, len(bits))
+            bits = bits[skipped:]
+            offset -= skipped
+        yield bits
+
+
+def run_parallel(options):
+    """
+    :return:    (length, results, timings) for the sequence held in memory
+    """
+    bits = read_sequence(options)
+    runner = BatteryRunner(options.processes)
+    results = runner.run(bits, options.tests, options.parameters)
+    return len(bits), results, runner.timings
+
+
+def run_streaming(options):
+    """
+    :return:    (length, results, timings) for the input read a chunk at a time
+    """
+    length = options.length
+    if length is None and options.input != '-':
+        # The block size of the Non-overlapping Template Matching test depends on the length
+        with BitFile(options.input, options.ascii) as data:
+            length = max(len(data) - options.offset, 0)
+
+    runner = StreamRunner(options.tests, length, parameters=options.parameters)
+    if options.input == '-':
+        results = runner.run(stream_chunks(sys.stdin.buffer, options.ascii, options.offset))
+    else:
+        with open(options.input, 'rb') as handle:
+            results = runner.run(stream_chunks(handle, options.ascii, options.offset))
+    return len(runner), results, runner.timings
+
+
+def records(name, result, seconds):
+    """
+    :param      name:               The name of the test
+    :param      result:             The result the test returned
+    :param      seconds:            The run time of the test
+    :return:    List of one dict per P-value of the result (see FIELDS). The statistic is the one the test returns
+                with its P-value (see TestResult), xObs or the number of visits for the random excursions tests, and
+                None for a test that could not run on the sequence.
+    """
+    if name in ('random_excursions', 'random_excursions_variant'):
+        rows = [(item[0], item[3], item[4], item[2]) for item in result]
+    elif name in ITEMS:
+        rows = [(label, item[0], item[1], getattr(item, 'statistic', None)) for label, item in zip(ITEMS[name], result)]
+    else:
+        rows = [(None, result[0], result[1], getattr(result, 'statistic', None))]
+
+    return [dict(zip(FIELDS, (name, item, number(p_value), bool(passed), number(statistic), seconds)))
+            for item, p_value, passed, statistic in rows]
+
+
+def number(value):
+    """
+    :return:    The value as a float, None for None and NaN
+    """
+    if value is None or math.isnan(value):
+        return None
+    return float(value)
+
+
+def write_output(output, options, length, rows, seconds):
+    if options.format == 'json':
+        json.dump({'input': options.input, 'engine': options.engine, 'offset': options.offset, 'length': length,
+                   'seconds': seconds, 'results': rows}, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(arguments=None):
+    options = parse_arguments(arguments)
+
+    start = time.perf_counter()
+    try:
+        if options.engine == 'streaming':
+            length, results, timings = run_streaming(options)
+        else:
+            length, results, timings = run_parallel(options)
+    except (ValueError, OSError) as e:
+        # An unreadable input or a stream shorter than --length, reported without a traceback
+        sys.exit('nist_cli: error: %s' % e)
+    seconds = time.perf_counter() - start
+
+    rows = []
+    for name in options.tests:
+        rows.extend(records(name, results[name], timings[name]))
+
+    if options.output is None:
+        write_output(sys.stdout, options, length, rows, seconds)
+    else:
+        try:
+            with open(options.output, 'w', newline='') as output:
+                write_output(output, options, length, rows, seconds)
+        except OSError as e:
+            sys.exit('nist_cli: error: %s' % e)
+
+
+if __name__ == '__main__':
+    main()
@@ -46,7 +46,7 @@ with open(os.path.join(os.getcwd(), 'data', 'test_data.bin'), 'rb') as input_fil
    input = input_file.read()
 
 
-binary = Tools.bytes_to_binary(input)
+binary = Tools.bytes_to_bits(input)
 count = 0
 
 for test in test_function:
@@ -10,16 +10,11 @@ from Serial import Serial
 from ApproximateEntropy import ApproximateEntropy
 from CumulativeSum import CumulativeSums
 from RandomExcursions import RandomExcursions
+from BitFile import BitFile
 
 # Open Data File and read the binary data of e
 data_path = os.path.join(os.getcwd(), 'data', 'data.e')
-handle = open(data_path)
-data_list = []
-
-for line in handle:
-    data_list.append(line.strip().rstrip())
-
-binary_data = ''.join(data_list)
+binary_data = BitFile(data_path).window(0, 1000000)
 
 print('The statistical test of the Binary Expansion of e')
 print('2.01. Frequency Test:\t\t\t\t\t\t\t\t', FrequencyTest.monobit_test(binary_data[:1000000]))
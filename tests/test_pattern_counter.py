@@ -0,0 +1,24 @@
+from ApproximateEntropy import ApproximateEntropy
+from BitSequence import BitSequence
+from Serial import Serial
+from Streaming import StreamRunner
+
+
+def test_serial_on_sequence_shorter_than_pattern():
+    # The values of the string implementation, which appended the sequence to itself once
+    (p_value_01, _), (p_value_02, _) = Serial.serial_test('1011', pattern_length=5)
+    assert abs(p_value_01 - 0.4529608094869946) < 1e-12
+    assert abs(p_value_02 - 0.43347012036670896) < 1e-12
+
+
+def test_approximate_entropy_on_sequence_shorter_than_pattern():
+    p_value, passed = ApproximateEntropy.approximate_entropy_test('10110', pattern_length=5)
+    assert abs(p_value - 0.9999991900094466) < 1e-12 and passed
+
+
+def test_streaming_short_sequence_matches_test_functions():
+    bits = BitSequence.from_bits([1, 0, 1, 1, 0, 1, 1])
+    runner = StreamRunner(['serial', 'approximate_entropy'])
+    results = runner.run(iter([bits]))
+    assert results['serial'] == Serial.serial_test(bits)
+    assert results['approximate_entropy'] == ApproximateEntropy.approximate_entropy_test(bits)
@@ -0,0 +1,49 @@
+import numpy as np
+from scipy.stats import kstest
+
+from diehardtest.DiehardInput import DiehardInput
+from diehardtest.DiehardSparseOccupancy import DiehardSparseOccupancy
+
+
+def random_input(seed, num_bytes=256):
+    data = np.random.default_rng(seed).integers(0, 256, num_bytes, dtype=np.uint8).tobytes()
+    return DiehardInput(data), ''.join(format(byte, '08b') for byte in data)
+
+
+def test_word_codes_match_naive_codes():
+    # The letters of OPSO, OQSO and DNA, at the most significant bits and further in the word
+    data, bits = random_input(0)
+    words = data.words[:len(data) // 32]
+    for letter_bits, offset in ((10, 0), (5, 0), (2, 0), (10, 22), (5, 7), (2, 30)):
+        word_letters = 20 // letter_bits
+        letters = DiehardSparseOccupancy.letters(words, letter_bits, offset)
+        naive_letters = [bits[32 * i + offset:32 * i + offset + letter_bits] for i in range(len(words))]
+        assert letters.tolist() == [int(letter, 2) for letter in naive_letters]
+
+        codes = DiehardSparseOccupancy.word_codes(letters, letter_bits, word_letters)
+        naive_codes = [int(''.join(naive_letters[i:i + word_letters]), 2)
+                       for i in range(len(words) - word_letters + 1)]
+        assert codes.tolist() == naive_codes
+
+
+def test_stream_codes_match_naive_codes():
+    # Starts at every bit offset inside a byte, and words ending on the last bit of the input
+    data, bits = random_input(1, 64)
+    for word_bits in (20, 1, 25):
+        for start in (0, 1, 7, 8, 13, 100):
+            count = len(bits) - word_bits + 1 - start
+            codes = DiehardSparseOccupancy.stream_codes(data, start, count, word_bits)
+            assert codes.tolist() == [int(bits[i:i + word_bits], 2) for i in range(start, start + count)]
+
+
+def test_combine_single_and_several_p_values():
+    assert DiehardSparseOccupancy.combine([0.25]) == 0.25
+    p_values = [0.1, 0.35, 0.5, 0.8, 0.95]
+    assert DiehardSparseOccupancy.combine(p_values) == kstest(p_values, 'uniform').pvalue
+
+
+def test_missing_words_of_hand_built_codes():
+    codes = np.array([0, 3, 3, 17, 63, 17, 40, 0], dtype=np.uint32)
+    assert DiehardSparseOccupancy.missing_words(codes, cells=64) == 64 - 5
+    assert DiehardSparseOccupancy.missing_words(np.arange(64, dtype=np.uint32), cells=64) == 0
+    assert DiehardSparseOccupancy.missing_words(np.zeros(0, dtype=np.uint32), cells=64) == 64
@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+
+from ApproximateEntropy import ApproximateEntropy
+from BitSequence import BitSequence
+from FrequencyTest import FrequencyTest
+from Matrix import Matrix
+from RunTest import RunTest
+from Serial import Serial
+from Streaming import StreamRunner
+from TemplateMatching import TemplateMatching
+
+LENGTH = 50000
+
+# The test function each accumulator is compared with, run on the whole sequence
+FUNCTIONS = {
+    'monobit': FrequencyTest.monobit_test,
+    'block_frequency': FrequencyTest.block_frequency,
+    'runs': RunTest.run_test,
+    'longest_run': RunTest.longest_one_block_test,
+    'matrix_rank': Matrix.binary_matrix_rank_text,
+    'non_overlapping': TemplateMatching.non_overlapping_test,
+    'overlapping': TemplateMatching.overlapping_patterns,
+    'serial': Serial.serial_test,
+    'approximate_entropy': ApproximateEntropy.approximate_entropy_test,
+}
+
+
+def random_bytes(seed, length=LENGTH):
+    return np.random.default_rng(seed).integers(0, 256, length // 8, dtype=np.uint8).tobytes()
+
+
+def expected_results(bits):
+    return dict((test, function(bits)) for test, function in FUNCTIONS.items())
+
+
+def test_odd_bit_chunks_match_test_functions():
+    bits = BitSequence.from_bytes(random_bytes(0))
+    unpacked = bits.unpacked()
+    # Chunk sizes that never line up with the blocks, matrices or windows of the tests
+    sizes = [1, 7, 13, 127, 1031, 3, 4099, 511]
+    chunks = []
+    start = 0
+    while start < len(unpacked):
+        size = sizes[len(chunks) % len(sizes)]
+        chunks.append(unpacked[start:start + size])
+        start += size
+
+    results = StreamRunner(length=LENGTH).run(iter(chunks))
+    assert results == expected_results(bits)
+
+
+def test_three_byte_reads_match_test_functions():
+    data = random_bytes(1)
+    results = StreamRunner(length=LENGTH, chunk_bytes=3).run(io.BytesIO(data))
+    assert results == expected_results(BitSequence.from_bytes(data))
+
+
+def test_ascii_split_mid_line_matches_test_functions():
+    bits = BitSequence.from_bytes(random_bytes(2))
+    text = bits.to_string()
+    # Lines of 64 bits read 1001 bytes at a time, so every read ends inside a line
+    lines = '\n'.join(text[start:start + 64] for start in range(0, len(text), 64)) + '\n'
+    results = StreamRunner(length=LENGTH, ascii=True, chunk_bytes=1001).run(io.BytesIO(lines.encode('ascii')))
+    assert results == expected_results(bits)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from BitSequence import BitSequence
+from Streaming import OverlappingAccumulator
+from TemplateMatching import TemplateMatching
+
+
+def random_bits(seed, length=1000000):
+    rng = np.random.default_rng(seed)
+    return BitSequence.from_bytes(rng.integers(0, 256, length // 8, dtype=np.uint8).tobytes())
+
+
+def test_overlapping_probabilities_of_other_templates_sum_to_one():
+    for template in ('000000001', '101010101', '110110110'):
+        assert abs(sum(TemplateMatching.template_probabilities(template, 1032, 5)) - 1) < 1e-12
+
+
+def test_overlapping_other_template_passes_on_random_data():
+    p_values = [TemplateMatching.overlapping_patterns(random_bits(seed), template_pattern='000000001')[0]
+                for seed in range(10)]
+    assert min(p_values) > 1e-4
+    assert sum(p_value >= 0.01 for p_value in p_values) >= 9
+
+
+def test_overlapping_streaming_matches_in_memory_for_other_template():
+    bits = random_bits(1)
+    accumulator = OverlappingAccumulator(template_pattern='101010101')
+    unpacked = bits.unpacked()
+    for start in range(0, len(unpacked), 300007):
+        accumulator.update(unpacked[start:start + 300007])
+    assert accumulator.result() == TemplateMatching.overlapping_patterns(bits, template_pattern='101010101')
+
+
+def short_sequence():
+    # 41 bits: the blocks of 5 bits are shorter than the 9-bit templates
+    return ''.join(str(bit) for bit in np.random.default_rng(0).integers(0, 2, 41))
+
+
+def test_non_overlapping_short_blocks_have_no_hits():
+    p_value, passed = TemplateMatching.non_overlapping_test(short_sequence())
+    assert p_value > 0.99 and passed
+
+
+def test_non_overlapping_sweep_short_blocks_have_no_hits():
+    # With no hits in any block every template gets the p-value of the single template test
+    expected = TemplateMatching.non_overlapping_test(short_sequence())[0]
+    for template, p_value, passed in TemplateMatching.non_overlapping_sweep(short_sequence()):
+        assert abs(p_value - expected) < 1e-12 and passed